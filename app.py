@@ -1,12 +1,22 @@
 import streamlit as st
+import pandas as pd
 import os
+import json
 import time
 from src.config import Config
 from src.document_processor import DocumentProcessor
-from src.vector_store import VectorStore
+from src.extraction_cache import get_page_cache
+from src.namespaces import get_namespace_manager
+from src.jobs import get_job_manager
+from src.pdf_source import PDFSource
 from src.llm_handler import LLMHandler
 from src.comparison import RAGComparison
-from src.metrics import PerformanceMetrics
+from src.metrics import PerformanceMetrics, trace
+from src.metrics_sink import get_metrics_sink
+from src.performance_profiles import (
+    active_profile, apply_profile, available_profiles, ensure_profile, query_overrides
+)
+from src.profiling import profile_capture
 from src.export_utils import ExportUtils
 
 # Page configuration
@@ -67,13 +77,18 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Validate and apply the performance profile (once per server process)
+try:
+    ensure_profile()
+except (ValueError, OSError) as e:
+    st.error(f"❌ Invalid performance profile configuration: {str(e)}")
+    st.stop()
+
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "documents_processed" not in st.session_state:
     st.session_state.documents_processed = []
-if "vector_store" not in st.session_state:
-    st.session_state.vector_store = None
 if "llm_handler" not in st.session_state:
     st.session_state.llm_handler = None
 if "comparison_mode" not in st.session_state:
@@ -81,17 +96,94 @@ if "comparison_mode" not in st.session_state:
 if "total_chunks" not in st.session_state:
     st.session_state.total_chunks = 0
 if "metrics" not in st.session_state:
-    st.session_state.metrics = PerformanceMetrics()
+    st.session_state.metrics = PerformanceMetrics(sink=get_metrics_sink())
 if "show_metrics" not in st.session_state:
     st.session_state.show_metrics = False
+if "profiling_enabled" not in st.session_state:
+    st.session_state.profiling_enabled = False
+if "namespace" not in st.session_state:
+    st.session_state.namespace = Config.DEFAULT_NAMESPACE
+if "retrieval_overrides" not in st.session_state:
+    st.session_state.retrieval_overrides = {}
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = []
+if "job_results_applied" not in st.session_state:
+    st.session_state.job_results_applied = {}
 
 Config.ensure_directories()
 
+
+def render_profile(profile: dict, key: str):
+    """Show a captured cProfile/tracemalloc profile with download buttons"""
+    st.markdown(f"**🐞 Profile** — peak traced memory: {profile['peak_memory_kb']:.0f} KB")
+    st.markdown("Top functions by cumulative time")
+    st.dataframe(pd.DataFrame(profile["top_functions"]), use_container_width=True)
+    st.markdown("Top allocation sites")
+    st.dataframe(pd.DataFrame(profile["top_allocations"]), use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="⬇️ Download profile (JSON)",
+            data=json.dumps(profile, indent=2),
+            file_name=f"documind_profile_{key}.json",
+            mime="application/json",
+            key=f"profile_json_{key}"
+        )
+    with col2:
+        st.download_button(
+            label="⬇️ Download pstats report",
+            data=profile["stats_text"],
+            file_name=f"documind_profile_{key}.txt",
+            mime="text/plain",
+            key=f"profile_txt_{key}"
+        )
+
 # Header
 st.markdown('<div class="main-header">📚 DocuMind</div>', unsafe_allow_html=True)
 st.markdown('<div class="sub-header">RAG-Powered Document Intelligence System</div>', unsafe_allow_html=True)
 
+def lookup_chunk_text(metadata: dict):
+    """Stored text of a cited chunk, with the namespace pinned while it is read"""
+    with get_namespace_manager().using(st.session_state.namespace) as store:
+        return store.get_chunk_text(metadata)
+
 # Create tabs for different sections
+def apply_job_results():
+    """Add documents committed by this session's background jobs to the session state"""
+    for job in reversed(get_job_manager().list_jobs(st.session_state.job_ids)):
+        applied = st.session_state.job_results_applied.get(job["job_id"], 0)
+        st.session_state.job_results_applied[job["job_id"]] = len(job["documents"])
+        if job["namespace"] != st.session_state.namespace:
+            continue
+        
+        for result in job["documents"][applied:]:
+            if not result["success"]:
+                continue
+            
+            # A new version of an already processed file replaces the old one
+            for old_doc in list(st.session_state.documents_processed):
+                if old_doc["name"] == result["name"] and old_doc.get("doc_id"):
+                    with get_namespace_manager().using(st.session_state.namespace) as store:
+                        store.delete_document(old_doc["doc_id"])
+                    st.session_state.documents_processed.remove(old_doc)
+                    st.session_state.total_chunks -= old_doc["chunks"]
+                    st.toast(f"♻️ Replaced previous version of {result['name']}")
+            
+            st.session_state.documents_processed.append({
+                "name": result["name"],
+                "doc_id": result["metadata"]["doc_id"],
+                "chunks": result["num_chunks"],
+                "pages": result["metadata"]["num_pages"]
+            })
+            st.session_state.total_chunks += result["num_chunks"]
+            st.toast(f"✓ {result['name']} is ready to query")
+
+
+# Checked before applying results, so a job finishing mid-run still gets one more refresh
+jobs_active = get_job_manager().has_active(st.session_state.job_ids)
+apply_job_results()
+
 tab1, tab2, tab3 = st.tabs(["💬 Chat", "📊 Analytics", "⚙️ Settings"])
 
 with tab3:
@@ -104,30 +196,97 @@ with tab3:
         show_sources = st.checkbox("Show sources in chat", value=True)
         show_timestamps = st.checkbox("Show timestamps", value=False)
         
+        st.subheader("🐞 Debug")
+        st.checkbox(
+            "Profile queries and ingestion (cProfile + tracemalloc)",
+            key="profiling_enabled",
+            help="Slows requests down noticeably. Results appear in the Analytics tab."
+        )
+        
+        st.subheader("⚡ Performance Profile")
+        profiles = available_profiles()
+        profile_names = list(profiles)
+        selected_profile = st.selectbox(
+            "Profile (server-wide)",
+            profile_names,
+            index=profile_names.index(active_profile()),
+            disabled=not Config.PROFILE_SWITCH_ENABLED,
+            help=(
+                "Switching changes the profile for every session on this server. Index backend, caches and "
+                "worker pools follow it for stores opened afterwards."
+                if Config.PROFILE_SWITCH_ENABLED
+                else "Set with PERFORMANCE_PROFILE; switching here needs PROFILE_SWITCH_ENABLED=true."
+            )
+        )
+        if selected_profile != active_profile():
+            apply_profile(selected_profile)
+            st.rerun()
+        if profiles[selected_profile]:
+            st.caption(", ".join(f"{name}={value}" for name, value in profiles[selected_profile].items()))
+        
         st.subheader("🔧 System Info")
         st.info(f"""
+        **Performance Profile:** {active_profile()}
         **Embedding Model:** {Config.EMBEDDING_MODEL}
-        **Chunk Size:** {Config.CHUNK_SIZE} characters
-        **Chunk Overlap:** {Config.CHUNK_OVERLAP} characters
+        **Chunk Size:** {Config.CHUNK_SIZE} words
+        **Chunk Overlap:** {Config.CHUNK_OVERLAP} words
         **Top-K Results:** {Config.TOP_K_RESULTS}
+        **Index Backend:** {Config.INDEX_BACKEND}
         """)
     
     with col2:
         st.subheader("📥 Export Data")
         
         if st.session_state.messages:
-            # Export to Markdown
+            include_chunk_text = st.checkbox(
+                "Include cited chunk text",
+                value=False,
+                disabled=not st.session_state.documents_processed
+            )
+            chunk_lookup = lookup_chunk_text if include_chunk_text else None
+            
+            # Export to Markdown (streamed to disk, then served from the file)
             if st.button("📄 Export Chat (Markdown)", use_container_width=True):
-                md_content = ExportUtils.export_chat_to_markdown(
-                    st.session_state.messages,
-                    st.session_state.documents_processed
+                ExportUtils.prune_exports(Config.EXPORT_DIR)
+                file_name = f"documind_chat_{time.strftime('%Y%m%d_%H%M%S')}.md"
+                export_path = os.path.join(Config.EXPORT_DIR, file_name)
+                ExportUtils.write_stream(
+                    ExportUtils.iter_chat_markdown(
+                        st.session_state.messages,
+                        st.session_state.documents_processed,
+                        chunk_lookup
+                    ),
+                    export_path
                 )
-                st.download_button(
-                    label="⬇️ Download Markdown",
-                    data=md_content,
-                    file_name=f"documind_chat_{time.strftime('%Y%m%d_%H%M%S')}.md",
-                    mime="text/markdown"
+                with open(export_path, "rb") as export_file:
+                    st.download_button(
+                        label="⬇️ Download Markdown",
+                        data=export_file,
+                        file_name=file_name,
+                        mime="text/markdown"
+                    )
+            
+            # Export to NDJSON (one record per line, streamed to disk)
+            if st.button("🧾 Export Chat (NDJSON)", use_container_width=True):
+                ExportUtils.prune_exports(Config.EXPORT_DIR)
+                file_name = f"documind_chat_{time.strftime('%Y%m%d_%H%M%S')}.ndjson"
+                export_path = os.path.join(Config.EXPORT_DIR, file_name)
+                ExportUtils.write_stream(
+                    ExportUtils.iter_chat_ndjson(
+                        st.session_state.messages,
+                        st.session_state.documents_processed,
+                        st.session_state.metrics.get_summary_stats(),
+                        chunk_lookup
+                    ),
+                    export_path
                 )
+                with open(export_path, "rb") as export_file:
+                    st.download_button(
+                        label="⬇️ Download NDJSON",
+                        data=export_file,
+                        file_name=file_name,
+                        mime="application/x-ndjson"
+                    )
             
             # Export to JSON
             if st.button("📊 Export Chat (JSON)", use_container_width=True):
@@ -186,12 +345,71 @@ with tab2:
             </div>
             """, unsafe_allow_html=True)
         
+        st.caption(
+            f"Latency percentiles — p50: {stats['p50_response_time']:.2f}s | "
+            f"p95: {stats['p95_response_time']:.2f}s | p99: {stats['p99_response_time']:.2f}s"
+        )
+        
+        st.subheader("📈 Response Time Trend")
+        st.line_chart(pd.DataFrame({"response_time": st.session_state.metrics.get_response_time_series()}))
+        
+        st.markdown("---")
+        
+        # Per-stage breakdown
+        st.subheader("⏱️ Time per Stage")
+        breakdown = st.session_state.metrics.get_stage_breakdown()
+        if breakdown:
+            st.bar_chart(pd.DataFrame({"seconds": breakdown}))
+            st.caption("Average seconds per query spent in each stage. 'other' is time not covered by a stage.")
+        
+        cutoff_counts = st.session_state.metrics.get_cutoff_counts()
+        if cutoff_counts:
+            st.caption(
+                "✂️ Adaptive top-k cutoffs — "
+                + " | ".join(f"{cutoff}: {count}" for cutoff, count in sorted(cutoff_counts.items()))
+            )
+        
+        ingestion_breakdown = st.session_state.metrics.get_ingestion_stage_breakdown()
+        if ingestion_breakdown:
+            with st.expander("📥 Ingestion stages"):
+                for stage, seconds in sorted(ingestion_breakdown.items(), key=lambda item: -item[1]):
+                    st.write(f"**{stage}:** {seconds:.2f}s")
+                
+                for i, run in enumerate(st.session_state.metrics.get_recent_ingestions(5)):
+                    st.caption(
+                        f"{run['timestamp']}: {run['num_chunks']} chunks embedded, "
+                        f"{run.get('num_duplicates', 0)} duplicates referenced "
+                        f"(dedup ratio {run.get('dedup_ratio', 0.0):.0%})"
+                    )
+                    if run.get("profile"):
+                        st.markdown(f"---\n**Run at {run['timestamp']}** ({run['num_documents']} documents)")
+                        render_profile(run["profile"], f"ingest_{i}_{run['timestamp'].replace(' ', '_')}")
+        
+        page_cache = get_page_cache()
+        if page_cache is not None:
+            cache_stats = page_cache.get_stats()
+            st.caption(
+                f"📄 Page text cache: {cache_stats['documents']} documents, {cache_stats['pages']} pages, "
+                f"{cache_stats['bytes'] / 1024 / 1024:.1f} / {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB, "
+                f"hit rate {cache_stats['hit_rate']:.0%}"
+            )
+        
         st.markdown("---")
         
         # Recent queries
         st.subheader("📝 Recent Query History")
         recent = st.session_state.metrics.get_recent_queries(10)
         
+        # Query log for replay with benchmarks/replay_queries.py
+        st.download_button(
+            label="🧾 Download Query Log (NDJSON)",
+            data="".join(ExportUtils.iter_query_log_ndjson(
+                st.session_state.metrics.get_recent_queries(Config.METRICS_RECENT_RECORDS)
+            )),
+            file_name=f"documind_queries_{time.strftime('%Y%m%d_%H%M%S')}.ndjson",
+            mime="application/x-ndjson"
+        )
+        
         for i, query_data in enumerate(reversed(recent), 1):
             with st.expander(f"Query {i}: {query_data['query'][:50]}..."):
                 col1, col2, col3 = st.columns(3)
@@ -202,7 +420,16 @@ with tab2:
                 with col3:
                     st.metric("Sources Used", query_data['num_sources'])
                 
+                if query_data.get("stages"):
+                    st.markdown("**Stages:** " + " | ".join(
+                        f"{stage} {seconds * 1000:.0f}ms"
+                        for stage, seconds in query_data["stages"].items()
+                    ))
+                
                 st.text(f"Timestamp: {query_data['timestamp']}")
+                
+                if query_data.get("profile"):
+                    render_profile(query_data["profile"], f"query_{i}_{query_data['timestamp'].replace(' ', '_')}")
     else:
         st.info("📊 Analytics will appear here after you start querying documents")
 
@@ -211,6 +438,18 @@ with tab1:
     with st.sidebar:
         st.header("📁 Document Management")
         
+        # Workspace selector - each workspace has its own collection
+        namespace = st.text_input(
+            "🏢 Workspace",
+            value=st.session_state.namespace,
+            help="Documents and searches are scoped to this workspace"
+        ).strip() or Config.DEFAULT_NAMESPACE
+        if namespace != st.session_state.namespace:
+            st.session_state.namespace = namespace
+            st.session_state.documents_processed = []
+            st.session_state.messages = []
+            st.session_state.total_chunks = 0
+        
         # Mode selector
         st.markdown("### 🎯 Query Mode")
         mode = st.radio(
@@ -220,6 +459,45 @@ with tab1:
         )
         st.session_state.comparison_mode = (mode == "⚖️ Compare RAG vs No RAG")
         
+        # Per-query retrieval overrides (0 keeps the profile's value)
+        with st.expander("🎛️ Retrieval overrides"):
+            top_k_override = st.number_input(
+                "Top-K",
+                min_value=0,
+                max_value=50,
+                value=st.session_state.retrieval_overrides.get("TOP_K_RESULTS", 0),
+                help=(
+                    f"Chunks sent to the LLM; with adaptive top-k this is the upper bound "
+                    f"(0 uses the profile value: {Config.ADAPTIVE_MAX_K if Config.ADAPTIVE_TOP_K else Config.TOP_K_RESULTS})"
+                )
+            )
+            rerank_override = st.number_input(
+                "Rerank candidates",
+                min_value=0,
+                max_value=5000,
+                value=st.session_state.retrieval_overrides.get("REDUCED_CANDIDATES", 0),
+                step=50,
+                help="Candidates reranked with full vectors by the two_stage / pq backends (0 uses the profile value)"
+            )
+            route_override = st.number_input(
+                "Routed documents",
+                min_value=0,
+                max_value=500,
+                value=st.session_state.retrieval_overrides.get("DOC_ROUTING_TOP_DOCS", 0),
+                help="Search only the chunks of the documents closest to the query (0 uses the profile value)"
+            )
+            st.session_state.retrieval_overrides = {
+                name: value for name, value in [
+                    ("TOP_K_RESULTS", int(top_k_override)),
+                    ("ADAPTIVE_MAX_K", int(top_k_override)),
+                    ("ADAPTIVE_MIN_K", int(top_k_override) if top_k_override < Config.ADAPTIVE_MIN_K else 0),
+                    ("REDUCED_CANDIDATES", int(rerank_override)),
+                    ("PQ_RERANK_CANDIDATES", int(rerank_override)),
+                    ("DOC_ROUTING", bool(route_override)),
+                    ("DOC_ROUTING_TOP_DOCS", int(route_override)),
+                ] if value
+            }
+        
         st.markdown("---")
         
         # File uploader
@@ -230,56 +508,104 @@ with tab1:
             help="Upload one or more PDF files to query"
         )
         
-        # Process documents
+        # Process documents in the background; querying stays available meanwhile
         if uploaded_files:
             if st.button("🔄 Process Documents", type="primary"):
-                with st.spinner("Processing documents..."):
-                    try:
-                        processor = DocumentProcessor()
-                        
-                        if st.session_state.vector_store is None:
-                            st.session_state.vector_store = VectorStore()
-                        
-                        if st.session_state.llm_handler is None:
-                            st.session_state.llm_handler = LLMHandler()
-                        
-                        all_chunks = []
+                upload_sources = []
+                handed_off = False
+                try:
+                    processor = DocumentProcessor()
+                    
+                    if st.session_state.llm_handler is None:
+                        st.session_state.llm_handler = LLMHandler()
+                    
+                    sources = []
+                    for uploaded_file in uploaded_files:
+                        # Read from memory (large uploads spill to a temp file)
+                        source = PDFSource(uploaded_file, name=uploaded_file.name)
+                        upload_sources.append(source)
                         
-                        progress_bar = st.progress(0)
-                        for idx, uploaded_file in enumerate(uploaded_files):
-                            file_path = os.path.join(Config.UPLOAD_DIR, uploaded_file.name)
-                            with open(file_path, "wb") as f:
-                                f.write(uploaded_file.getbuffer())
-                            
-                            st.info(f"📄 Processing: {uploaded_file.name}")
-                            result = processor.process_pdf(file_path)
-                            
-                            if result["success"]:
-                                all_chunks.extend(result["chunks"])
+                        # Identical content is already indexed - nothing to re-embed
+                        doc_id = processor.compute_doc_id(source)
+                        with get_namespace_manager().using(st.session_state.namespace) as store:
+                            entry = store.list_documents()[doc_id] if store.has_document(doc_id) else None
+                        if entry is not None:
+                            source.close()
+                            if not any(doc.get("doc_id") == doc_id for doc in st.session_state.documents_processed):
                                 st.session_state.documents_processed.append({
                                     "name": uploaded_file.name,
-                                    "chunks": result["num_chunks"],
-                                    "pages": result["metadata"]["num_pages"]
+                                    "doc_id": doc_id,
+                                    "chunks": entry["num_chunks"],
+                                    "pages": entry["num_pages"]
                                 })
-                                st.success(f"✓ {uploaded_file.name}: {result['num_chunks']} chunks")
-                            else:
-                                st.error(f"✗ Error: {result.get('error', 'Unknown')}")
-                            
-                            progress_bar.progress((idx + 1) / len(uploaded_files))
-                        
-                        if all_chunks:
-                            st.info("🔄 Creating embeddings...")
-                            store_result = st.session_state.vector_store.add_documents(all_chunks)
-                            
-                            if store_result["success"]:
-                                st.session_state.total_chunks += len(all_chunks)
-                                st.success(f"🎉 Successfully processed {len(all_chunks)} chunks!")
-                                st.balloons()
-                            else:
-                                st.error(f"Error: {store_result.get('error', 'Unknown')}")
+                                st.session_state.total_chunks += entry["num_chunks"]
+                            st.info(f"⏭️ {uploaded_file.name} is already indexed")
+                            continue
+                        if Config.PERSIST_UPLOADS:
+                            source.persist(doc_id=doc_id)
+                        sources.append((uploaded_file.name, source))
                     
-                    except Exception as e:
-                        st.error(f"Error: {str(e)}")
+                    if sources:
+                        # The job closes the sources once it has read them
+                        job_id = get_job_manager().submit(
+                            sources,
+                            st.session_state.namespace,
+                            metrics=st.session_state.metrics,
+                            profiling=st.session_state.profiling_enabled
+                        )
+                        handed_off = True
+                        st.session_state.job_ids.append(job_id)
+                        st.info(
+                            f"🔄 Queued ingestion job {job_id} ({len(sources)} documents). "
+                            "Documents become searchable as they are committed."
+                        )
+                
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
+                finally:
+                    if not handed_off:
+                        for source in upload_sources:
+                            source.close()
+        
+        # This session's ingestion jobs (refreshed while any is active)
+        session_jobs = get_job_manager().list_jobs(st.session_state.job_ids)
+        if session_jobs:
+            st.markdown("---")
+            st.markdown("### ⏳ Ingestion Jobs")
+            state_icons = {"queued": "🕒", "running": "🔄", "done": "✅", "failed": "❌"}
+            for job in session_jobs[:5]:
+                active = job["state"] in ("queued", "running")
+                with st.expander(f"{state_icons[job['state']]} Job {job['job_id']} - {job['state']}", expanded=active):
+                    st.progress(
+                        job["progress"],
+                        text=f"{job['documents_done']}/{job['documents_total']} documents"
+                    )
+                    if job["state"] == "queued":
+                        st.caption(f"Waiting {job['queued_seconds']:.0f}s for a free worker")
+                    else:
+                        st.caption(
+                            f"{job['chunks_added']} chunks in {job['elapsed']:.1f}s "
+                            f"({job['chunks_per_second']:.0f} chunks/s)"
+                            + (f", {job['num_duplicates']} near-duplicates referenced" if job["num_duplicates"] else "")
+                        )
+                    for result in job["documents"]:
+                        if result["success"]:
+                            duplicates = result.get("num_duplicates", 0)
+                            st.write(
+                                f"✓ {result['name']}: {result['num_chunks']} chunks"
+                                + (f" ({duplicates} near-duplicates referenced)" if duplicates else "")
+                            )
+                            if result["metadata"].get("skipped_pages"):
+                                st.warning(
+                                    f"⚠ {result['name']}: skipped unreadable page(s) "
+                                    f"{result['metadata']['skipped_pages']}"
+                                )
+                        else:
+                            st.write(f"✗ {result['name']}: {result.get('error', 'Unknown')}")
+                    if job["error"]:
+                        st.error(f"Error: {job['error']}")
+                    elif job["summary"] and job["summary"]["num_chunks_added"]:
+                        st.caption(f"Dedup ratio {job['summary']['dedup_ratio']:.0%}")
         
         # Statistics
         if st.session_state.documents_processed:
@@ -305,10 +631,20 @@ with tab1:
             
             st.markdown("---")
             st.subheader("📄 Documents")
-            for doc in st.session_state.documents_processed:
+            for idx, doc in enumerate(st.session_state.documents_processed):
                 with st.expander(f"📄 {doc['name']}"):
                     st.write(f"**Pages:** {doc['pages']}")
                     st.write(f"**Chunks:** {doc['chunks']}")
+                    
+                    if doc.get("doc_id") and st.button("🗑️ Remove", key=f"remove_{doc['doc_id']}_{idx}"):
+                        with get_namespace_manager().using(st.session_state.namespace) as store:
+                            delete_result = store.delete_document(doc["doc_id"])
+                        if delete_result["success"]:
+                            st.session_state.documents_processed.remove(doc)
+                            st.session_state.total_chunks -= doc["chunks"]
+                            st.rerun()
+                        else:
+                            st.error(f"Error: {delete_result.get('error', 'Unknown')}")
         
         # Clear button
         if st.session_state.documents_processed:
@@ -316,10 +652,9 @@ with tab1:
             if st.button("🗑️ Clear All", type="secondary"):
                 st.session_state.documents_processed = []
                 st.session_state.messages = []
-                st.session_state.vector_store = None
                 st.session_state.llm_handler = None
                 st.session_state.total_chunks = 0
-                st.session_state.metrics = PerformanceMetrics()
+                st.session_state.metrics = PerformanceMetrics(sink=get_metrics_sink())
                 st.rerun()
     
     # Main chat area
@@ -383,12 +718,16 @@ with tab1:
                 st.markdown(prompt)
             
             with st.chat_message("assistant"):
-                with st.spinner("Thinking..."):
+                query_metric = None
+                with st.spinner("Thinking..."), trace() as query_trace, \
+                        query_overrides(**st.session_state.retrieval_overrides), \
+                        profile_capture(st.session_state.profiling_enabled) as query_profile, \
+                        get_namespace_manager().using(st.session_state.namespace) as vector_store:
                     try:
                         if st.session_state.comparison_mode:
                             comparison = RAGComparison(
                                 st.session_state.llm_handler,
-                                st.session_state.vector_store
+                                vector_store
                             )
                             result = comparison.compare_answers(prompt)
                             
@@ -408,7 +747,7 @@ with tab1:
                             num_chunks = len(sources)
                         
                         else:
-                            relevant_chunks = st.session_state.vector_store.search(prompt, top_k=Config.TOP_K_RESULTS)
+                            relevant_chunks = vector_store.search(prompt)
                             result = st.session_state.llm_handler.generate_answer(prompt, relevant_chunks)
                             
                             if result["success"]:
@@ -428,15 +767,21 @@ with tab1:
                         
                         # Track metrics
                         response_time = time.time() - start_time
-                        st.session_state.metrics.track_query(
+                        query_metric = st.session_state.metrics.track_query(
                             prompt,
                             response_time,
                             num_chunks,
-                            sources
+                            sources,
+                            query_trace.stages,
+                            cutoff=query_trace.attributes.get("cutoff")
                         )
                         
                         # Show performance info
-                        st.caption(f"⚡ Response time: {response_time:.2f}s | Chunks: {num_chunks}")
+                        cutoff = query_trace.attributes.get("cutoff")
+                        st.caption(
+                            f"⚡ Response time: {response_time:.2f}s | Chunks: {num_chunks}"
+                            + (f" of {query_trace.attributes['chunks_fetched']} fetched (cutoff: {cutoff})" if cutoff else "")
+                        )
                         
                         st.session_state.messages.append({
                             "role": "assistant",
@@ -448,6 +793,9 @@ with tab1:
                         error_msg = f"Error: {str(e)}"
                         st.error(error_msg)
                         st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                
+                if query_profile is not None and query_metric is not None:
+                    st.session_state.metrics.attach_profile(query_metric, query_profile.to_dict())
 
 # Footer
 st.markdown("---")
@@ -456,4 +804,9 @@ st.markdown("""
     <p><strong>DocuMind v1.0</strong> - RAG-Powered Document Intelligence</p>
     <p style='font-size: 0.85rem;'>Streamlit • ChromaDB • Sentence Transformers • OpenAI</p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Poll while this session has ingestion jobs in flight (any interaction reruns sooner)
+if jobs_active:
+    time.sleep(Config.JOB_POLL_INTERVAL_S)
+    st.rerun()
\ No newline at end of file
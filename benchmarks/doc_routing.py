@@ -0,0 +1,102 @@
+"""
+Document routing benchmark
+
+Builds a synthetic corpus of documents whose chunks cluster around a
+per-document direction (documents on the same topic overlap), then compares
+searching every chunk with routing each query to its closest document
+centroids first. Reports recall@k against exact search and latency for the
+store's real search path and for an exact scan of the routed documents (the
+recall the router alone gives up).
+
+Usage:
+    python benchmarks/doc_routing.py --docs 2000 --chunks-per-doc 50 --top-docs 2 4 8 16
+    python benchmarks/doc_routing.py --backend two_stage --top-docs 4 8 16 32
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.evaluation import RetrievalEvaluator
+from src.sharding import PrecomputedEmbeddings
+from src.vector_store import VectorStore
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_corpus(docs: int, chunks_per_doc: int, topics: int, dim: int, spread: float, seed: int):
+    """Unit chunk vectors grouped by document, documents grouped by topic"""
+    rng = np.random.default_rng(seed)
+    noise = lambda *shape: rng.standard_normal(shape) / np.sqrt(dim)
+    topic_vectors = normalize(rng.standard_normal((topics, dim)))
+    centers = normalize(topic_vectors[rng.integers(topics, size=docs)] + 0.7 * noise(docs, dim))
+    chunks = normalize(centers[:, None, :] + spread * noise(docs, chunks_per_doc, dim))
+    return chunks.reshape(docs * chunks_per_doc, dim)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall and latency of document-level routing")
+    parser.add_argument("--docs", type=int, default=2000, help="Documents in the corpus")
+    parser.add_argument("--chunks-per-doc", type=int, default=50, help="Chunks per document")
+    parser.add_argument("--topics", type=int, default=200, help="Topics documents are drawn around")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--spread", type=float, default=2.0, help="Chunk scatter around the document direction")
+    parser.add_argument("--queries", type=int, default=200, help="Queries (perturbed chunks)")
+    parser.add_argument("--k", type=int, default=Config.TOP_K_RESULTS, help="Ground-truth depth for recall@k")
+    parser.add_argument("--top-docs", type=int, nargs="+", default=[2, 4, 8, 16], help="Documents routed to")
+    parser.add_argument("--backend", choices=("chroma", "two_stage", "pq"), default="chroma", help="Index backend")
+    parser.add_argument("--target", type=float, default=0.95, help="Recall target for the recommendation")
+    args = parser.parse_args()
+
+    vectors = synthetic_corpus(args.docs, args.chunks_per_doc, args.topics, args.dim, args.spread, seed=0)
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(vectors), size=args.queries, replace=False)
+    queries = normalize(vectors[picks] + 0.6 * rng.standard_normal((args.queries, args.dim)) / np.sqrt(args.dim))
+
+    db_dir = tempfile.mkdtemp(prefix="documind-bench-")
+    Config.VECTOR_DB_DIR = db_dir
+    try:
+        store = VectorStore(
+            collection_name="bench-routing",
+            embedding_generator=PrecomputedEmbeddings(),
+            index_backend=args.backend
+        )
+        metadatas = [
+            {"doc_id": f"doc-{i // args.chunks_per_doc}", "chunk_id": i % args.chunks_per_doc, "filename": "synthetic"}
+            for i in range(len(vectors))
+        ]
+        store.add_embeddings([f"chunk {i}" for i in range(len(vectors))], vectors, metadatas)
+        store.persist_indexes()
+
+        evaluator = RetrievalEvaluator(store, [f"query {i}" for i in range(args.queries)], k=args.k)
+        evaluator.build_ground_truth(queries)
+
+        results = [evaluator.evaluate(f"{args.backend} (every chunk)", evaluator.store_routed(0))]
+        for top_docs in args.top_docs:
+            if top_docs >= args.docs:
+                continue
+            share = top_docs / args.docs
+            search, build_s = evaluator.doc_routed(top_docs)
+            results.append(evaluator.evaluate(f"exact in {top_docs} docs ({share:.1%})", search, build_s=build_s))
+            results.append(evaluator.evaluate(f"{args.backend} routed, {top_docs} docs ({share:.1%})",
+                                              evaluator.store_routed(top_docs)))
+
+        print()
+        print(f"{args.docs} documents x {args.chunks_per_doc} chunks, {args.topics} topics, "
+              f"router: {store.doc_router.bytes_per_vector() * len(store.doc_router) / 1024:.0f} KB")
+        print(evaluator.format_report(results, recall_target=args.target))
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
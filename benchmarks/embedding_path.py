@@ -0,0 +1,117 @@
+"""
+Embedding handoff benchmark
+
+Writes and queries the same random unit vectors twice, once converting them
+to Python lists before every ChromaDB call (the old handoff) and once passing
+contiguous float32 arrays through VectorStore, and reports wall time, peak
+Python allocations (tracemalloc) and the size of one batch pickled to a shard
+worker.
+
+Usage:
+    python benchmarks/embedding_path.py --chunks 20000 --dim 384 --queries 200
+"""
+import argparse
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.sharding import PrecomputedEmbeddings
+from src.vector_store import VectorStore
+
+
+def random_unit_vectors(count: int, dim: int, seed: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def measure(fn) -> dict:
+    """Wall time and peak traced allocation of one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_mb": peak / (1024 * 1024)}
+
+
+def run_path(mode: str, vectors: np.ndarray, queries: np.ndarray) -> dict:
+    store = VectorStore(
+        collection_name=f"bench-{mode}",
+        embedding_generator=PrecomputedEmbeddings(),
+        index_backend="chroma"
+    )
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+    texts = [f"chunk {i}" for i in range(len(vectors))]
+    metadatas = [{"doc_id": f"doc-{i // 100}", "chunk_index": i % 100} for i in range(len(vectors))]
+
+    def ingest_lists():
+        for start in range(0, len(ids), store.max_batch_size):
+            end = start + store.max_batch_size
+            store.collection.add(
+                ids=ids[start:end],
+                embeddings=vectors[start:end].tolist(),
+                documents=texts[start:end],
+                metadatas=metadatas[start:end]
+            )
+
+    def ingest_arrays():
+        store.add_embeddings(texts, vectors, metadatas, ids=ids)
+
+    def search_lists():
+        for query in queries:
+            store.collection.query(query_embeddings=[query.tolist()], n_results=Config.TOP_K_RESULTS)
+
+    def search_arrays():
+        for query in queries:
+            store.search_by_embedding(query, Config.TOP_K_RESULTS)
+
+    ingest = measure(ingest_lists if mode == "lists" else ingest_arrays)
+    search = measure(search_lists if mode == "lists" else search_arrays)
+    return {"ingest": ingest, "search": search}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare list and float32 array embedding handoff")
+    parser.add_argument("--chunks", type=int, default=20000, help="Vectors written")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Queries run")
+    args = parser.parse_args()
+
+    vectors = random_unit_vectors(args.chunks, args.dim, seed=0)
+    queries = random_unit_vectors(args.queries, args.dim, seed=1)
+
+    db_dir = tempfile.mkdtemp(prefix="documind-bench-")
+    Config.VECTOR_DB_DIR = db_dir
+    try:
+        print(f"{args.chunks} chunks x {args.dim} dims, {args.queries} queries")
+        header = (f"{'handoff':<8} {'ingest s':>9} {'ingest peak MB':>15} "
+                  f"{'search ms/q':>12} {'search peak MB':>15}")
+        print(header)
+        print("-" * len(header))
+        for mode in ("lists", "arrays"):
+            result = run_path(mode, vectors, queries)
+            print(f"{mode:<8} {result['ingest']['seconds']:>9.2f} {result['ingest']['peak_mb']:>15.1f} "
+                  f"{result['search']['seconds'] * 1000 / args.queries:>12.2f} {result['search']['peak_mb']:>15.1f}")
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+    batch = vectors[:Config.WRITE_BATCH_SIZE]
+    print()
+    print(f"One {len(batch)}-vector batch pickled to a shard worker: "
+          f"{len(pickle.dumps(batch.tolist())) / 1024:.0f} KB as lists, "
+          f"{len(pickle.dumps(batch)) / 1024:.0f} KB as float32")
+
+
+if __name__ == "__main__":
+    main()
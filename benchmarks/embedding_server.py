@@ -0,0 +1,106 @@
+"""
+Embedding server benchmark
+
+Runs several client processes that each embed single queries, first with a
+model loaded in every process, then through one shared embedding server,
+and reports throughput, the server's average batch size and peak memory
+per client process.
+
+Usage:
+    python benchmarks/embedding_server.py --clients 4 --queries 200
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+
+
+def run_client(socket_path: str, num_queries: int, start_barrier) -> dict:
+    """One client process: load (or connect), wait for the others, embed queries"""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+
+    Config.EMBEDDING_SERVER_SOCKET = socket_path
+    Config.EMBEDDING_SERVER_AUTOSTART = False
+    from src.embeddings import EmbeddingGenerator
+    generator = EmbeddingGenerator()
+    generator.generate_embedding("warm up")
+
+    start_barrier.wait()
+    start = time.perf_counter()
+    for i in range(num_queries):
+        generator.generate_embedding(f"What does section {i} of the contract say about termination?")
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is KB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource is not None else 0.0
+    return {"seconds": elapsed, "peak_mb": peak_mb}
+
+
+def run(socket_path: str, clients: int, queries: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    manager = context.Manager()
+    barrier = manager.Barrier(clients)
+    with context.Pool(clients) as pool:
+        results = pool.starmap(run_client, [(socket_path, queries, barrier)] * clients)
+    wall = max(result["seconds"] for result in results)
+    return {
+        "queries_per_second": clients * queries / wall if wall else 0.0,
+        "peak_mb_per_client": sum(result["peak_mb"] for result in results) / clients
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-process models with the shared embedding server")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent client processes")
+    parser.add_argument("--queries", type=int, default=200, help="Single-text embeddings per client")
+    parser.add_argument("--max-batch", type=int, default=Config.EMBEDDING_SERVER_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=Config.EMBEDDING_SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients x {args.queries} queries, model {Config.EMBEDDING_MODEL}")
+    header = f"{'mode':<14} {'queries/s':>10} {'peak MB/client':>15} {'avg batch':>10}"
+    print(header)
+    print("-" * len(header))
+
+    local = run("", args.clients, args.queries)
+    print(f"{'per-process':<14} {local['queries_per_second']:>10.1f} {local['peak_mb_per_client']:>15.0f} {1:>10}")
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "embeddings.sock")
+    server = multiprocessing.get_context("spawn").Process(
+        target=_serve,
+        args=(socket_path, args.max_batch, args.max_wait_ms),
+        daemon=True
+    )
+    server.start()
+    from src.embedding_server import EmbeddingClient, server_running
+    deadline = time.monotonic() + Config.EMBEDDING_SERVER_START_TIMEOUT
+    while not server_running(socket_path):
+        if time.monotonic() > deadline or not server.is_alive():
+            print("❌ Embedding server did not start")
+            return
+        time.sleep(0.2)
+
+    shared = run(socket_path, args.clients, args.queries)
+    stats = EmbeddingClient(socket_path, autostart=False).get_stats()
+    print(f"{'shared server':<14} {shared['queries_per_second']:>10.1f} {shared['peak_mb_per_client']:>15.0f} "
+          f"{stats['avg_batch_size']:>10.1f}")
+    server.terminate()
+
+
+def _serve(socket_path: str, max_batch: int, max_wait_ms: float):
+    from src.embedding_server import EmbeddingServer
+    EmbeddingServer(socket_path, max_batch, max_wait_ms).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
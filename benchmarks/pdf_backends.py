@@ -0,0 +1,89 @@
+"""
+PDF extraction backend benchmark
+
+Extracts every PDF in a fixture directory with each installed backend and
+reports pages per second and extracted characters, plus the backend the
+automatic probe would pick for each document.
+
+Usage:
+    python benchmarks/pdf_backends.py --corpus tests/fixtures/pdfs --max-pages 200
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.pdf_backends import available_backends, open_backend, select_backend
+
+
+def extract_all(name: str, pdf_path: str, max_pages: int) -> dict:
+    """Time one backend over one document"""
+    start = time.perf_counter()
+    backend = open_backend(name, pdf_path, isolated=False)
+    try:
+        num_pages = min(backend.num_pages, max_pages) if max_pages else backend.num_pages
+        chars = sum(len(backend.extract_page(page_num)) for page_num in range(num_pages))
+    finally:
+        backend.close()
+    return {"pages": num_pages, "chars": chars, "seconds": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PDF text extraction backends")
+    parser.add_argument("--corpus", default=Config.UPLOAD_DIR, help="Directory of fixture PDFs")
+    parser.add_argument("--backends", nargs="*", default=None, help="Backends to compare (default: all installed)")
+    parser.add_argument("--max-pages", type=int, default=0, help="Pages extracted per document (0 = all)")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "**", "*.pdf"), recursive=True))
+    if not paths:
+        print(f"❌ No PDFs found in {args.corpus}")
+        return
+
+    backends = args.backends or available_backends()
+    print(f"Corpus: {len(paths)} PDFs in {args.corpus} | backends: {', '.join(backends)}")
+
+    totals = {name: {"pages": 0, "chars": 0, "seconds": 0.0, "failures": 0} for name in backends}
+    print()
+    header = f"{'document':<40} " + " ".join(f"{name + ' chars':>16}" for name in backends) + f" {'probe pick':>12}"
+    print(header)
+    print("-" * len(header))
+
+    for path in paths:
+        row = []
+        for name in backends:
+            try:
+                result = extract_all(name, path, args.max_pages)
+            except Exception as e:
+                totals[name]["failures"] += 1
+                row.append(f"{'failed':>16}")
+                print(f"⚠ {name} failed on {os.path.basename(path)}: {str(e)}", file=sys.stderr)
+                continue
+            for key in ("pages", "chars", "seconds"):
+                totals[name][key] += result[key]
+            row.append(f"{result['chars']:>16}")
+
+        try:
+            backend, _ = select_backend(path, candidates=backends)
+            pick = backend.name
+            backend.close()
+        except Exception:
+            pick = "none"
+        print(f"{os.path.basename(path)[:40]:<40} " + " ".join(row) + f" {pick:>12}")
+
+    print()
+    header = f"{'backend':<12} {'pages':>8} {'pages/s':>10} {'chars':>12} {'failures':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, total in totals.items():
+        rate = total["pages"] / total["seconds"] if total["seconds"] else 0.0
+        print(f"{name:<12} {total['pages']:>8} {rate:>10.1f} {total['chars']:>12} {total['failures']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Product-quantization benchmark
+
+Trains PQ codebooks on the current collection for several code sizes and
+reports recall@k against exact search, search latency and memory per chunk,
+with and without an exact rerank of the top candidates.
+
+Usage:
+    python benchmarks/pq_index.py --subspaces 16 32 48 96 --rerank 0 100 300
+"""
+import argparse
+import os
+import sys
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.vector_store import VectorStore
+from src.evaluation import RetrievalEvaluator
+from benchmarks.recall_latency import load_queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall and memory of product-quantized search")
+    parser.add_argument("--collection", default="documents", help="Collection to evaluate")
+    parser.add_argument("--queries", default=None, help="File with one query per line")
+    parser.add_argument("--sample", type=int, default=100, help="Queries sampled from chunks when no file is given")
+    parser.add_argument("--k", type=int, default=Config.TOP_K_RESULTS, help="Ground-truth depth for recall@k")
+    parser.add_argument("--target", type=float, default=0.95, help="Recall target for the recommendation")
+    parser.add_argument("--subspaces", type=int, nargs="*", default=[16, 32, 48, 96], help="Code sizes (bytes per chunk) to try")
+    parser.add_argument("--rerank", type=int, nargs="*", default=[0, 100, 300], help="Rerank depths to try (0 = none)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    store = VectorStore(collection_name=args.collection, index_backend="chroma")
+    queries = load_queries(args.queries, store.collection, args.sample, args.seed)
+    if not queries:
+        print("❌ No queries available - ingest documents or pass --queries")
+        return
+
+    evaluator = RetrievalEvaluator(store, queries, k=args.k)
+    evaluator.build_ground_truth()
+    full_dim = evaluator.corpus.shape[1]
+    full_bytes = full_dim * evaluator.corpus.itemsize
+
+    results = [evaluator.evaluate("numpy exact", evaluator.numpy_exact())]
+    results[0]["bytes_per_chunk"] = full_bytes
+
+    for subspaces in args.subspaces:
+        if full_dim % subspaces:
+            print(f"⚠ Skipping {subspaces} subspaces: {full_dim} dims are not divisible")
+            continue
+        for rerank in args.rerank:
+            search, build_s, index = evaluator.product_quantized(subspaces, rerank)
+            label = f"pq {subspaces}B" + (f" + rerank {rerank}" if rerank else "")
+            result = evaluator.evaluate(label, search, build_s=build_s)
+            result["bytes_per_chunk"] = index.bytes_per_vector()
+            results.append(result)
+
+    print()
+    print(evaluator.format_report(results, recall_target=args.target))
+    print()
+    print(f"{'configuration':<40} {'bytes/chunk':>12} {'vs full':>8}")
+    for r in results:
+        print(f"{r['name']:<40} {r['bytes_per_chunk']:>12} {full_bytes / r['bytes_per_chunk']:>7.1f}x")
+    print("\nRerank reads the candidates' full vectors from ChromaDB; without it only the codes are held in memory.")
+
+
+if __name__ == "__main__":
+    main()
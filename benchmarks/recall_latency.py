@@ -0,0 +1,68 @@
+"""
+Recall-vs-latency harness for the current collection
+
+Builds exact brute-force ground truth for a query set and reports recall@k
+and search latency for ChromaDB HNSW variants, NumPy exact search,
+truncated dimensions, smaller top-k values and document routing, as a
+Pareto table.
+
+Usage:
+    python benchmarks/recall_latency.py --queries queries.txt --k 3 --target 0.95
+"""
+import argparse
+import os
+import random
+import sys
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.vector_store import VectorStore
+from src.evaluation import RetrievalEvaluator
+
+
+def load_queries(path: str, collection, sample_size: int, seed: int):
+    """Read queries from a file, or sample chunk openings from the collection"""
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+
+    total = collection.count()
+    rng = random.Random(seed)
+    offsets = rng.sample(range(total), min(sample_size, total))
+    queries = []
+    for offset in offsets:
+        page = collection.get(include=["documents"], limit=1, offset=offset)
+        words = page["documents"][0].split()
+        queries.append(" ".join(words[:30]))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k vs latency for retrieval settings")
+    parser.add_argument("--collection", default="documents", help="Collection to evaluate")
+    parser.add_argument("--queries", default=None, help="File with one query per line")
+    parser.add_argument("--sample", type=int, default=100, help="Queries sampled from chunks when no file is given")
+    parser.add_argument("--k", type=int, default=Config.TOP_K_RESULTS, help="Ground-truth depth for recall@k")
+    parser.add_argument("--target", type=float, default=0.95, help="Recall target for the recommendation")
+    parser.add_argument("--dims", type=int, nargs="*", default=[64, 128, 256], help="Truncated dimensions to try")
+    parser.add_argument("--route-docs", type=int, nargs="*", default=[Config.DOC_ROUTING_TOP_DOCS],
+                        help="Documents routed to per query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    store = VectorStore(collection_name=args.collection)
+    queries = load_queries(args.queries, store.collection, args.sample, args.seed)
+    if not queries:
+        print("❌ No queries available - ingest documents or pass --queries")
+        return
+
+    evaluator = RetrievalEvaluator(store, queries, k=args.k)
+    results = evaluator.run_default_suite(dims=args.dims, routing_grid=args.route_docs)
+    print()
+    print(evaluator.format_report(results, recall_target=args.target))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Query-log replay load test
+
+Replays queries from a chat export or a query log (Analytics tab ->
+"Download Query Log") against a namespace's vector store and a stub LLM with
+tunable latency, and reports throughput and latency percentiles. With
+--sweep it steps the offered load up to find the saturation point.
+
+Usage:
+    python benchmarks/replay_queries.py --log queries.ndjson --concurrency 8 --rate 5
+    python benchmarks/replay_queries.py --log queries.ndjson --arrival recorded --speedup 10
+    python benchmarks/replay_queries.py --log chat.json --concurrency 8 --sweep 1 2 4 8 16 --slo-p95-ms 2000
+"""
+import argparse
+import os
+import sys
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.load_testing import ARRIVALS, StubLLMHandler, find_saturation, load_query_log, replay
+from src.namespaces import get_namespace_manager
+
+HEADER = (f"{'offered q/s':>11} {'throughput':>10} {'p50 ms':>8} {'p90 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'wait ms':>8} {'errors':>7}")
+
+
+def format_row(summary: dict) -> str:
+    offered = f"{summary['offered_qps']:.2f}" if summary["offered_qps"] else "-"
+    return (f"{offered:>11} {summary['throughput_qps']:>10.2f} {summary['p50_ms']:>8.0f} "
+            f"{summary['p90_ms']:>8.0f} {summary['p95_ms']:>8.0f} {summary['p99_ms']:>8.0f} "
+            f"{summary['mean_wait_ms']:>8.0f} {summary['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay logged queries against search and a stub LLM")
+    parser.add_argument("--log", required=True, help="Chat export (JSON/NDJSON) or query log (NDJSON)")
+    parser.add_argument("--namespace", default=Config.DEFAULT_NAMESPACE, help="Namespace whose documents are searched")
+    parser.add_argument("--concurrency", type=int, default=4, help="Queries served at once")
+    parser.add_argument("--rate", type=float, default=None, help="Offered queries per second (default: closed loop)")
+    parser.add_argument("--arrival", choices=ARRIVALS, default="poisson", help="Arrival process for --rate")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Time compression for --arrival recorded")
+    parser.add_argument("--requests", type=int, default=0, help="Queries sent (the log is cycled; 0 = once through)")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0, help="Stub LLM mean latency")
+    parser.add_argument("--llm-jitter-ms", type=float, default=200.0, help="Stub LLM latency spread (+/-)")
+    parser.add_argument("--sweep", type=float, nargs="*", default=None, help="Offered rates to step through")
+    parser.add_argument("--slo-p95-ms", type=float, default=None, help="p95 latency objective for --sweep")
+    args = parser.parse_args()
+
+    queries = load_query_log(args.log)
+    if not queries:
+        print(f"❌ No queries found in {args.log}")
+        return
+    if args.requests and args.arrival != "recorded":
+        queries = [queries[i % len(queries)] for i in range(args.requests)]
+
+    store = get_namespace_manager().get_store(args.namespace)
+    if not store.get_collection_stats()["total_chunks"]:
+        print(f"⚠ Namespace {args.namespace} has no documents; searches will return nothing")
+    llm = StubLLMHandler(args.llm_latency_ms, args.llm_jitter_ms, seed=0)
+
+    # Load the embedding model and index before timing
+    store.search(queries[0]["query"])
+
+    print(f"{len(queries)} queries from {args.log} | concurrency {args.concurrency} | "
+          f"stub LLM {args.llm_latency_ms:g}±{args.llm_jitter_ms:g} ms")
+    print(HEADER)
+    print("-" * len(HEADER))
+
+    if args.sweep:
+        result = find_saturation(
+            queries, store.search, llm, args.concurrency, sorted(args.sweep),
+            slo_p95_ms=args.slo_p95_ms,
+            on_step=lambda summary: print(format_row(summary) + (" saturated" if summary["saturated"] else ""))
+        )
+        print()
+        if result["saturation_qps"] is None:
+            print(f"✓ No saturation up to {max(args.sweep):g} q/s")
+        else:
+            sustained = result["max_sustained_qps"]
+            print(f"Saturation at {result['saturation_qps']:g} q/s "
+                  f"(max sustained: {f'{sustained:g} q/s' if sustained else 'none of the tested rates'})")
+        return
+
+    summary = replay(queries, store.search, llm, args.concurrency, rate=args.rate,
+                     arrival=args.arrival, speedup=args.speedup)
+    print(format_row(summary))
+    if summary["stage_p50_ms"]:
+        print("Stage p50: " + " | ".join(f"{stage} {ms:.0f}ms" for stage, ms in summary["stage_p50_ms"].items()))
+
+
+if __name__ == "__main__":
+    main()
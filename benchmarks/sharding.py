@@ -0,0 +1,116 @@
+"""
+Sharded search throughput benchmark
+
+Loads the same synthetic corpus into ShardedVectorStore with different shard
+counts and measures ingestion rate, query throughput and latency with
+several concurrent clients. Queries are random vectors sent straight to the
+shards, so the embedding model is not loaded and only the index work is
+measured.
+
+Usage:
+    python benchmarks/sharding.py --chunks 100000 --shards 1 2 4 8 --clients 8
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.sharding import PrecomputedEmbeddings, ShardedVectorStore
+
+
+def random_vectors(rng: np.random.Generator, n: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def run(num_shards: int, corpus: np.ndarray, queries: np.ndarray, clients: int, top_k: int, backend: str) -> dict:
+    Config.VECTOR_DB_DIR = tempfile.mkdtemp(prefix="documind-shards-")
+    store = ShardedVectorStore(
+        collection_name="bench",
+        num_shards=num_shards,
+        embedding_generator=PrecomputedEmbeddings(),
+        index_backend=backend
+    )
+    try:
+        start = time.perf_counter()
+        batch_size = store.max_batch_size * num_shards
+        for offset in range(0, len(corpus), batch_size):
+            batch = corpus[offset:offset + batch_size]
+            metadatas = [
+                {"doc_id": f"bench{i // 100}", "chunk_id": i % 100, "filename": "bench"}
+                for i in range(offset, offset + len(batch))
+            ]
+            store.add_embeddings([""] * len(batch), batch, metadatas)
+        store.persist_indexes()
+        ingest_s = time.perf_counter() - start
+
+        # Warm every shard's index before timing
+        store.search_by_embedding(queries[0], top_k)
+
+        def timed_search(query: np.ndarray) -> float:
+            t0 = time.perf_counter()
+            store.search_by_embedding(query, top_k)
+            return (time.perf_counter() - t0) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            latencies = np.asarray(list(pool.map(timed_search, queries)))
+        elapsed = time.perf_counter() - start
+    finally:
+        store.close()
+        shutil.rmtree(Config.VECTOR_DB_DIR, ignore_errors=True)
+
+    return {
+        "shards": num_shards,
+        "ingest_per_s": len(corpus) / ingest_s,
+        "qps": len(queries) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query throughput of the sharded vector store")
+    parser.add_argument("--chunks", type=int, default=50000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--shards", type=int, nargs="*", default=[1, 2, 4, 8], help="Shard counts to try")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent query threads")
+    parser.add_argument("--queries", type=int, default=2000, help="Queries per run")
+    parser.add_argument("--top-k", type=int, default=Config.TOP_K_RESULTS)
+    parser.add_argument("--backend", default="chroma", help="Per-shard index backend (chroma, two_stage, pq)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = random_vectors(rng, args.chunks, args.dim)
+    queries = random_vectors(rng, args.queries, args.dim)
+    print(f"Corpus: {args.chunks} x {args.dim} | Queries: {args.queries} | "
+          f"clients: {args.clients} | cores: {os.cpu_count()}")
+
+    results = []
+    for num_shards in args.shards:
+        if num_shards > (os.cpu_count() or 1):
+            print(f"⚠ {num_shards} shards exceed {os.cpu_count()} cores; results will be CPU-bound")
+        results.append(run(num_shards, corpus, queries, args.clients, args.top_k, args.backend))
+
+    baseline = results[0]["qps"]
+    header = f"{'shards':>6} {'ingest/s':>10} {'qps':>9} {'p50 ms':>9} {'p95 ms':>9} {'speedup':>8}"
+    print()
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['shards']:>6} {r['ingest_per_s']:>10.0f} {r['qps']:>9.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['qps'] / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Two-stage retrieval benchmark
+
+Sweeps reduced dimensionality, reduction method and candidate count for
+the coarse float16 index and reports recall@k, search latency and the
+per-chunk size of the scanned working set against exact full-vector search.
+
+Usage:
+    python benchmarks/two_stage.py --dims 32 64 128 --candidates 100 300 1000
+"""
+import argparse
+import os
+import sys
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.vector_store import VectorStore
+from src.evaluation import RetrievalEvaluator
+from benchmarks.recall_latency import load_queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall and latency of two-stage retrieval")
+    parser.add_argument("--collection", default="documents", help="Collection to evaluate")
+    parser.add_argument("--queries", default=None, help="File with one query per line")
+    parser.add_argument("--sample", type=int, default=100, help="Queries sampled from chunks when no file is given")
+    parser.add_argument("--k", type=int, default=Config.TOP_K_RESULTS, help="Ground-truth depth for recall@k")
+    parser.add_argument("--target", type=float, default=0.95, help="Recall target for the recommendation")
+    parser.add_argument("--dims", type=int, nargs="*", default=[32, 64, 128], help="Reduced dimensions to try")
+    parser.add_argument("--candidates", type=int, nargs="*", default=[100, 300, 1000], help="Rerank depths to try")
+    parser.add_argument("--methods", nargs="*", default=["pca", "truncate"], help="Reduction methods to try")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    store = VectorStore(collection_name=args.collection, index_backend="chroma")
+    queries = load_queries(args.queries, store.collection, args.sample, args.seed)
+    if not queries:
+        print("❌ No queries available - ingest documents or pass --queries")
+        return
+
+    evaluator = RetrievalEvaluator(store, queries, k=args.k)
+    evaluator.build_ground_truth()
+    full_dim = evaluator.corpus.shape[1]
+    full_bytes = full_dim * evaluator.corpus.itemsize
+
+    results = [evaluator.evaluate("numpy exact", evaluator.numpy_exact())]
+    results[0]["bytes_per_chunk"] = full_bytes
+
+    for method in args.methods:
+        for d in args.dims:
+            if d >= full_dim:
+                continue
+            for n_candidates in args.candidates:
+                search, build_s, index = evaluator.two_stage(d, n_candidates, method=method)
+                result = evaluator.evaluate(f"two-stage {method} {d}d x {n_candidates}", search, build_s=build_s)
+                result["bytes_per_chunk"] = index.bytes_per_vector()
+                results.append(result)
+
+    print()
+    print(evaluator.format_report(results, recall_target=args.target))
+    print()
+    print(f"{'configuration':<40} {'bytes/chunk':>12} {'vs full':>8}")
+    for r in results:
+        print(f"{r['name']:<40} {r['bytes_per_chunk']:>12} {full_bytes / r['bytes_per_chunk']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
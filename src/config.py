@@ -10,14 +10,23 @@ class Config:
     # Paths
     UPLOAD_DIR = "data/uploads"
     VECTOR_DB_DIR = "data/vectordb"
+    EXPORT_DIR = "data/exports"
+    CACHE_DIR = "data/cache"
     
     # Chunking Parameters
-    CHUNK_SIZE = 1000  # characters per chunk
-    CHUNK_OVERLAP = 200  # overlap between chunks
+    CHUNK_SIZE = 1000  # words per chunk
+    CHUNK_OVERLAP = 200  # words shared by consecutive chunks
     
     # Embedding Model
     EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
     
+    # Shared embedding server (src/embedding_server.py); empty socket path loads the model in-process
+    EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET", "")
+    EMBEDDING_SERVER_AUTOSTART = os.getenv("EMBEDDING_SERVER_AUTOSTART", "true").lower() == "true"
+    EMBEDDING_SERVER_START_TIMEOUT = 120  # seconds to wait for an autostarted server to load the model
+    EMBEDDING_SERVER_MAX_BATCH = 64  # texts encoded per model call
+    EMBEDDING_SERVER_MAX_WAIT_MS = 5.0  # how long the first request waits for others to join its batch
+    
     # LLM Parameters
     LLM_MODEL = "gpt-3.5-turbo"  # or "gpt-4" if you have access
     LLM_TEMPERATURE = 0.1  # Low temperature = more focused answers
@@ -26,8 +35,105 @@ class Config:
     # Retrieval
     TOP_K_RESULTS = 3  # Number of chunks to retrieve
     
+    # Adaptive top-k: over-fetch, then cut by distance (used when no explicit top_k is given)
+    ADAPTIVE_TOP_K = os.getenv("ADAPTIVE_TOP_K", "true").lower() == "true"
+    ADAPTIVE_MIN_K = 1  # chunks always kept
+    ADAPTIVE_MAX_K = 5  # chunks fetched; never more are sent to the LLM
+    ADAPTIVE_MAX_DISTANCE = 1.4  # squared L2 on normalized embeddings (2 - 2 * cosine)
+    ADAPTIVE_ELBOW_GAP = 0.15  # distance jump between neighbours treated as the end of the relevant chunks
+    
+    # Sidecar search index kept next to the collection
+    INDEX_BACKEND = os.getenv("INDEX_BACKEND", "chroma")  # "chroma", "two_stage" or "pq"
+    INDEX_MIN_FIT = 256  # chunks needed before the index is trained
+    INDEX_FIT_SAMPLE = 20000  # max vectors used for training
+    
+    # Two-stage retrieval: coarse search on reduced vectors, exact rerank on full ones
+    REDUCED_DIMS = 64  # dimensions kept by the coarse index (stored as float16)
+    REDUCED_METHOD = "pca"  # "pca" or "truncate"
+    REDUCED_CANDIDATES = 300  # coarse candidates reranked with full vectors
+    
+    # Product quantization: one uint8 code per subspace
+    PQ_SUBSPACES = 48  # bytes per chunk; must divide the embedding dimension
+    PQ_CENTROIDS = 256  # codebook size per subspace (at most 256)
+    PQ_TRAIN_ITERATIONS = 20  # k-means iterations per codebook
+    PQ_RERANK = False  # rerank with full vectors (loads them from ChromaDB)
+    PQ_RERANK_CANDIDATES = 200  # candidates reranked when PQ_RERANK is on
+    
+    # Document routing: pick the documents whose chunk centroid is closest, then search only their chunks
+    DOC_ROUTING = os.getenv("DOC_ROUTING", "false").lower() == "true"
+    DOC_ROUTING_TOP_DOCS = 8  # documents searched per query; smaller collections are searched in full
+    
+    # Sharding: >1 splits each collection across local worker processes
+    NUM_SHARDS = int(os.getenv("NUM_SHARDS", "1"))
+    
+    # Namespaces (one collection per tenant)
+    DEFAULT_NAMESPACE = "default"
+    NAMESPACE_MEMORY_BUDGET_MB = 1024  # in-memory indexes kept open before LRU eviction
+    NAMESPACE_BYTES_PER_CHUNK = 2048  # estimated index memory per chunk (vector + HNSW links)
+    
+    # Near-duplicate suppression at ingestion (MinHash over word shingles; not applied when NUM_SHARDS > 1)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_SHINGLE_SIZE = 5  # words per shingle
+    DEDUP_NUM_PERM = 128  # MinHash signature length
+    DEDUP_BANDS = 16  # LSH bands; fewer bands compare fewer candidates
+    DEDUP_THRESHOLD = 0.85  # estimated Jaccard similarity treated as a duplicate
+    
+    # PDF text extraction backends
+    PDF_BACKEND = os.getenv("PDF_BACKEND", "auto")  # "auto", "pypdfium2", "pdfminer" or "pypdf2"
+    PDF_PROBE_PAGES = 3  # sample pages each backend extracts when choosing automatically
+    PDF_PROBE_MIN_TEXT_RATIO = 0.9  # backends recovering less text than this share of the best are skipped
+    PDF_ISOLATE_EXTRACTION = os.getenv("PDF_ISOLATE_EXTRACTION", "true").lower() == "true"  # extract in worker processes
+    PDF_PAGE_TIMEOUT_S = 30.0  # pages taking longer are skipped
+    PDF_WORKER_MEMORY_MB = 2048  # address-space cap per extraction worker (POSIX)
+    PARALLEL_EXTRACTION_MIN_PAGES = 200  # documents with more pages to extract are split into ranges
+    PARALLEL_EXTRACTION_WORKERS = min(4, os.cpu_count() or 1)  # worker processes per large document
+    
+    # Uploads are processed from memory; larger ones spill to a memory-mapped temp file
+    UPLOAD_SPILL_MB = 64  # uploads above this size are not kept in RAM
+    PERSIST_UPLOADS = os.getenv("PERSIST_UPLOADS", "true").lower() == "true"  # save originals to UPLOAD_DIR in the background
+    
+    # Extracted page text cache (keyed by PDF content hash + page number)
+    PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+    PAGE_CACHE_PATH = os.path.join(CACHE_DIR, "pages.sqlite3")
+    PAGE_CACHE_MAX_MB = 512  # compressed size before least recently used documents are evicted
+    PAGE_CACHE_COMPRESSION_LEVEL = 6  # zlib level
+    
+    # Ingestion pipeline
+    INGEST_QUEUE_SIZE = 4  # items buffered between pipeline stages
+    EMBED_BATCH_SIZE = 64  # chunks encoded per embedding call
+    WRITE_BATCH_SIZE = 512  # chunks committed per vector store write
+    
+    # Background ingestion jobs (src/jobs.py)
+    INGEST_JOB_WORKERS = 1  # jobs run at once; they share the embedding model, so more rarely helps
+    INGEST_JOB_HISTORY = 50  # finished jobs kept for status display
+    JOB_POLL_INTERVAL_S = 2.0  # sidebar refresh interval while a session has active jobs
+    
+    # Metrics
+    METRICS_CAPACITY = 10000  # numeric samples kept in the ring buffer
+    METRICS_RECENT_RECORDS = 100  # full query records kept for the history view
+    METRICS_SINK_ENABLED = os.getenv("METRICS_SINK_ENABLED", "true").lower() == "true"
+    METRICS_DIR = "data/metrics"
+    METRICS_DB_PATH = os.path.join(METRICS_DIR, "metrics.sqlite3")
+    METRICS_PROMETHEUS_FILE = os.path.join(METRICS_DIR, "documind.prom")
+    METRICS_FLUSH_INTERVAL = 10.0  # seconds between background flushes
+    METRICS_RETENTION_DAYS = 30  # raw flush rows older than this are pruned
+    METRICS_HTTP_PORT = int(os.getenv("METRICS_HTTP_PORT", "0"))  # 0 disables the /metrics endpoint
+    METRICS_INSTANCE = os.getenv("METRICS_INSTANCE", "")  # defaults to the hostname
+    
+    # Performance profiles (named sets of the settings above, see src/performance_profiles.py)
+    PERFORMANCE_PROFILE = os.getenv("PERFORMANCE_PROFILE", "default")  # "default", "low-latency", "high-recall", "bulk-ingest" or a custom one
+    PERFORMANCE_PROFILES_FILE = os.getenv("PERFORMANCE_PROFILES_FILE", "profiles.json")  # optional custom profiles
+    PROFILE_SWITCH_ENABLED = os.getenv("PROFILE_SWITCH_ENABLED", "false").lower() == "true"  # let the Settings tab switch the profile for the whole server
+    
+    # Debug profiling (opt-in per query from the Settings tab)
+    PROFILE_TOP_N = 25  # functions / allocation sites kept per profile
+    PROFILE_TRACEBACK_DEPTH = 1  # tracemalloc frames stored per allocation
+    
     @staticmethod
     def ensure_directories():
         """Create necessary directories if they don't exist"""
         os.makedirs(Config.UPLOAD_DIR, exist_ok=True)
-        os.makedirs(Config.VECTOR_DB_DIR, exist_ok=True)
\ No newline at end of file
+        os.makedirs(Config.VECTOR_DB_DIR, exist_ok=True)
+        os.makedirs(Config.METRICS_DIR, exist_ok=True)
+        os.makedirs(Config.EXPORT_DIR, exist_ok=True)
+        os.makedirs(Config.CACHE_DIR, exist_ok=True)
\ No newline at end of file
@@ -0,0 +1,156 @@
+import os
+import threading
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np # pyright: ignore[reportMissingImports]
+from src.config import Config # pyright: ignore[reportMissingImports]
+from src.indexes import RowIndex
+
+# Mersenne prime 2^31 - 1: a * x + b stays below 2^62, so uint64 never overflows
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+def shingle_hashes(text: str, size: int = None) -> np.ndarray:
+    """
+    Stable 32-bit hashes of the word n-grams of a text
+
+    Args:
+        text: Chunk text
+        size: Words per shingle
+
+    Returns:
+        Unique shingle hashes (a single hash for texts shorter than one shingle)
+    """
+    size = size or Config.DEDUP_SHINGLE_SIZE
+    words = text.lower().split()
+    if len(words) <= size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    ))
+
+
+class MinHashIndex(RowIndex):
+    """
+    MinHash signatures of canonical chunks with LSH banding
+
+    Each chunk is summarised by `num_perm` minimum hash values over its
+    shingles; two signatures agree in a position with probability equal to
+    the Jaccard similarity of the shingle sets. Signatures are split into
+    bands, and chunks sharing any band are compared, so lookups touch only
+    a handful of candidates instead of the whole collection.
+    """
+
+    def __init__(self, path: str, num_perm: int = None, bands: int = None,
+                 threshold: float = None, seed: int = 0):
+        super().__init__(path)
+        self.num_perm = num_perm or Config.DEDUP_NUM_PERM
+        self.bands = bands or Config.DEDUP_BANDS
+        self.threshold = threshold or Config.DEDUP_THRESHOLD
+        if self.num_perm % self.bands:
+            raise ValueError(f"{self.num_perm} permutations cannot be split into {self.bands} bands")
+        self.rows_per_band = self.num_perm // self.bands
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), self.num_perm, dtype=np.uint64)
+
+        self.signatures = np.zeros((0, self.num_perm), dtype=np.uint32)
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+        if self.path and os.path.exists(self.path):
+            self.load()
+
+    def _row_arrays(self) -> List[str]:
+        return ["signatures"]
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text, (num_perm,) uint32"""
+        hashes = shingle_hashes(text) % _PRIME
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def find(self, signature: np.ndarray) -> Optional[str]:
+        """
+        Most similar stored chunk at or above the similarity threshold
+
+        Args:
+            signature: Signature from signature()
+
+        Returns:
+            Chunk id of the canonical chunk, or None if the text is new
+        """
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            if not candidates:
+                return None
+
+            candidate_ids = sorted(candidates)
+            rows = [self._positions[chunk_id] for chunk_id in candidate_ids]
+            similarity = np.mean(self.signatures[rows] == signature[None, :], axis=1)
+            best = int(np.argmax(similarity))
+            return candidate_ids[best] if similarity[best] >= self.threshold else None
+
+    def add(self, ids: List[str], signatures: np.ndarray):
+        """Register canonical chunks"""
+        if not ids:
+            return
+        signatures = np.asarray(signatures, dtype=np.uint32).reshape(len(ids), self.num_perm)
+        with self._lock:
+            self.signatures = np.concatenate([self.signatures, signatures], axis=0)
+            self._append_ids(ids)
+            for chunk_id, signature in zip(ids, signatures):
+                for key in self._band_keys(signature):
+                    self._buckets[key].add(chunk_id)
+            self.dirty = True
+
+    def remove(self, ids: List[str]) -> int:
+        with self._lock:
+            for chunk_id in ids:
+                position = self._positions.get(chunk_id)
+                if position is None:
+                    continue
+                for key in self._band_keys(self.signatures[position]):
+                    bucket = self._buckets.get(key)
+                    if bucket is not None:
+                        bucket.discard(chunk_id)
+                        if not bucket:
+                            del self._buckets[key]
+            return super().remove(ids)
+
+    def rename(self, old_id: str, new_id: str):
+        """Keep a canonical chunk's signature under a new id"""
+        with self._lock:
+            position = self._positions.get(old_id)
+        if position is None:
+            return
+        signature = self.signatures[position].copy()
+        self.remove([old_id])
+        self.add([new_id], signature[None, :])
+
+    def save(self):
+        with self._lock:
+            self._save_arrays(signatures=self.signatures)
+
+    def load(self):
+        arrays = self._load_arrays()
+        self.signatures = arrays["signatures"]
+        self._buckets = defaultdict(set)
+        for chunk_id, signature in zip(self.ids, self.signatures):
+            for key in self._band_keys(signature):
+                self._buckets[key].add(chunk_id)
+        self.dirty = False
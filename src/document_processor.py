@@ -1,31 +1,115 @@
-from typing import List, Dict
-from PyPDF2 import PdfReader
-import os
+from typing import List, Dict, Optional, Tuple, Union, BinaryIO
+from src.config import Config # pyright: ignore[reportMissingImports]
+from src.extraction_cache import PageTextCache, get_page_cache
+from src.metrics import span
+from src.pdf_backends import extract_page_ranges, select_backend
+from src.pdf_source import PDFSource, as_source
+
+# A file path, an upload's bytes or a binary buffer (BytesIO, memoryview), or a PDFSource
+PDFInput = Union[str, bytes, bytearray, memoryview, BinaryIO, PDFSource]
 
 class DocumentProcessor:
-    """Handles PDF processing and text chunking"""
+    """
+    Handles PDF processing and text chunking
+    
+    PDFs can be given as paths or straight from memory (uploads never need
+    to be written to disk first; see PDFSource).
+    """
     
     def __init__(self):
-        self.chunk_size = 1000
-        self.chunk_overlap = 200
+        # Word counts (chunk_text splits on whitespace)
+        self.chunk_size = Config.CHUNK_SIZE
+        self.chunk_overlap = Config.CHUNK_OVERLAP
+    
+    @staticmethod
+    def compute_doc_id(pdf: PDFInput) -> str:
+        """Content hash identifying a document independently of its filename"""
+        return as_source(pdf).content_hash()[:16]
+    
+    def _extract_pages(self, source: PDFSource, doc_id: str, cache: Optional[PageTextCache],
+                       cached: Dict[int, str]) -> Tuple[List[str], str, List[int]]:
+        """
+        Parse the pages that are not cached yet with the best backend and cache them
+        
+        Large documents are split into page ranges extracted by parallel
+        worker processes. `cached` holds the pages the caller's cache
+        lookup already found.
+        """
+        backend, extracted = select_backend(source)
+        skipped_pages = backend.skipped_pages
+        try:
+            num_pages = backend.num_pages
+            if cache is not None:
+                cache.record_partial(num_pages, len(cached))
+            missing = [
+                page_num for page_num in range(num_pages)
+                if page_num not in cached and page_num not in extracted
+            ]
+            
+            if len(missing) > Config.PARALLEL_EXTRACTION_MIN_PAGES and Config.PARALLEL_EXTRACTION_WORKERS > 1:
+                range_pages, range_skipped = extract_page_ranges(backend.name, source, missing)
+                extracted.update(range_pages)
+                skipped_pages = {**skipped_pages, **range_skipped}
+            else:
+                for page_num in missing:
+                    extracted[page_num] = backend.extract_page(page_num)
+        finally:
+            backend.close()
+        
+        # Reassemble in page order
+        pages = [
+            cached[page_num] if page_num in cached else extracted[page_num]
+            for page_num in range(num_pages)
+        ]
+        
+        # Skipped pages are retried on the next extraction rather than cached empty
+        skipped = sorted(skipped_pages)
+        if cache is not None:
+            new_pages = {
+                page_num: text for page_num, text in extracted.items()
+                if page_num not in cached and page_num not in skipped_pages
+            }
+            if new_pages:
+                cache.put_pages(doc_id, num_pages, new_pages)
+        return pages, backend.name, skipped
     
-    def extract_text_from_pdf(self, pdf_path: str) -> Dict:
-        """Extract text from PDF file"""
+    def extract_text_from_pdf(self, pdf: PDFInput, name: str = None) -> Dict:
+        """
+        Extract text from a PDF (cached pages skip PDF parsing)
+        
+        Args:
+            pdf: File path, bytes, binary buffer or PDFSource
+            name: Filename for in-memory PDFs
+        """
+        source = None
         try:
-            reader = PdfReader(pdf_path)
-            text_content = ""
-            num_pages = len(reader.pages)
+            source = as_source(pdf, name)
+            doc_id = self.compute_doc_id(source)
+            cache = get_page_cache()
+            pages, cached = cache.lookup(doc_id) if cache is not None else (None, {})
+            extractor = "cache"
+            skipped = []
+            
+            if pages is None:
+                with span("pdf_extraction"):
+                    pages, extractor, skipped = self._extract_pages(source, doc_id, cache, cached)
             
-            # Extract text from each page
-            for page_num, page in enumerate(reader.pages):
-                page_text = page.extract_text()
-                text_content += f"\n--- Page {page_num + 1} ---\n{page_text}"
+            num_pages = len(pages)
+            text_content = "".join(
+                f"\n--- Page {page_num + 1} ---\n{page_text}"
+                for page_num, page_text in enumerate(pages)
+            )
             
             # Get metadata
             metadata = {
-                "filename": os.path.basename(pdf_path),
+                "filename": source.name,
                 "num_pages": num_pages,
-                "file_path": pdf_path
+                # "" for uploads processed in memory and not saved
+                "file_path": source.file_path,
+                "doc_id": doc_id,
+                "extractor": extractor,
+                # 1-based page numbers that timed out or failed (Chroma metadata must be scalar)
+                "skipped_pages": ",".join(str(page_num + 1) for page_num in skipped)
             }
             
             return {
@@ -41,6 +125,10 @@ class DocumentProcessor:
                 "success": False,
                 "error": str(e)
             }
+        finally:
+            # Sources created here from raw bytes are not needed afterwards
+            if source is not None and source is not pdf:
+                source.close()
     
     def chunk_text(self, text: str, metadata: Dict) -> List[Dict]:
         """Split text into chunks with overlap"""
@@ -75,19 +163,20 @@ class DocumentProcessor:
         
         return chunks
     
-    def process_pdf(self, pdf_path: str) -> Dict:
-        """Complete processing pipeline for a PDF"""
+    def process_pdf(self, pdf: PDFInput, name: str = None) -> Dict:
+        """Complete processing pipeline for a PDF (path, bytes, buffer or PDFSource)"""
         # Extract text
-        extraction_result = self.extract_text_from_pdf(pdf_path)
+        extraction_result = self.extract_text_from_pdf(pdf, name)
         
         if not extraction_result["success"]:
             return extraction_result
         
         # Chunk text
-        chunks = self.chunk_text(
-            extraction_result["text"],
-            extraction_result["metadata"]
-        )
+        with span("chunking"):
+            chunks = self.chunk_text(
+                extraction_result["text"],
+                extraction_result["metadata"]
+            )
         
         return {
             "success": True,
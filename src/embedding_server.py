@@ -0,0 +1,328 @@
+"""
+Local embedding service shared by every DocuMind process on a machine
+
+The server owns the only copy of the embedding model. Clients connect over
+a Unix socket and send texts; requests arriving within a short window are
+encoded together (micro-batching), and each reply is written into a
+shared-memory buffer owned by the client's connection instead of being
+pickled through the socket.
+
+Usage:
+    python -m src.embedding_server --socket /tmp/documind-embeddings.sock
+"""
+import argparse
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Set
+import numpy as np # pyright: ignore[reportMissingImports]
+from src.config import Config # pyright: ignore[reportMissingImports]
+
+# Reply buffers start at this size and grow to fit the largest batch seen
+_MIN_BUFFER_BYTES = 1 << 20
+
+# Buffers created by a server running in this process
+_owned_buffers: Set[str] = set()
+
+
+class _Request:
+    """Texts from one client waiting for the next batch"""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.embeddings: Optional[np.ndarray] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+
+class EmbeddingServer:
+    """
+    Unix socket server that batches encode requests from all clients
+
+    Requests are collected until max_batch texts are queued or max_wait_ms
+    has passed since the first one, then encoded in one model call.
+    """
+
+    def __init__(self, socket_path: str = None, max_batch: int = None,
+                 max_wait_ms: float = None, model=None):
+        self.socket_path = socket_path or Config.EMBEDDING_SERVER_SOCKET
+        self.max_batch = max_batch or Config.EMBEDDING_SERVER_MAX_BATCH
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else Config.EMBEDDING_SERVER_MAX_WAIT_MS) / 1000
+
+        if model is None:
+            from sentence_transformers import SentenceTransformer # pyright: ignore[reportMissingImports]
+            print(f"Loading embedding model: {Config.EMBEDDING_MODEL}")
+            model = SentenceTransformer(Config.EMBEDDING_MODEL)
+        self.model = model
+        self.dimension = model.get_sentence_embedding_dimension()
+
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._listener: Optional[Listener] = None
+        self._stopped = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+
+    # ------------------------------------------------------------------
+    # Batching
+    # ------------------------------------------------------------------
+
+    def _next_batch(self) -> List[_Request]:
+        batch = [self._queue.get()]
+        num_texts = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait
+        while num_texts < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            num_texts += len(request.texts)
+        return batch
+
+    def _batch_loop(self):
+        while not self._stopped.is_set():
+            batch = self._next_batch()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                embeddings = np.asarray(self.model.encode(
+                    texts,
+                    batch_size=self.max_batch,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                ), dtype=np.float32).reshape(len(texts), self.dimension)
+            except Exception as e:
+                for request in batch:
+                    request.error = str(e)
+                    request.done.set()
+                continue
+
+            offset = 0
+            for request in batch:
+                request.embeddings = embeddings[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+                request.done.set()
+
+            with self._stats_lock:
+                self.batches += 1
+                self.texts += len(texts)
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    def _serve_connection(self, conn):
+        buffer: Optional[SharedMemory] = None
+        try:
+            while True:
+                try:
+                    command, payload = conn.recv()
+                except (EOFError, OSError):
+                    break
+
+                if command == "dimension":
+                    conn.send(("ok", self.dimension))
+                    continue
+                if command == "stats":
+                    conn.send(("ok", self.get_stats()))
+                    continue
+                if command != "encode":
+                    conn.send(("error", f"Unknown command: {command}"))
+                    continue
+
+                request = _Request(payload)
+                with self._stats_lock:
+                    self.requests += 1
+                self._queue.put(request)
+                request.done.wait()
+                if request.error is not None:
+                    conn.send(("error", request.error))
+                    continue
+
+                # One buffer per connection, reused while it is large enough
+                nbytes = request.embeddings.nbytes
+                if buffer is None or buffer.size < nbytes:
+                    if buffer is not None:
+                        self._release_buffer(buffer)
+                    buffer = SharedMemory(create=True, size=max(nbytes, _MIN_BUFFER_BYTES))
+                    _owned_buffers.add(buffer.name)
+                np.ndarray(request.embeddings.shape, dtype=np.float32, buffer=buffer.buf)[:] = request.embeddings
+                conn.send(("ok", (buffer.name, request.embeddings.shape)))
+        finally:
+            conn.close()
+            if buffer is not None:
+                self._release_buffer(buffer)
+
+    @staticmethod
+    def _release_buffer(buffer: SharedMemory):
+        _owned_buffers.discard(buffer.name)
+        buffer.close()
+        buffer.unlink()
+
+    def serve_forever(self):
+        """Accept clients until stop() is called"""
+        if os.path.exists(self.socket_path):
+            if server_running(self.socket_path):
+                raise RuntimeError(f"An embedding server is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)
+
+        self._listener = Listener(self.socket_path, family="AF_UNIX")
+        os.chmod(self.socket_path, 0o600)
+        threading.Thread(target=self._batch_loop, name="embed-batcher", daemon=True).start()
+        print(f"✓ Embedding server listening on {self.socket_path} "
+              f"(batch {self.max_batch}, wait {self.max_wait * 1000:g} ms)")
+
+        try:
+            while not self._stopped.is_set():
+                try:
+                    conn = self._listener.accept()
+                except OSError:
+                    break
+                threading.Thread(target=self._serve_connection, args=(conn,), name="embed-client", daemon=True).start()
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stopped.set()
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+    def get_stats(self) -> Dict:
+        """Requests, model calls and the average number of texts per call"""
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "texts": self.texts,
+                "avg_batch_size": self.texts / self.batches if self.batches else 0.0
+            }
+
+
+def _attach(name: str) -> SharedMemory:
+    # The server owns (and unlinks) the buffer; stop this process's resource
+    # tracker from unlinking it again when the client exits. A server in the
+    # same process shares the tracker, so its buffers stay registered.
+    buffer = SharedMemory(name=name)
+    if name not in _owned_buffers:
+        try:
+            resource_tracker.unregister(buffer._name, "shared_memory")
+        except Exception:
+            pass
+    return buffer
+
+
+def server_running(socket_path: str) -> bool:
+    """Whether a server accepts connections on the socket"""
+    try:
+        Client(socket_path, family="AF_UNIX").close()
+        return True
+    except OSError:
+        return False
+
+
+class EmbeddingClient:
+    """
+    Client of an EmbeddingServer
+
+    Each thread keeps its own connection, so concurrent callers reach the
+    server in parallel and are batched together there.
+    """
+
+    def __init__(self, socket_path: str = None, autostart: bool = None):
+        self.socket_path = socket_path or Config.EMBEDDING_SERVER_SOCKET
+        autostart = Config.EMBEDDING_SERVER_AUTOSTART if autostart is None else autostart
+        self._local = threading.local()
+
+        if not server_running(self.socket_path):
+            if not autostart:
+                raise RuntimeError(f"No embedding server on {self.socket_path}")
+            self._start_server()
+        print(f"✓ Using embedding server at {self.socket_path}")
+
+    def _start_server(self):
+        # Detached so the server outlives this process and stays shared
+        print(f"Starting embedding server on {self.socket_path}")
+        subprocess.Popen(
+            [sys.executable, "-m", "src.embedding_server", "--socket", self.socket_path],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            start_new_session=True
+        )
+        deadline = time.monotonic() + Config.EMBEDDING_SERVER_START_TIMEOUT
+        while not server_running(self.socket_path):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Embedding server did not start within {Config.EMBEDDING_SERVER_START_TIMEOUT}s")
+            time.sleep(0.2)
+
+    def _call(self, command: str, payload=None):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.socket_path, family="AF_UNIX")
+            self._local.conn = conn
+        try:
+            conn.send((command, payload))
+            status, result = conn.recv()
+        except (EOFError, OSError):
+            # Server restarted: the next call reconnects and attaches to its new buffer
+            self._local.conn = None
+            conn.close()
+            buffer = getattr(self._local, "buffer", None)
+            self._local.buffer = None
+            if buffer is not None:
+                buffer.close()
+            raise
+        if status == "error":
+            raise RuntimeError(f"Embedding server error: {result}")
+        return result
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts on the server
+
+        Returns:
+            (len(texts), dim) float32 array owned by the caller
+        """
+        name, shape = self._call("encode", list(texts))
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or buffer.name != name:
+            if buffer is not None:
+                buffer.close()
+            buffer = _attach(name)
+            self._local.buffer = buffer
+        # Copied out because the buffer is reused for this connection's next reply
+        return np.ndarray(shape, dtype=np.float32, buffer=buffer.buf).copy()
+
+    def dimension(self) -> int:
+        return self._call("dimension")
+
+    def get_stats(self) -> Dict:
+        return self._call("stats")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve embeddings to local DocuMind processes")
+    parser.add_argument("--socket", default=Config.EMBEDDING_SERVER_SOCKET or "/tmp/documind-embeddings.sock")
+    parser.add_argument("--max-batch", type=int, default=Config.EMBEDDING_SERVER_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=Config.EMBEDDING_SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    server = EmbeddingServer(args.socket, args.max_batch, args.max_wait_ms)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,34 @@
-from sentence_transformers import SentenceTransformer # pyright: ignore[reportMissingImports]
 from typing import List
 import numpy as np # pyright: ignore[reportMissingImports]
 from src.config import Config # pyright: ignore[reportMissingImports]
+from src.metrics import span
+
+
+def as_vectors(embeddings) -> np.ndarray:
+    """Contiguous float32 view of embeddings (copies only if the layout or dtype differs)"""
+    return np.ascontiguousarray(embeddings, dtype=np.float32)
+
 
 class EmbeddingGenerator:
-    """Generates embeddings for text chunks"""
+    """
+    Generates embeddings for text chunks
+    
+    Vectors are unit-normalized float32 arrays, produced once here and passed
+    as arrays all the way to the vector store. With Config.EMBEDDING_SERVER_SOCKET set this is a thin client of the
+    shared embedding server and no model is loaded in this process.
+    """
     
     def __init__(self):
+        self.model = None
+        self.client = None
+        if Config.EMBEDDING_SERVER_SOCKET:
+            from src.embedding_server import EmbeddingClient
+            self.client = EmbeddingClient()
+            return
+        
+        # Imported here so processes that only handle vectors (shard workers) never load torch
+        from sentence_transformers import SentenceTransformer # pyright: ignore[reportMissingImports]
+        
         print(f"Loading embedding model: {Config.EMBEDDING_MODEL}")
         self.model = SentenceTransformer(Config.EMBEDDING_MODEL)
         print("✓ Embedding model loaded successfully")
@@ -19,28 +41,38 @@ class EmbeddingGenerator:
             text: Input text
             
         Returns:
-            Embedding vector
+            (dim,) float32 unit vector
         """
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding
+        with span("embedding"):
+            if self.client is not None:
+                return self.client.encode([text])[0]
+            embedding = self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+        return as_vectors(embedding)
     
-    def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
+    def generate_embeddings_batch(self, texts: List[str], show_progress_bar: bool = True) -> np.ndarray:
         """
         Generate embeddings for multiple texts (more efficient)
         
         Args:
             texts: List of input texts
+            show_progress_bar: Print a progress bar while encoding
             
         Returns:
-            Array of embedding vectors
+            (n, dim) contiguous float32 array of unit vectors
         """
-        embeddings = self.model.encode(
-            texts,
-            convert_to_numpy=True,
-            show_progress_bar=True
-        )
-        return embeddings
+        with span("embedding"):
+            if self.client is not None:
+                return self.client.encode(texts)
+            embeddings = self.model.encode(
+                texts,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=show_progress_bar
+            )
+        return as_vectors(embeddings)
     
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings"""
+        if self.client is not None:
+            return self.client.dimension()
         return self.model.get_sentence_embedding_dimension()
\ No newline at end of file
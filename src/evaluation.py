@@ -0,0 +1,443 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np # pyright: ignore[reportMissingImports]
+import chromadb # pyright: ignore[reportMissingImports]
+from chromadb.config import Settings # pyright: ignore[reportMissingImports]
+from src.config import Config # pyright: ignore[reportMissingImports]
+from src.indexes import DocumentRouter, PQIndex, ReducedIndex, exact_rerank
+
+# A search function takes a (dim,) query embedding and a result count and
+# returns the ids of the retrieved chunks, best first
+SearchFn = Callable[[np.ndarray, int], List[str]]
+
+
+def pairwise_distances(queries: np.ndarray, corpus: np.ndarray, space: str = "l2") -> np.ndarray:
+    """
+    Compute query-to-corpus distances the same way ChromaDB ranks them
+
+    Args:
+        queries: (n_queries, dim) query embeddings
+        corpus: (n_chunks, dim) stored embeddings
+        space: ChromaDB distance space ("l2", "cosine" or "ip")
+
+    Returns:
+        (n_queries, n_chunks) distance matrix, smaller is closer
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    corpus = np.asarray(corpus, dtype=np.float32)
+
+    if space == "cosine":
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        corpus = corpus / np.maximum(np.linalg.norm(corpus, axis=1, keepdims=True), 1e-12)
+        return 1.0 - queries @ corpus.T
+    if space == "ip":
+        return 1.0 - queries @ corpus.T
+
+    # Squared L2, expanded so it stays a single matrix multiply
+    return (
+        np.sum(queries ** 2, axis=1)[:, None]
+        - 2.0 * (queries @ corpus.T)
+        + np.sum(corpus ** 2, axis=1)[None, :]
+    )
+
+
+def top_k_indices(distances: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the k smallest distances per row, sorted ascending"""
+    k = min(k, distances.shape[1])
+    part = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(distances, part, axis=1).argsort(axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def pareto_front(results: List[Dict]) -> List[Dict]:
+    """
+    Keep the configurations no other configuration beats on both recall and latency
+
+    Args:
+        results: Evaluation results with "recall" and "p50_ms"
+
+    Returns:
+        Pareto-optimal results sorted from fastest to slowest
+    """
+    front = []
+    best_recall = -1.0
+    for result in sorted(results, key=lambda r: (r["p50_ms"], -r["recall"])):
+        if result["recall"] > best_recall:
+            front.append(result)
+            best_recall = result["recall"]
+    return front
+
+
+class RetrievalEvaluator:
+    """Measures recall@k versus latency of retrieval settings against exact search"""
+
+    def __init__(self, vector_store, queries: List[str], k: int = None):
+        self.vector_store = vector_store
+        self.queries = queries
+        self.k = k or Config.TOP_K_RESULTS
+        self.space = (vector_store.collection.metadata or {}).get("hnsw:space", "l2")
+
+        self.ids: List[str] = []
+        self.corpus: Optional[np.ndarray] = None
+        self.query_embeddings: Optional[np.ndarray] = None
+        self.ground_truth: List[set] = []
+        self.query_embedding_ms = 0.0
+
+    def load_corpus(self, page_size: int = 5000) -> int:
+        """
+        Pull every stored embedding out of the collection
+
+        Args:
+            page_size: Number of records fetched per request
+
+        Returns:
+            Number of chunks loaded
+        """
+        ids, vectors = [], []
+        total = self.vector_store.collection.count()
+
+        for offset in range(0, total, page_size):
+            page = self.vector_store.collection.get(
+                include=["embeddings"],
+                limit=page_size,
+                offset=offset
+            )
+            ids.extend(page["ids"])
+            vectors.extend(page["embeddings"])
+
+        self.ids = ids
+        self.corpus = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        return len(ids)
+
+    def build_ground_truth(self, query_embeddings: np.ndarray = None) -> None:
+        """
+        Embed the query set and compute exact brute-force top-k for each query
+
+        Args:
+            query_embeddings: Precomputed (n_queries, dim) query vectors, for
+                synthetic corpora without an embedding model
+        """
+        if self.corpus is None:
+            self.load_corpus()
+        if len(self.ids) == 0:
+            raise ValueError("Collection is empty - ingest documents before evaluating")
+
+        if query_embeddings is not None:
+            self.query_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+        else:
+            start = time.perf_counter()
+            self.query_embeddings = np.asarray(
+                self.vector_store.embedding_generator.generate_embeddings_batch(self.queries),
+                dtype=np.float32
+            )
+            self.query_embedding_ms = (time.perf_counter() - start) * 1000 / max(len(self.queries), 1)
+
+        distances = pairwise_distances(self.query_embeddings, self.corpus, self.space)
+        nearest = top_k_indices(distances, self.k)
+        self.ground_truth = [{self.ids[j] for j in row} for row in nearest]
+
+    def evaluate(self, name: str, search_fn: SearchFn, top_k: int = None, build_s: float = 0.0) -> Dict:
+        """
+        Run every query through one configuration and score it
+
+        Args:
+            name: Label shown in the report
+            search_fn: Function returning retrieved ids for a query embedding
+            top_k: Number of results the configuration retrieves (defaults to k)
+            build_s: Time spent building the configuration's index, if any
+
+        Returns:
+            Result dictionary with recall and latency percentiles
+        """
+        if self.query_embeddings is None:
+            self.build_ground_truth()
+        if top_k is None:
+            top_k = self.k
+
+        latencies, hits = [], 0
+        for query_embedding, truth in zip(self.query_embeddings, self.ground_truth):
+            start = time.perf_counter()
+            retrieved = search_fn(query_embedding, top_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(truth.intersection(retrieved[:top_k]))
+
+        latencies = np.asarray(latencies)
+        return {
+            "name": name,
+            "top_k": top_k,
+            "recall": hits / max(len(self.ground_truth) * self.k, 1),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "build_s": build_s
+        }
+
+    # ------------------------------------------------------------------
+    # Built-in configurations
+    # ------------------------------------------------------------------
+
+    def numpy_exact(self) -> SearchFn:
+        """Brute-force search over the full vectors"""
+        def search(query_embedding: np.ndarray, top_k: int) -> List[str]:
+            distances = pairwise_distances(query_embedding[None, :], self.corpus, self.space)
+            return [self.ids[j] for j in top_k_indices(distances, top_k)[0]]
+        return search
+
+    def numpy_truncated(self, dims: int) -> SearchFn:
+        """Brute-force search over the first `dims` components of each vector"""
+        reduced = np.ascontiguousarray(self.corpus[:, :dims])
+
+        def search(query_embedding: np.ndarray, top_k: int) -> List[str]:
+            distances = pairwise_distances(query_embedding[None, :dims], reduced, self.space)
+            return [self.ids[j] for j in top_k_indices(distances, top_k)[0]]
+        return search
+
+    def two_stage(self, dims: int, n_candidates: int, method: str = "pca") -> Tuple[SearchFn, float, ReducedIndex]:
+        """
+        Coarse search on reduced float16 vectors, then exact rerank on the full ones
+
+        Candidates are reranked by squared L2, which ranks like cosine for the
+        normalized embeddings the app stores.
+
+        Args:
+            dims: Reduced dimensionality
+            n_candidates: Candidates passed to the rerank
+            method: "pca" or "truncate"
+
+        Returns:
+            Search function, fit + projection time in seconds, and the index
+        """
+        index = ReducedIndex(path="", dims=dims, method=method)
+        build_s = self._train_index(index)
+        return self._sidecar_search(index, n_candidates), build_s, index
+
+    def product_quantized(self, subspaces: int, rerank_candidates: int = 0) -> Tuple[SearchFn, float, PQIndex]:
+        """
+        Asymmetric-distance search over product-quantized codes
+
+        Args:
+            subspaces: Codes per vector (bytes per chunk)
+            rerank_candidates: Candidates reranked with full vectors (0 disables)
+
+        Returns:
+            Search function, codebook training + encoding time, and the index
+        """
+        index = PQIndex(path="", subspaces=subspaces)
+        build_s = self._train_index(index)
+        return self._sidecar_search(index, rerank_candidates), build_s, index
+
+    def _train_index(self, index) -> float:
+        start = time.perf_counter()
+        index.fit(self.corpus[:Config.INDEX_FIT_SAMPLE])
+        index.add(self.ids, self.corpus)
+        return time.perf_counter() - start
+
+    def _sidecar_search(self, index, rerank_candidates: int) -> SearchFn:
+        positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+
+        def search(query_embedding: np.ndarray, top_k: int) -> List[str]:
+            candidate_ids, _ = index.search(query_embedding, max(rerank_candidates, top_k))
+            if not rerank_candidates:
+                return candidate_ids
+            rows = [positions[chunk_id] for chunk_id in candidate_ids]
+            order, _ = exact_rerank(query_embedding, self.corpus[rows], top_k)
+            return [candidate_ids[i] for i in order]
+        return search
+
+    def chroma_current(self) -> SearchFn:
+        """Query the live collection exactly as the app does"""
+        collection = self.vector_store.collection
+
+        def search(query_embedding: np.ndarray, top_k: int) -> List[str]:
+            results = collection.query(
+                query_embeddings=np.asarray(query_embedding, dtype=np.float32)[None, :],
+                n_results=top_k,
+                include=[]
+            )
+            return results["ids"][0]
+        return search
+
+    def doc_routed(self, top_docs: int) -> Tuple[SearchFn, float]:
+        """
+        Route to the closest document centroids, then search their chunks exactly
+
+        Chunks inside the routed documents are ranked by brute force, so any
+        recall lost is lost by the router leaving a document out.
+
+        Args:
+            top_docs: Documents searched per query
+
+        Returns:
+            Search function and centroid build time in seconds
+        """
+        start = time.perf_counter()
+        doc_ids = [chunk_id.rsplit(":", 1)[0] for chunk_id in self.ids]
+        router = DocumentRouter(path="")
+        router.add(doc_ids, self.corpus)
+        rows_by_doc: Dict[str, List[int]] = {}
+        for row, doc_id in enumerate(doc_ids):
+            rows_by_doc.setdefault(doc_id, []).append(row)
+        build_s = time.perf_counter() - start
+
+        def search(query_embedding: np.ndarray, top_k: int) -> List[str]:
+            routed, _ = router.search(query_embedding, top_docs)
+            rows = np.asarray([row for doc_id in routed for row in rows_by_doc[doc_id]])
+            distances = pairwise_distances(query_embedding[None, :], self.corpus[rows], self.space)
+            return [self.ids[rows[j]] for j in top_k_indices(distances, top_k)[0]]
+        return search, build_s
+
+    def store_routed(self, top_docs: int) -> SearchFn:
+        """Search the live store as the app does with DOC_ROUTING (0 = every chunk)"""
+        def search(query_embedding: np.ndarray, top_k: int) -> List[str]:
+            results = self.vector_store.search_by_embedding(query_embedding, top_k, route_docs=top_docs)
+            return [f"{r['metadata']['doc_id']}:{r['metadata']['chunk_id']}" for r in results]
+        return search
+
+    def chroma_hnsw(self, hnsw_params: Dict) -> Tuple[SearchFn, float]:
+        """
+        Copy the corpus into an in-memory collection built with different HNSW params
+
+        Args:
+            hnsw_params: Collection metadata, e.g. {"hnsw:M": 16, "hnsw:search_ef": 20}
+
+        Returns:
+            Search function and index build time in seconds
+        """
+        client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+        name = "eval-" + "-".join(f"{k.split(':')[-1]}{v}" for k, v in hnsw_params.items())
+        try:
+            client.delete_collection(name)
+        except Exception:
+            pass
+        collection = client.create_collection(
+            name=name,
+            metadata={"hnsw:space": self.space, **hnsw_params}
+        )
+
+        start = time.perf_counter()
+        batch_size = client.max_batch_size
+        for i in range(0, len(self.ids), batch_size):
+            collection.add(
+                ids=self.ids[i:i + batch_size],
+                embeddings=self.corpus[i:i + batch_size]
+            )
+        build_s = time.perf_counter() - start
+
+        def search(query_embedding: np.ndarray, top_k: int) -> List[str]:
+            results = collection.query(
+                query_embeddings=np.asarray(query_embedding, dtype=np.float32)[None, :],
+                n_results=top_k,
+                include=[]
+            )
+            return results["ids"][0]
+        return search, build_s
+
+    def run_default_suite(self, dims: List[int] = None, hnsw_grid: List[Dict] = None,
+                          top_k_values: List[int] = None,
+                          two_stage_grid: List[Tuple[int, int]] = None,
+                          pq_grid: List[Tuple[int, int]] = None,
+                          routing_grid: List[int] = None) -> List[Dict]:
+        """
+        Evaluate the standard set of backends and settings
+
+        Args:
+            dims: Truncated dimensionalities to try
+            hnsw_grid: HNSW metadata variants to build
+            top_k_values: Retrieval depths to try against the live collection
+            two_stage_grid: (reduced dims, candidates) pairs for two-stage search
+            pq_grid: (subspaces, rerank candidates) pairs for product quantization
+            routing_grid: Documents routed to per query (only counts smaller
+                than the number of documents are tried)
+
+        Returns:
+            List of result dictionaries
+        """
+        if dims is None:
+            dims = [64, 128, 256]
+        if hnsw_grid is None:
+            hnsw_grid = [
+                {"hnsw:M": 8, "hnsw:search_ef": 10},
+                {"hnsw:M": 16, "hnsw:search_ef": 10},
+                {"hnsw:M": 16, "hnsw:search_ef": 50},
+                {"hnsw:M": 32, "hnsw:search_ef": 100},
+            ]
+        if top_k_values is None:
+            top_k_values = sorted({max(self.k - 1, 1), self.k})
+        if two_stage_grid is None:
+            two_stage_grid = [(Config.REDUCED_DIMS, Config.REDUCED_CANDIDATES)]
+        if pq_grid is None:
+            pq_grid = [(Config.PQ_SUBSPACES, 0), (Config.PQ_SUBSPACES, Config.PQ_RERANK_CANDIDATES)]
+        if routing_grid is None:
+            routing_grid = [Config.DOC_ROUTING_TOP_DOCS]
+
+        self.build_ground_truth()
+        results = [self.evaluate("numpy exact", self.numpy_exact())]
+
+        for k in top_k_values:
+            results.append(self.evaluate(f"chroma current (top_k={k})", self.chroma_current(), top_k=k))
+
+        for params in hnsw_grid:
+            search, build_s = self.chroma_hnsw(params)
+            label = ", ".join(f"{key.split(':')[-1]}={value}" for key, value in params.items())
+            results.append(self.evaluate(f"chroma hnsw ({label})", search, build_s=build_s))
+
+        full_dim = self.corpus.shape[1]
+        for d in dims:
+            if d < full_dim:
+                results.append(self.evaluate(f"numpy truncated ({d}d)", self.numpy_truncated(d)))
+
+        for d, n_candidates in two_stage_grid:
+            if d < full_dim:
+                search, build_s, _ = self.two_stage(d, n_candidates)
+                results.append(self.evaluate(f"two-stage pca {d}d x {n_candidates}", search, build_s=build_s))
+
+        for subspaces, rerank in pq_grid:
+            if full_dim % subspaces == 0:
+                search, build_s, _ = self.product_quantized(subspaces, rerank)
+                label = f"pq {subspaces}B" + (f" + rerank {rerank}" if rerank else "")
+                results.append(self.evaluate(label, search, build_s=build_s))
+
+        num_docs = len({chunk_id.rsplit(":", 1)[0] for chunk_id in self.ids})
+        for top_docs in routing_grid:
+            if top_docs < num_docs:
+                search, build_s = self.doc_routed(top_docs)
+                results.append(self.evaluate(f"doc-routed exact ({top_docs} docs)", search, build_s=build_s))
+                results.append(self.evaluate(f"store routed ({top_docs} docs)", self.store_routed(top_docs)))
+
+        return results
+
+    def format_report(self, results: List[Dict], recall_target: float = 0.95) -> str:
+        """
+        Render results as a Pareto table with the recommended configuration
+
+        Args:
+            results: Output of evaluate()/run_default_suite()
+            recall_target: Minimum acceptable recall@k
+
+        Returns:
+            Printable report
+        """
+        front = {id(r) for r in pareto_front(results)}
+        header = f"{'configuration':<40} {'k':>3} {'recall@' + str(self.k):>10} {'p50 ms':>9} {'p95 ms':>9} {'build s':>8}  pareto"
+        lines = [
+            f"Corpus: {len(self.ids)} chunks | Queries: {len(self.queries)} | "
+            f"space: {self.space} | query embedding: {self.query_embedding_ms:.2f} ms/query",
+            "",
+            header,
+            "-" * len(header),
+        ]
+
+        for r in sorted(results, key=lambda r: r["p50_ms"]):
+            lines.append(
+                f"{r['name']:<40} {r['top_k']:>3} {r['recall']:>10.3f} {r['p50_ms']:>9.3f} "
+                f"{r['p95_ms']:>9.3f} {r['build_s']:>8.2f}  {'*' if id(r) in front else ''}"
+            )
+
+        eligible = [r for r in results if r["recall"] >= recall_target]
+        lines.append("")
+        if eligible:
+            best = min(eligible, key=lambda r: r["p50_ms"])
+            lines.append(f"✓ Cheapest configuration with recall >= {recall_target:.2f}: {best['name']}")
+        else:
+            lines.append(f"⚠ No configuration reached recall >= {recall_target:.2f}")
+
+        return "\n".join(lines)
@@ -1,38 +1,152 @@
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 import json
+import os
+import time
 from datetime import datetime
 
+# Looks up the text of a cited chunk from its source metadata
+ChunkLookup = Callable[[Dict], Optional[str]]
+
 class ExportUtils:
     """Utility functions for exporting data"""
     
     @staticmethod
-    def export_chat_to_markdown(messages: List[Dict], documents: List[Dict]) -> str:
-        """Export chat history to markdown format"""
+    def iter_chat_markdown(messages: List[Dict], documents: List[Dict],
+                           chunk_lookup: ChunkLookup = None) -> Iterator[str]:
+        """
+        Yield a markdown export piece by piece
         
-        md_content = f"""# DocuMind Chat Export
+        Args:
+            messages: Chat messages
+            documents: Processed documents
+            chunk_lookup: Optional function returning the text of a cited chunk
+            
+        Yields:
+            Markdown fragments in order
+        """
+        yield f"""# DocuMind Chat Export
 **Date:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 ## Documents Processed
 """
         
         for doc in documents:
-            md_content += f"- **{doc['name']}** ({doc['pages']} pages, {doc['chunks']} chunks)\n"
+            yield f"- **{doc['name']}** ({doc['pages']} pages, {doc['chunks']} chunks)\n"
         
-        md_content += "\n---\n\n## Conversation\n\n"
+        yield "\n---\n\n## Conversation\n\n"
         
         for msg in messages:
             role = "🧑 **You:**" if msg["role"] == "user" else "🤖 **DocuMind:**"
-            md_content += f"{role}\n{msg['content']}\n\n"
+            yield f"{role}\n{msg['content']}\n\n"
             
             if "sources" in msg and msg["sources"]:
-                md_content += "**Sources:**\n"
+                yield "**Sources:**\n"
                 for source in msg["sources"]:
-                    md_content += f"- {source.get('filename', 'Unknown')}\n"
-                md_content += "\n"
+                    yield f"- {source.get('filename', 'Unknown')}\n"
+                    if chunk_lookup is not None:
+                        text = chunk_lookup(source)
+                        if text:
+                            quoted = "\n".join(f"  > {line}" for line in text.splitlines())
+                            yield f"{quoted}\n"
+                yield "\n"
+            
+            yield "---\n\n"
+    
+    @staticmethod
+    def iter_chat_ndjson(messages: List[Dict], documents: List[Dict], metrics: Dict = None,
+                         chunk_lookup: ChunkLookup = None) -> Iterator[str]:
+        """
+        Yield an NDJSON export, one JSON record per line
+        
+        The first line is an "export" header with the metrics, followed by one
+        "document" record per processed document and one "message" record per
+        chat message.
+        
+        Args:
+            messages: Chat messages
+            documents: Processed documents
+            metrics: Summary metrics
+            chunk_lookup: Optional function returning the text of a cited chunk
+            
+        Yields:
+            Newline-terminated JSON lines
+        """
+        yield json.dumps({
+            "type": "export",
+            "export_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "metrics": metrics or {}
+        }) + "\n"
+        
+        for doc in documents:
+            yield json.dumps({"type": "document", **doc}) + "\n"
+        
+        for msg in messages:
+            record = {"type": "message", **msg}
+            if chunk_lookup is not None and msg.get("sources"):
+                record["sources"] = [
+                    {**source, "text": chunk_lookup(source)}
+                    for source in msg["sources"]
+                ]
+            yield json.dumps(record) + "\n"
+    
+    @staticmethod
+    def iter_query_log_ndjson(query_records: Iterable[Dict]) -> Iterator[str]:
+        """
+        Yield PerformanceMetrics query records as NDJSON, for load-test replay
+        
+        Args:
+            query_records: Records from PerformanceMetrics.get_recent_queries()
             
-            md_content += "---\n\n"
+        Yields:
+            One JSON line per query (timestamp, query text and measurements)
+        """
+        for record in query_records:
+            yield json.dumps({
+                "timestamp": record["timestamp"],
+                "query": record["query"],
+                "response_time": record["response_time"],
+                "num_chunks_retrieved": record["num_chunks_retrieved"],
+                "stages": record.get("stages", {}),
+                "cutoff": record.get("cutoff")
+            }) + "\n"
+    
+    @staticmethod
+    def write_stream(pieces: Iterable[str], path: str) -> int:
+        """
+        Write an export generator to disk without joining it in memory
         
-        return md_content
+        Args:
+            pieces: Fragments from one of the iter_* exporters
+            path: Destination file
+            
+        Returns:
+            Number of bytes written
+        """
+        written = 0
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for piece in pieces:
+                f.write(piece)
+                written += len(piece.encode("utf-8"))
+        return written
+    
+    @staticmethod
+    def prune_exports(export_dir: str, max_age_seconds: float = 3600):
+        """Remove export files older than max_age_seconds"""
+        if not os.path.isdir(export_dir):
+            return
+        cutoff = time.time() - max_age_seconds
+        for name in os.listdir(export_dir):
+            path = os.path.join(export_dir, name)
+            try:
+                if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def export_chat_to_markdown(messages: List[Dict], documents: List[Dict]) -> str:
+        """Export chat history to markdown format"""
+        return "".join(ExportUtils.iter_chat_markdown(messages, documents))
     
     @staticmethod
     def export_chat_to_json(messages: List[Dict], documents: List[Dict], metrics: Dict = None) -> str:
@@ -45,4 +159,4 @@ class ExportUtils:
             "metrics": metrics or {}
         }
         
-        return json.dumps(export_data, indent=2)
\ No newline at end of file
+        return json.dumps(export_data, indent=2)
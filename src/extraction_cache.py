@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+from src.config import Config # pyright: ignore[reportMissingImports]
+from src.metrics_sink import get_metrics_sink
+
+
+class PageTextCache:
+    """
+    On-disk cache of extracted page text keyed by PDF content hash and page number
+
+    Pages are stored zlib-compressed in SQLite, so re-chunking or
+    re-embedding a document never re-parses the PDF. The total compressed
+    size is bounded; when it is exceeded the least recently used documents
+    are evicted as a whole.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = None, compression_level: int = None):
+        self.path = path or Config.PAGE_CACHE_PATH
+        self.max_bytes = max_bytes or int(Config.PAGE_CACHE_MAX_MB * 1024 * 1024)
+        self.compression_level = compression_level or Config.PAGE_CACHE_COMPRESSION_LEVEL
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._connection.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                num_pages INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                doc_id TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                text BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (doc_id, page)
+            );
+        """)
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, hits: int, misses: int):
+        self.hits += hits
+        self.misses += misses
+        sink = get_metrics_sink()
+        if sink is not None:
+            if hits:
+                sink.increment("documind_cache_hits_total", hits, cache="pdf_pages")
+            if misses:
+                sink.increment("documind_cache_misses_total", misses, cache="pdf_pages")
+
+    def _load(self, doc_id: str) -> Tuple[Optional[int], Dict[int, str]]:
+        # (page count or None if unknown, cached pages); marks the document as recently used
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT num_pages FROM documents WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+            if row is None:
+                return None, {}
+            rows = self._connection.execute(
+                "SELECT page, text FROM pages WHERE doc_id = ?", (doc_id,)
+            ).fetchall()
+            self._connection.execute(
+                "UPDATE documents SET last_access = ? WHERE doc_id = ?", (time.time(), doc_id)
+            )
+            self._connection.commit()
+
+        return row[0], {page: zlib.decompress(blob).decode("utf-8") for page, blob in rows}
+
+    def lookup(self, doc_id: str) -> Tuple[Optional[List[str]], Dict[int, str]]:
+        """
+        Read a document's cached pages once, for a full or partial hit
+
+        A complete document counts as hits here; when pages are missing,
+        call record_partial() once the page count is known.
+
+        Args:
+            doc_id: Content hash of the PDF
+
+        Returns:
+            Page texts in order (None unless every page is cached), and
+            page number (0-based) -> text for every cached page
+        """
+        num_pages, pages = self._load(doc_id)
+        if num_pages is None or len(pages) < num_pages:
+            return None, pages
+
+        self._count(num_pages, 0)
+        return [pages[page] for page in range(num_pages)], pages
+
+    def record_partial(self, num_pages: int, num_cached: int):
+        """Count a partial hit from lookup(): cached pages as hits, the rest as misses"""
+        self._count(num_cached, max(num_pages - num_cached, 0))
+
+    def put_pages(self, doc_id: str, num_pages: int, pages: Dict[int, str]):
+        """
+        Store extracted pages and evict old documents if over the size bound
+
+        Args:
+            doc_id: Content hash of the PDF
+            num_pages: Total pages in the document
+            pages: Page number (0-based) -> text
+        """
+        rows = []
+        for page, text in pages.items():
+            blob = zlib.compress(text.encode("utf-8"), self.compression_level)
+            rows.append((doc_id, page, blob, len(blob)))
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO documents (doc_id, num_pages, last_access) VALUES (?, ?, ?)",
+                (doc_id, num_pages, time.time())
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO pages (doc_id, page, text, size) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._evict(keep=doc_id)
+            self._connection.commit()
+
+    def _evict(self, keep: str):
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        sizes = self._connection.execute("""
+            SELECT d.doc_id, COALESCE(SUM(p.size), 0)
+            FROM documents d LEFT JOIN pages p ON p.doc_id = d.doc_id
+            WHERE d.doc_id != ?
+            GROUP BY d.doc_id
+            ORDER BY d.last_access
+        """, (keep,)).fetchall()
+        for doc_id, size in sizes:
+            if total <= self.max_bytes:
+                break
+            self._connection.execute("DELETE FROM pages WHERE doc_id = ?", (doc_id,))
+            self._connection.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            total -= size
+
+    def get_stats(self) -> Dict:
+        """Cached documents, pages, compressed bytes and hit rate"""
+        with self._lock:
+            documents = self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            pages, size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "documents": documents,
+            "pages": pages,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM pages")
+            self._connection.execute("DELETE FROM documents")
+            self._connection.commit()
+
+
+_default_cache: Optional[PageTextCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageTextCache]:
+    """Process-wide page cache (None when disabled)"""
+    global _default_cache
+    if not Config.PAGE_CACHE_ENABLED:
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PageTextCache()
+        return _default_cache
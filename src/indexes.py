@@ -0,0 +1,581 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+import numpy as np # pyright: ignore[reportMissingImports]
+from src.config import Config # pyright: ignore[reportMissingImports]
+
+# Rows scanned at a time (bounds the float32 temporaries during search)
+_SCAN_BLOCK = 65536
+
+
+class PersistentIndex(ABC):
+    """
+    An index saved to a file next to a ChromaDB collection
+
+    `dirty` is set by writes and cleared by save() and load(), so the
+    owner knows when the file is stale.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dirty = False
+
+    @abstractmethod
+    def save(self):
+        """Write the index to `path`"""
+
+    @abstractmethod
+    def load(self):
+        """Replace the in-memory index with the one saved at `path`"""
+
+
+class RowIndex(PersistentIndex):
+    """
+    NumPy arrays with one row per id, saved as a single .npz file
+
+    Keeps the id <-> row mapping and supports O(1) removal by moving the
+    last row into the freed slot. Subclasses own the per-row arrays.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @abstractmethod
+    def _row_arrays(self) -> List[str]:
+        """Names of attributes holding one row per stored id"""
+
+    def _reset_rows(self):
+        self.ids = []
+        self._positions = {}
+        self.dirty = True
+
+    def _rows(self, ids: List[str]) -> np.ndarray:
+        """Row positions of the given ids (unknown ids are skipped)"""
+        return np.fromiter(
+            (self._positions[chunk_id] for chunk_id in ids if chunk_id in self._positions),
+            dtype=np.int64
+        )
+
+    def _select(self, distances: np.ndarray, n_candidates: int,
+                rows: np.ndarray = None) -> Tuple[List[str], np.ndarray]:
+        # `rows` maps positions in `distances` to rows when only a subset was scanned
+        n_candidates = min(n_candidates, len(distances))
+        if n_candidates == 0:
+            return [], np.zeros(0, dtype=np.float32)
+        candidates = np.argpartition(distances, n_candidates - 1)[:n_candidates]
+        candidates = candidates[np.argsort(distances[candidates])]
+        selected = candidates if rows is None else rows[candidates]
+        return [self.ids[i] for i in selected], distances[candidates]
+
+    def _append_ids(self, ids: List[str]):
+        start = len(self.ids)
+        self.ids.extend(ids)
+        for offset, chunk_id in enumerate(ids):
+            self._positions[chunk_id] = start + offset
+
+    def remove(self, ids: List[str]) -> int:
+        """
+        Remove vectors by id
+
+        Args:
+            ids: Chunk ids to drop (unknown ids are ignored)
+
+        Returns:
+            Number of vectors removed
+        """
+        removed = 0
+        for chunk_id in ids:
+            position = self._positions.pop(chunk_id, None)
+            if position is None:
+                continue
+
+            last = len(self.ids) - 1
+            if position != last:
+                moved_id = self.ids[last]
+                self.ids[position] = moved_id
+                self._positions[moved_id] = position
+                for name in self._row_arrays():
+                    array = getattr(self, name)
+                    array[position] = array[last]
+            self.ids.pop()
+            removed += 1
+
+        if removed:
+            for name in self._row_arrays():
+                setattr(self, name, getattr(self, name)[:len(self.ids)])
+            self.dirty = True
+        return removed
+
+    def _save_arrays(self, **arrays):
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, ids=np.asarray(self.ids, dtype=object), **arrays)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def _load_arrays(self) -> Dict[str, np.ndarray]:
+        with np.load(self.path, allow_pickle=True) as data:
+            arrays = {name: data[name] for name in data.files}
+        self.ids = []
+        self._positions = {}
+        self._append_ids(list(arrays.pop("ids")))
+        return arrays
+
+
+class SidecarIndex(RowIndex):
+    """Base class for the trained vector indexes behind INDEX_BACKEND"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.fit_size = 0
+
+    @property
+    @abstractmethod
+    def is_trained(self) -> bool:
+        """Whether fit() has run, so vectors can be added and searched"""
+
+    @abstractmethod
+    def fit(self, sample: np.ndarray):
+        """Train on a sample of full embeddings (drops any stored vectors)"""
+
+    @abstractmethod
+    def add(self, ids: List[str], embeddings: np.ndarray):
+        """Encode and append vectors (the index must be trained)"""
+
+    @abstractmethod
+    def search(self, query_embedding: np.ndarray, n_candidates: int,
+               ids: List[str] = None) -> Tuple[List[str], np.ndarray]:
+        """Approximate nearest ids (among `ids` if given) and their estimated squared L2 distances"""
+
+    @abstractmethod
+    def bytes_per_vector(self) -> int:
+        """Memory scanned per chunk at query time"""
+
+
+class ReducedIndex(SidecarIndex):
+    """
+    Coarse index of reduced-dimension float16 vectors
+
+    Vectors are projected with PCA fitted on the stored embeddings (or simply
+    truncated) to a few dozen dimensions and kept as float16, so the scanned
+    working set is a fraction of the full float32 vectors. Search returns
+    candidate ids for an exact rerank against the full vectors.
+    """
+
+    def __init__(self, path: str, dims: int = None, method: str = None):
+        super().__init__(path)
+        self.dims = dims or Config.REDUCED_DIMS
+        self.method = method or Config.REDUCED_METHOD
+        self.mean = None
+        self.components = None
+        self.vectors = np.zeros((0, self.dims), dtype=np.float16)
+        self.norms = np.zeros(0, dtype=np.float32)
+
+        if os.path.exists(self.path):
+            self.load()
+
+    def _row_arrays(self) -> List[str]:
+        return ["vectors", "norms"]
+
+    @property
+    def is_trained(self) -> bool:
+        return self.components is not None
+
+    def fit(self, sample: np.ndarray):
+        """
+        Fit the projection on a sample of full embeddings
+
+        Args:
+            sample: (n, dim) embeddings, ideally a few thousand rows
+        """
+        sample = np.asarray(sample, dtype=np.float32)
+        full_dim = sample.shape[1]
+        dims = min(self.dims, full_dim)
+
+        if self.method == "truncate":
+            self.mean = np.zeros(full_dim, dtype=np.float32)
+            self.components = np.eye(full_dim, dims, dtype=np.float32)
+        else:
+            self.mean = sample.mean(axis=0)
+            # Right singular vectors of the centered sample are the principal axes
+            _, _, vt = np.linalg.svd(sample - self.mean, full_matrices=False)
+            components = vt[:dims].T.astype(np.float32)
+            if components.shape[1] < dims:
+                padding = np.zeros((full_dim, dims - components.shape[1]), dtype=np.float32)
+                components = np.hstack([components, padding])
+            self.components = np.ascontiguousarray(components)
+
+        self.dims = dims
+        self.fit_size = len(sample)
+        self.vectors = np.zeros((0, dims), dtype=np.float16)
+        self.norms = np.zeros(0, dtype=np.float32)
+        self._reset_rows()
+
+    def project(self, embeddings: np.ndarray) -> np.ndarray:
+        """Project full embeddings into the reduced space (float32)"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        return (embeddings - self.mean) @ self.components
+
+    def add(self, ids: List[str], embeddings: np.ndarray):
+        if not ids:
+            return
+        reduced = self.project(embeddings).astype(np.float16)
+        self.vectors = np.concatenate([self.vectors, reduced], axis=0)
+        self.norms = np.concatenate([
+            self.norms,
+            np.sum(reduced.astype(np.float32) ** 2, axis=1)
+        ])
+        self._append_ids(ids)
+        self.dirty = True
+
+    def search(self, query_embedding: np.ndarray, n_candidates: int,
+               ids: List[str] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Approximate nearest neighbours in the reduced space
+
+        Args:
+            query_embedding: (dim,) full query embedding
+            n_candidates: Number of candidates to return
+            ids: Only scan these chunks (e.g. the routed documents' chunks)
+
+        Returns:
+            Candidate chunk ids and reduced-space squared L2 distances, closest first
+        """
+        if not self.ids:
+            return [], np.zeros(0, dtype=np.float32)
+
+        query = self.project(query_embedding[None, :])[0]
+        if ids is not None:
+            rows = self._rows(ids)
+            scores = self.vectors[rows].astype(np.float32) @ query
+            distances = self.norms[rows] - 2.0 * scores + float(query @ query)
+            return self._select(distances, n_candidates, rows)
+
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), _SCAN_BLOCK):
+            block = self.vectors[start:start + _SCAN_BLOCK].astype(np.float32)
+            scores[start:start + len(block)] = block @ query
+
+        distances = self.norms - 2.0 * scores + float(query @ query)
+        return self._select(distances, n_candidates)
+
+    def bytes_per_vector(self) -> int:
+        # Reduced vector + cached norm
+        return self.vectors.itemsize * self.dims + self.norms.itemsize
+
+    def save(self):
+        self._save_arrays(
+            vectors=self.vectors,
+            norms=self.norms,
+            mean=self.mean,
+            components=self.components,
+            method=np.asarray(self.method),
+            fit_size=np.asarray(self.fit_size)
+        )
+
+    def load(self):
+        arrays = self._load_arrays()
+        self.vectors = arrays["vectors"]
+        self.norms = arrays["norms"]
+        self.mean = arrays["mean"]
+        self.components = arrays["components"]
+        self.method = str(arrays["method"])
+        self.fit_size = int(arrays["fit_size"])
+        self.dims = self.components.shape[1]
+        self.dirty = False
+
+
+class PQIndex(SidecarIndex):
+    """
+    Product-quantized index: each vector stored as one byte per subspace
+
+    The embedding is split into `subspaces` equal slices and each slice is
+    replaced by the id of its nearest centroid from a per-subspace k-means
+    codebook. Queries use asymmetric distance computation: the query stays
+    exact, a (subspaces, centroids) table of slice-to-centroid distances is
+    built once, and each stored vector's distance is the sum of its table
+    entries.
+    """
+
+    def __init__(self, path: str, subspaces: int = None, centroids: int = None,
+                 iterations: int = None, seed: int = 0):
+        super().__init__(path)
+        self.subspaces = subspaces or Config.PQ_SUBSPACES
+        self.centroids = min(centroids or Config.PQ_CENTROIDS, 256)
+        self.iterations = iterations or Config.PQ_TRAIN_ITERATIONS
+        self.seed = seed
+        # (subspaces, centroids, sub_dim)
+        self.codebooks: Optional[np.ndarray] = None
+        self.codes = np.zeros((0, self.subspaces), dtype=np.uint8)
+
+        if os.path.exists(self.path):
+            self.load()
+
+    def _row_arrays(self) -> List[str]:
+        return ["codes"]
+
+    @property
+    def is_trained(self) -> bool:
+        return self.codebooks is not None
+
+    def _split(self, embeddings: np.ndarray) -> np.ndarray:
+        # (n, dim) -> (subspaces, n, sub_dim)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        n, dim = embeddings.shape
+        return embeddings.reshape(n, self.subspaces, dim // self.subspaces).transpose(1, 0, 2)
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        distances = (
+            np.sum(points ** 2, axis=1)[:, None]
+            - 2.0 * (points @ centroids.T)
+            + np.sum(centroids ** 2, axis=1)[None, :]
+        )
+        return np.argmin(distances, axis=1)
+
+    def _kmeans(self, points: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+        centroids = points[rng.choice(len(points), k, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignment = self._nearest(points, centroids)
+            counts = np.bincount(assignment, minlength=k)
+            for d in range(points.shape[1]):
+                centroids[:, d] = np.bincount(assignment, weights=points[:, d], minlength=k)
+            filled = counts > 0
+            centroids[filled] /= counts[filled, None]
+            # Re-seed empty clusters from random points
+            empty = np.flatnonzero(~filled)
+            if len(empty):
+                centroids[empty] = points[rng.choice(len(points), len(empty), replace=False)]
+        return centroids
+
+    def fit(self, sample: np.ndarray):
+        """
+        Train one k-means codebook per subspace
+
+        Args:
+            sample: (n, dim) embeddings; dim must be divisible by subspaces
+        """
+        sample = np.asarray(sample, dtype=np.float32)
+        if sample.shape[1] % self.subspaces:
+            raise ValueError(
+                f"Embedding dimension {sample.shape[1]} is not divisible by {self.subspaces} subspaces"
+            )
+
+        rng = np.random.default_rng(self.seed)
+        k = min(self.centroids, len(sample))
+        self.codebooks = np.stack([self._kmeans(points, k, rng) for points in self._split(sample)])
+        self.fit_size = len(sample)
+        self.codes = np.zeros((0, self.subspaces), dtype=np.uint8)
+        self._reset_rows()
+
+    def encode(self, embeddings: np.ndarray) -> np.ndarray:
+        """Nearest-centroid codes, (n, subspaces) uint8"""
+        parts = self._split(embeddings)
+        codes = np.empty((parts.shape[1], self.subspaces), dtype=np.uint8)
+        for j in range(self.subspaces):
+            codes[:, j] = self._nearest(parts[j], self.codebooks[j])
+        return codes
+
+    def add(self, ids: List[str], embeddings: np.ndarray):
+        if not ids:
+            return
+        self.codes = np.concatenate([self.codes, self.encode(embeddings)], axis=0)
+        self._append_ids(ids)
+        self.dirty = True
+
+    def search(self, query_embedding: np.ndarray, n_candidates: int,
+               ids: List[str] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Nearest neighbours by asymmetric distance computation
+
+        Args:
+            query_embedding: (dim,) full query embedding
+            n_candidates: Number of results to return
+            ids: Only scan these chunks (e.g. the routed documents' chunks)
+
+        Returns:
+            Chunk ids and approximate squared L2 distances, closest first
+        """
+        if not self.ids:
+            return [], np.zeros(0, dtype=np.float32)
+
+        # (subspaces, centroids) distance from each query slice to each centroid
+        query_parts = self._split(query_embedding[None, :])[:, 0, :]
+        table = np.sum((self.codebooks - query_parts[:, None, :]) ** 2, axis=2)
+
+        subspace_rows = np.arange(self.subspaces)[None, :]
+        if ids is not None:
+            rows = self._rows(ids)
+            distances = table[subspace_rows, self.codes[rows]].sum(axis=1)
+            return self._select(distances, n_candidates, rows)
+
+        distances = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), _SCAN_BLOCK):
+            block = self.codes[start:start + _SCAN_BLOCK]
+            distances[start:start + len(block)] = table[subspace_rows, block].sum(axis=1)
+
+        return self._select(distances, n_candidates)
+
+    def bytes_per_vector(self) -> int:
+        return self.codes.itemsize * self.subspaces
+
+    def save(self):
+        self._save_arrays(
+            codes=self.codes,
+            codebooks=self.codebooks,
+            fit_size=np.asarray(self.fit_size)
+        )
+
+    def load(self):
+        arrays = self._load_arrays()
+        self.codes = arrays["codes"]
+        self.codebooks = arrays["codebooks"]
+        self.subspaces, self.centroids = self.codebooks.shape[:2]
+        self.fit_size = int(arrays["fit_size"])
+        self.dirty = False
+
+
+class DocumentRouter(RowIndex):
+    """
+    One centroid per document, used to route queries to the closest documents
+
+    Keeps the running sum and count of each document's chunk embeddings,
+    so centroids stay exact as batches are added; rows are document ids.
+    Documents are compared to the query by the squared L2 distance between
+    the normalized query and the normalized centroid (2 - 2 * cosine).
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.sums = np.zeros((0, 0), dtype=np.float32)
+        self.counts = np.zeros(0, dtype=np.int64)
+        # Normalized centroids, recomputed after the sums change
+        self._unit: Optional[np.ndarray] = None
+        if path and os.path.exists(path):
+            self.load()
+
+    def _row_arrays(self) -> List[str]:
+        return ["sums", "counts"]
+
+    def reset(self):
+        """Drop every centroid"""
+        self.sums = np.zeros((0, 0), dtype=np.float32)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self._unit = None
+        self._reset_rows()
+
+    def add(self, ids: List[str], embeddings: np.ndarray):
+        """
+        Fold chunk embeddings into their documents' centroids
+
+        Args:
+            ids: Document id of each embedding (repeats are expected)
+            embeddings: (n, dim) chunk embeddings
+        """
+        if not ids:
+            return
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if not self.ids:
+            self.sums = np.zeros((0, embeddings.shape[1]), dtype=np.float32)
+
+        new_ids = list(dict.fromkeys(doc_id for doc_id in ids if doc_id not in self._positions))
+        if new_ids:
+            self.sums = np.concatenate([self.sums, np.zeros((len(new_ids), self.sums.shape[1]), dtype=np.float32)])
+            self.counts = np.concatenate([self.counts, np.zeros(len(new_ids), dtype=np.int64)])
+            self._append_ids(new_ids)
+
+        rows = np.fromiter((self._positions[doc_id] for doc_id in ids), dtype=np.int64, count=len(ids))
+        np.add.at(self.sums, rows, embeddings)
+        np.add.at(self.counts, rows, 1)
+        self._unit = None
+        self.dirty = True
+
+    def remove(self, ids: List[str]) -> int:
+        removed = super().remove(ids)
+        if removed:
+            self._unit = None
+        return removed
+
+    def search(self, query_embedding: np.ndarray, n_candidates: int,
+               ids: List[str] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Documents whose centroid is closest to the query
+
+        Args:
+            query_embedding: (dim,) query embedding
+            n_candidates: Number of documents to return
+            ids: Only consider these documents
+
+        Returns:
+            Document ids and centroid distances, closest first
+        """
+        if not self.ids:
+            return [], np.zeros(0, dtype=np.float32)
+
+        if self._unit is None:
+            norms = np.linalg.norm(self.sums, axis=1, keepdims=True)
+            self._unit = self.sums / np.maximum(norms, 1e-12)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        rows = self._rows(ids) if ids is not None else None
+        centroids = self._unit if rows is None else self._unit[rows]
+        distances = 2.0 - 2.0 * (centroids @ query)
+        return self._select(distances, n_candidates, rows)
+
+    def bytes_per_vector(self) -> int:
+        # Centroid sum + chunk count, per document
+        return self.sums.itemsize * self.sums.shape[1] + self.counts.itemsize
+
+    def save(self):
+        self._save_arrays(sums=self.sums, counts=self.counts)
+
+    def load(self):
+        arrays = self._load_arrays()
+        self.sums = arrays["sums"].astype(np.float32)
+        self.counts = arrays["counts"].astype(np.int64)
+        self._unit = None
+        self.dirty = False
+
+
+def create_index(backend: str, path: str) -> Optional[SidecarIndex]:
+    """
+    Build the sidecar index for an INDEX_BACKEND value
+
+    Args:
+        backend: "chroma" (no sidecar), "two_stage" or "pq"
+        path: Sidecar file, loaded if it exists
+
+    Returns:
+        Index, or None when ChromaDB answers queries on its own
+    """
+    if backend == "two_stage":
+        return ReducedIndex(path)
+    if backend == "pq":
+        return PQIndex(path)
+    if backend != "chroma":
+        raise ValueError(f"Unknown index backend: {backend}")
+    return None
+
+
+def exact_rerank(query_embedding: np.ndarray, candidate_vectors: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rerank candidates exactly with their full vectors
+
+    Args:
+        query_embedding: (dim,) query
+        candidate_vectors: (n, dim) full candidate embeddings
+        top_k: Number of results to keep
+
+    Returns:
+        (positions into candidate_vectors, squared L2 distances), closest first
+    """
+    candidate_vectors = np.asarray(candidate_vectors, dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    distances = np.sum((candidate_vectors - query) ** 2, axis=1)
+    order = np.argsort(distances)[:top_k]
+    return order, distances[order]
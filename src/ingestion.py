@@ -0,0 +1,306 @@
+import contextvars
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np # pyright: ignore[reportMissingImports]
+from src.config import Config # pyright: ignore[reportMissingImports]
+from src.document_processor import DocumentProcessor, PDFInput
+from src.metrics import span
+from src.profiling import profile_thread
+
+# Marks the end of a stage's output
+_DONE = object()
+
+# Called on the caller's thread once a document's chunks are committed
+DocumentCallback = Callable[[Dict], None]
+
+
+class _StageError:
+    """Carries an exception from a worker stage to the writer"""
+
+    def __init__(self, stage: str, error: BaseException):
+        self.stage = stage
+        self.error = error
+
+
+class IngestionPipeline:
+    """
+    Staged ingestion: extract -> chunk (+ dedup) -> embed -> write
+
+    Each stage runs in its own thread and hands work to the next through a
+    bounded queue, so extraction of file N+1 overlaps embedding of file N
+    while at most a few batches are held in memory. Writes are committed in
+    fixed-size batches on the calling thread. Near-duplicate chunks are
+    split off before embedding when the vector store supports it.
+    """
+
+    def __init__(self, processor: DocumentProcessor, vector_store, queue_size: int = None,
+                 embed_batch_size: int = None, write_batch_size: int = None):
+        self.processor = processor
+        self.vector_store = vector_store
+        self.queue_size = queue_size or Config.INGEST_QUEUE_SIZE
+        self.embed_batch_size = embed_batch_size or Config.EMBED_BATCH_SIZE
+        self.write_batch_size = min(
+            write_batch_size or Config.WRITE_BATCH_SIZE,
+            vector_store.max_batch_size
+        )
+        self._split_duplicates = getattr(vector_store, "split_duplicates", None)
+        self._discard_unwritten = getattr(vector_store, "discard_unwritten", None)
+        # Ids of the chunks sent for embedding in the current run
+        self._sent_ids: List[str] = []
+        self._cancelled = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Stages (worker threads)
+    # ------------------------------------------------------------------
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        # Blocks while the next stage is behind (back-pressure) but wakes
+        # up regularly so a failed pipeline can shut down
+        while not self._cancelled.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._cancelled.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _run_stage(self, stage: Callable, *args):
+        # Worker entry point; profiled when the run is inside a profile_capture
+        with profile_thread():
+            stage(*args)
+
+    def _extract_stage(self, sources: List[Tuple[str, PDFInput]], out: queue.Queue):
+        try:
+            for name, pdf in sources:
+                extraction = self.processor.extract_text_from_pdf(pdf, name)
+                if not self._put(out, (name, extraction)):
+                    return
+        except BaseException as e:
+            self._put(out, _StageError("extract", e))
+        finally:
+            self._put(out, _DONE)
+
+    def _chunk_stage(self, inp: queue.Queue, out: queue.Queue):
+        try:
+            while True:
+                item = self._get(inp)
+                if item is _DONE or isinstance(item, _StageError):
+                    if isinstance(item, _StageError):
+                        self._put(out, item)
+                    return
+
+                name, extraction = item
+                if not extraction["success"]:
+                    self._put(out, ("document", {
+                        "name": name,
+                        "success": False,
+                        "error": extraction.get("error", "Unknown")
+                    }))
+                    continue
+
+                with span("chunking"):
+                    chunks = self.processor.chunk_text(extraction["text"], extraction["metadata"])
+                # Release the full text before the chunks move downstream
+                del extraction["text"]
+                
+                num_chunks = len(chunks)
+                references = []
+                if self._split_duplicates is not None:
+                    chunks, references = self._split_duplicates(chunks)
+
+                # Columnar batches: texts and metadata travel as parallel lists
+                texts = [chunk["content"] for chunk in chunks]
+                metadatas = [chunk["metadata"] for chunk in chunks]
+                del chunks
+                if self._discard_unwritten is not None:
+                    self._sent_ids.extend(
+                        self.vector_store.chunk_id_for(metadata) for metadata in metadatas if "doc_id" in metadata
+                    )
+                for start in range(0, len(texts), self.embed_batch_size):
+                    end = start + self.embed_batch_size
+                    if not self._put(out, ("chunks", (texts[start:end], metadatas[start:end]))):
+                        return
+
+                self._put(out, ("document", {
+                    "name": name,
+                    "success": True,
+                    "num_chunks": num_chunks,
+                    "num_duplicates": len(references),
+                    "references": references,
+                    "metadata": extraction["metadata"]
+                }))
+        except BaseException as e:
+            self._put(out, _StageError("chunk", e))
+        finally:
+            self._put(out, _DONE)
+
+    def _embed_stage(self, inp: queue.Queue, out: queue.Queue):
+        try:
+            while True:
+                item = self._get(inp)
+                if item is _DONE or isinstance(item, _StageError):
+                    if isinstance(item, _StageError):
+                        self._put(out, item)
+                    return
+
+                kind, payload = item
+                if kind == "chunks":
+                    texts, metadatas = payload
+                    embeddings = self.vector_store.embedding_generator.generate_embeddings_batch(
+                        texts,
+                        show_progress_bar=False
+                    )
+                    item = ("embedded", (texts, embeddings, metadatas))
+
+                if not self._put(out, item):
+                    return
+        except BaseException as e:
+            self._put(out, _StageError("embed", e))
+        finally:
+            self._put(out, _DONE)
+
+    # ------------------------------------------------------------------
+    # Writer (calling thread)
+    # ------------------------------------------------------------------
+
+    def run(self, sources: List[Tuple[str, PDFInput]], on_document: Optional[DocumentCallback] = None) -> Dict:
+        """
+        Ingest a list of PDFs
+
+        Args:
+            sources: (display name, file path / bytes / PDFSource) pairs
+            on_document: Called with a per-document result once its chunks
+                are committed (or as soon as it fails)
+
+        Returns:
+            Summary with documents, chunks written and throughput
+        """
+        start = time.time()
+        self._cancelled.clear()
+        self._sent_ids = []
+        extracted = queue.Queue(maxsize=self.queue_size)
+        chunked = queue.Queue(maxsize=self.queue_size)
+        embedded = queue.Queue(maxsize=self.queue_size)
+
+        # Copy the caller's context so worker spans land in the active trace
+        # and workers are profiled into the active capture
+        workers = [
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self._run_stage, target, *args),
+                name=f"ingest-{label}",
+                daemon=True
+            )
+            for label, target, args in [
+                ("extract", self._extract_stage, (sources, extracted)),
+                ("chunk", self._chunk_stage, (extracted, chunked)),
+                ("embed", self._embed_stage, (chunked, embedded)),
+            ]
+        ]
+        for worker in workers:
+            worker.start()
+
+        documents: List[Dict] = []
+        # (chunks received before the document's last chunk, result) awaiting commit
+        pending_documents: List[Tuple[int, Dict]] = []
+        buffer_texts: List[str] = []
+        buffer_metadatas: List[Dict] = []
+        buffer_embeddings: List[np.ndarray] = []
+        chunks_received = 0
+        chunks_written = 0
+        num_duplicates = 0
+        error: Optional[_StageError] = None
+        failed = False
+
+        def notify(result: Dict):
+            nonlocal num_duplicates
+            # Every earlier chunk is committed by now, so references can be recorded
+            references = result.pop("references", None)
+            if references:
+                self.vector_store.add_references(references)
+                num_duplicates += len(references)
+            documents.append(result)
+            if on_document is not None:
+                on_document(result)
+
+        def flush(final: bool = False):
+            nonlocal chunks_written, buffer_texts, buffer_metadatas, buffer_embeddings
+            while len(buffer_texts) >= self.write_batch_size or (final and buffer_texts):
+                size = min(self.write_batch_size, len(buffer_texts))
+                stacked = np.concatenate(buffer_embeddings, axis=0)
+                self.vector_store.add_embeddings(
+                    buffer_texts[:size],
+                    stacked[:size],
+                    buffer_metadatas[:size]
+                )
+                chunks_written += size
+                buffer_texts = buffer_texts[size:]
+                buffer_metadatas = buffer_metadatas[size:]
+                buffer_embeddings = [stacked[size:]] if buffer_texts else []
+
+            while pending_documents and pending_documents[0][0] <= chunks_written:
+                notify(pending_documents.pop(0)[1])
+
+        try:
+            while True:
+                item = embedded.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _StageError):
+                    error = item
+                    break
+
+                kind, payload = item
+                if kind == "embedded":
+                    texts, embeddings, metadatas = payload
+                    buffer_texts.extend(texts)
+                    buffer_embeddings.append(embeddings)
+                    buffer_metadatas.extend(metadatas)
+                    chunks_received += len(texts)
+                    flush()
+                elif payload["success"]:
+                    pending_documents.append((chunks_received, payload))
+                    flush()
+                else:
+                    notify(payload)
+
+            if error is None:
+                flush(final=True)
+                self.vector_store.persist_indexes()
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._cancelled.set()
+            for worker in workers:
+                worker.join(timeout=5)
+            # Chunks registered as canonical but never written must not be
+            # referenced by later near-duplicates
+            if (failed or error is not None) and self._discard_unwritten is not None:
+                self._discard_unwritten(self._sent_ids)
+
+        if error is not None:
+            raise RuntimeError(f"Ingestion failed in {error.stage} stage: {error.error}") from error.error
+
+        duration = time.time() - start
+        total_chunks = chunks_written + num_duplicates
+        return {
+            "success": True,
+            "documents": documents,
+            "num_chunks_added": chunks_written,
+            "num_duplicates": num_duplicates,
+            "dedup_ratio": num_duplicates / total_chunks if total_chunks else 0.0,
+            "duration": duration,
+            "chunks_per_second": chunks_written / duration if duration > 0 else 0.0
+        }
+
@@ -0,0 +1,202 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from src.config import Config # pyright: ignore[reportMissingImports]
+from src.document_processor import DocumentProcessor, PDFInput
+from src.ingestion import IngestionPipeline
+from src.metrics import PerformanceMetrics, trace
+from src.namespaces import NamespaceManager, get_namespace_manager
+from src.pdf_source import PDFSource
+from src.profiling import profile_capture
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class IngestionJob:
+    """One batch of documents ingested in the background"""
+
+    def __init__(self, job_id: str, namespace: str, sources: List[Tuple[str, PDFInput]]):
+        self.job_id = job_id
+        self.namespace = namespace
+        self.names = [name for name, _ in sources]
+        self.sources = sources
+        self.state = QUEUED
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Per-document pipeline results, in the order they were committed
+        self.documents: List[Dict] = []
+        # Chunks embedded and stored vs. stored as references to a near-duplicate
+        self.chunks_added = 0
+        self.duplicates = 0
+        self.summary: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _on_document(self, result: Dict):
+        with self._lock:
+            self.documents.append(result)
+            if result["success"]:
+                self.chunks_added += result["num_chunks"] - result["num_duplicates"]
+                self.duplicates += result["num_duplicates"]
+
+    def status(self) -> Dict:
+        """Snapshot of the job's state, progress and throughput"""
+        with self._lock:
+            elapsed = 0.0
+            if self.started_at is not None:
+                elapsed = (self.finished_at or time.time()) - self.started_at
+            return {
+                "job_id": self.job_id,
+                "namespace": self.namespace,
+                "state": self.state,
+                "names": list(self.names),
+                "documents_done": len(self.documents),
+                "documents_total": len(self.names),
+                "progress": len(self.documents) / len(self.names) if self.names else 1.0,
+                "chunks_added": self.chunks_added,
+                "num_duplicates": self.duplicates,
+                "chunks_per_second": self.chunks_added / elapsed if elapsed > 0 else 0.0,
+                "queued_seconds": (self.started_at or time.time()) - self.submitted_at,
+                "elapsed": elapsed,
+                "documents": list(self.documents),
+                "summary": self.summary,
+                "error": self.error
+            }
+
+
+class JobManager:
+    """
+    Runs ingestion jobs on a small worker pool
+
+    Submitting returns a job id right away; callers poll status() while
+    the documents are extracted, embedded and committed. Each document is
+    searchable as soon as its chunks are committed, so queries keep working
+    against everything indexed so far.
+    """
+
+    def __init__(self, workers: int = None, history: int = None,
+                 namespace_manager: NamespaceManager = None):
+        self.workers = workers or Config.INGEST_JOB_WORKERS
+        self.history = history or Config.INGEST_JOB_HISTORY
+        self.namespace_manager = namespace_manager or get_namespace_manager()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest-job")
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, sources: List[Tuple[str, PDFInput]], namespace: str = None,
+               metrics: PerformanceMetrics = None, profiling: bool = False) -> str:
+        """
+        Queue documents for ingestion
+
+        Args:
+            sources: (display name, path / bytes / PDFSource) pairs; the job
+                closes PDFSources when it finishes
+            namespace: Target namespace (Config.DEFAULT_NAMESPACE by default)
+            metrics: Session metrics the finished run is recorded in
+            profiling: Capture a cProfile/tracemalloc profile of the run
+
+        Returns:
+            Job id
+        """
+        job = IngestionJob(uuid.uuid4().hex[:8], namespace or Config.DEFAULT_NAMESPACE, sources)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job, metrics, profiling)
+        print(f"✓ Queued ingestion job {job.job_id} ({len(sources)} documents)")
+        return job.job_id
+
+    def _run(self, job: IngestionJob, metrics: Optional[PerformanceMetrics], profiling: bool):
+        with job._lock:
+            job.state = RUNNING
+            job.started_at = time.time()
+
+        manager = self.namespace_manager
+        manager.pin(job.namespace)
+        try:
+            vector_store = manager.get_store(job.namespace)
+            with trace() as ingestion_trace, profile_capture(profiling) as ingestion_profile:
+                pipeline = IngestionPipeline(DocumentProcessor(), vector_store)
+                summary = pipeline.run(job.sources, on_document=job._on_document)
+            summary.pop("documents", None)
+
+            if metrics is not None and (summary["num_chunks_added"] or summary["num_duplicates"]):
+                ingestion_metric = metrics.track_ingestion(
+                    len(job.names),
+                    summary["num_chunks_added"],
+                    summary["duration"],
+                    ingestion_trace.stages,
+                    num_duplicates=summary["num_duplicates"]
+                )
+                if ingestion_profile is not None:
+                    metrics.attach_profile(ingestion_metric, ingestion_profile.to_dict())
+            with job._lock:
+                job.summary = summary
+                job.state = DONE
+            print(f"✓ Ingestion job {job.job_id} done: {summary['num_chunks_added']} chunks "
+                  f"({summary['chunks_per_second']:.0f} chunks/s)")
+
+        except Exception as e:
+            with job._lock:
+                job.error = str(e)
+                job.state = FAILED
+            print(f"❌ Ingestion job {job.job_id} failed: {str(e)}")
+
+        finally:
+            with job._lock:
+                job.finished_at = time.time()
+            for _, pdf in job.sources:
+                if isinstance(pdf, PDFSource):
+                    pdf.close()
+            job.sources = []
+            manager.touch(job.namespace)
+            manager.unpin(job.namespace)
+
+    def _prune(self):
+        # Forget the oldest finished jobs beyond the history limit
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in (DONE, FAILED)]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Status of one job (None once it has been pruned)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.status() if job is not None else None
+
+    def list_jobs(self, job_ids: List[str] = None) -> List[Dict]:
+        """Status of the given jobs (all known jobs by default), newest first"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if job_ids is not None:
+            wanted = set(job_ids)
+            jobs = [job for job in jobs if job.job_id in wanted]
+        return [job.status() for job in reversed(jobs)]
+
+    def has_active(self, job_ids: List[str] = None) -> bool:
+        """Whether any of the given jobs is still queued or running"""
+        return any(job["state"] in (QUEUED, RUNNING) for job in self.list_jobs(job_ids))
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+_default_job_manager: Optional[JobManager] = None
+_default_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide job manager shared by all Streamlit sessions"""
+    global _default_job_manager
+    with _default_job_manager_lock:
+        if _default_job_manager is None:
+            _default_job_manager = JobManager()
+        return _default_job_manager
@@ -1,6 +1,7 @@
 from typing import List, Dict
 from openai import OpenAI
 from src.config import Config
+from src.metrics import span
 
 class LLMHandler:
     """Handles LLM interactions for generating answers"""
@@ -42,18 +43,20 @@ Answer based only on the context above:"""
         
         try:
             # Create prompt
-            prompt = self.create_prompt(query, context_chunks)
+            with span("prompt_build"):
+                prompt = self.create_prompt(query, context_chunks)
             
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=Config.LLM_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that answers questions based on document context."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=Config.LLM_TEMPERATURE,
-                max_tokens=Config.MAX_TOKENS
-            )
+            with span("llm_call"):
+                response = self.client.chat.completions.create(
+                    model=Config.LLM_MODEL,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant that answers questions based on document context."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=Config.LLM_TEMPERATURE,
+                    max_tokens=Config.MAX_TOKENS
+                )
             
             answer = response.choices[0].message.content
             
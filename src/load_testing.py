@@ -0,0 +1,257 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np # pyright: ignore[reportMissingImports]
+from src.llm_handler import LLMHandler
+from src.metrics import span, trace
+
+# Retrieval under test: takes the query text, returns chunks (e.g. VectorStore.search)
+SearchFn = Callable[[str], List[Dict]]
+
+# Arrival processes for open-loop replay
+ARRIVALS = ("poisson", "uniform", "recorded")
+
+
+def _parse_timestamp(value) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def load_query_log(path: str) -> List[Dict]:
+    """
+    Read the queries to replay from an export or a metrics query log
+
+    Accepts ExportUtils.export_chat_to_json output, iter_chat_ndjson output
+    and query logs from ExportUtils.iter_query_log_ndjson (or any JSON list
+    of PerformanceMetrics query records).
+
+    Args:
+        path: JSON or NDJSON file
+
+    Returns:
+        [{"query": str, "timestamp": float or None}] in log order
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    try:
+        data = json.loads(text)
+        records = data.get("conversation", [data]) if isinstance(data, dict) else data
+    except json.JSONDecodeError:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    queries = []
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        if "query" in record:
+            query = record["query"]
+        elif record.get("role") == "user" and record.get("type", "message") == "message":
+            query = record.get("content")
+        else:
+            continue
+        if query:
+            queries.append({"query": query, "timestamp": _parse_timestamp(record.get("timestamp"))})
+    return queries
+
+
+class StubLLMHandler(LLMHandler):
+    """
+    Local stand-in for the OpenAI call with tunable latency
+
+    Builds the real prompt, then sleeps instead of calling the API, so the
+    rest of the query path is exercised without cost or rate limits.
+    """
+
+    def __init__(self, latency_ms: float = 800.0, jitter_ms: float = 200.0, seed: int = None):
+        self.use_openai = False
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def generate_answer(self, query: str, context_chunks: List[Dict]) -> Dict:
+        with span("prompt_build"):
+            prompt = self.create_prompt(query, context_chunks)
+
+        with self._random_lock:
+            delay_ms = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        with span("llm_call"):
+            time.sleep(max(delay_ms, 0.0) / 1000)
+
+        return {
+            "success": True,
+            "answer": f"Stub answer ({len(prompt)} prompt characters)",
+            "sources": [chunk["metadata"] for chunk in context_chunks],
+            "model": "stub"
+        }
+
+
+def _arrival_offsets(queries: List[Dict], rate: float, arrival: str, speedup: float,
+                     rng: np.random.Generator) -> np.ndarray:
+    # Seconds after the start at which each query is sent
+    if arrival == "recorded":
+        timestamps = [query["timestamp"] for query in queries]
+        if None in timestamps:
+            raise ValueError("Recorded arrivals need a timestamp on every query (use a metrics query log)")
+        return (np.asarray(timestamps) - timestamps[0]) / speedup
+    if arrival == "uniform":
+        return np.arange(len(queries)) / rate
+    if arrival == "poisson":
+        return np.concatenate(([0.0], np.cumsum(rng.exponential(1 / rate, len(queries) - 1))))
+    raise ValueError(f"Unknown arrival process: {arrival} (choose from {', '.join(ARRIVALS)})")
+
+
+def replay(queries: List[Dict], search: SearchFn, llm: LLMHandler, concurrency: int,
+           rate: float = None, arrival: str = "poisson", speedup: float = 1.0,
+           seed: int = 0) -> Dict:
+    """
+    Replay queries through retrieval and the LLM and measure the service
+
+    With a rate (or recorded arrivals) the load is open-loop: queries are
+    sent on schedule whether or not earlier ones finished, and latency
+    counts the time spent waiting for one of the `concurrency` workers.
+    Without a rate each worker sends its next query as soon as the last
+    one returns (closed loop), which measures peak throughput.
+
+    Args:
+        queries: Output of load_query_log()
+        search: Retrieval function, e.g. VectorStore.search
+        llm: Answer generator (StubLLMHandler for capacity tests)
+        concurrency: Queries served at once (app sessions / server threads)
+        rate: Offered load in queries per second (None = closed loop)
+        arrival: "poisson", "uniform" or "recorded" (original gaps / speedup)
+        speedup: Time compression for recorded arrivals
+        seed: Seed for Poisson arrivals
+
+    Returns:
+        Throughput, latency percentiles (ms) and error count
+    """
+    if not queries:
+        raise ValueError("No queries to replay")
+
+    open_loop = rate is not None or arrival == "recorded"
+    offsets = None
+    if open_loop:
+        offsets = _arrival_offsets(queries, rate, arrival, speedup, np.random.default_rng(seed))
+
+    results: List[Optional[Dict]] = [None] * len(queries)
+
+    def serve(index: int, scheduled: float):
+        started = time.perf_counter()
+        record = {"wait": started - scheduled, "error": None}
+        try:
+            with trace() as query_trace:
+                chunks = search(queries[index]["query"])
+                llm.generate_answer(queries[index]["query"], chunks)
+            record["stages"] = query_trace.stages
+        except Exception as e:
+            record["error"] = str(e)
+            record["stages"] = {}
+        finished = time.perf_counter()
+        record["latency"] = finished - scheduled
+        record["finished"] = finished
+        results[index] = record
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as executor:
+        if open_loop:
+            for index, offset in enumerate(offsets):
+                scheduled = start + offset
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(serve, index, scheduled)
+        else:
+            next_index = iter(range(len(queries)))
+            index_lock = threading.Lock()
+
+            def client():
+                while True:
+                    with index_lock:
+                        index = next(next_index, None)
+                    if index is None:
+                        return
+                    serve(index, time.perf_counter())
+
+            for _ in range(concurrency):
+                executor.submit(client)
+
+    ok = [record for record in results if record["error"] is None]
+    # Departure rate between the first and last completion: equals the
+    # arrival rate until the workers saturate, then their capacity
+    finished = sorted(record["finished"] for record in ok)
+    span_s = finished[-1] - finished[0] if len(finished) > 1 else 0.0
+    latencies = np.asarray([record["latency"] for record in ok]) * 1000
+    waits = np.asarray([record["wait"] for record in ok]) * 1000
+    summary = {
+        "queries": len(queries),
+        "errors": len(queries) - len(ok),
+        "concurrency": concurrency,
+        "offered_qps": (len(queries) - 1) / offsets[-1] if open_loop and offsets[-1] > 0 else None,
+        "throughput_qps": (len(finished) - 1) / span_s if span_s > 0 else 0.0,
+        "mean_wait_ms": float(waits.mean()) if len(waits) else 0.0,
+        "stage_p50_ms": {},
+    }
+    for percentile in (50, 90, 95, 99):
+        summary[f"p{percentile}_ms"] = float(np.percentile(latencies, percentile)) if len(latencies) else 0.0
+    for stage in ("embedding", "vector_search", "llm_call"):
+        samples = [record["stages"][stage] for record in ok if stage in record["stages"]]
+        if samples:
+            summary["stage_p50_ms"][stage] = float(np.median(samples)) * 1000
+    return summary
+
+
+def find_saturation(queries: List[Dict], search: SearchFn, llm: LLMHandler, concurrency: int,
+                    rates: List[float], slo_p95_ms: float = None, min_efficiency: float = 0.9,
+                    on_step: Callable[[Dict], None] = None) -> Dict:
+    """
+    Step the offered load up until the service saturates
+
+    A step is saturated when throughput falls below min_efficiency of the
+    offered rate (queries pile up) or, with an SLO, when p95 latency
+    exceeds it. Each step replays the same queries with Poisson arrivals.
+
+    Args:
+        queries: Queries replayed at every step
+        search: Retrieval function
+        llm: Answer generator
+        concurrency: Queries served at once
+        rates: Offered loads to try, ascending (queries per second)
+        slo_p95_ms: Optional p95 latency objective
+        min_efficiency: Throughput / offered rate below which a step is saturated
+        on_step: Called with each step's summary as it finishes
+
+    Returns:
+        {"steps": [...], "saturation_qps": first saturated rate or None,
+        "max_sustained_qps": highest rate that was not}
+    """
+    steps = []
+    saturation = None
+    sustained = None
+    for rate in rates:
+        summary = replay(queries, search, llm, concurrency, rate=rate, arrival="poisson")
+        efficiency = summary["throughput_qps"] / summary["offered_qps"] if summary["offered_qps"] else 1.0
+        summary["saturated"] = (
+            efficiency < min_efficiency
+            or (slo_p95_ms is not None and summary["p95_ms"] > slo_p95_ms)
+            or summary["errors"] > 0
+        )
+        steps.append(summary)
+        if on_step is not None:
+            on_step(summary)
+        if summary["saturated"]:
+            saturation = rate
+            break
+        sustained = rate
+    return {"steps": steps, "saturation_qps": saturation, "max_sustained_qps": sustained}
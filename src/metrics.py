@@ -1,60 +1,330 @@
+import math
+import threading
 import time
-from typing import Dict, List
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
 from datetime import datetime
+import numpy as np # pyright: ignore[reportMissingImports]
+from src.config import Config # pyright: ignore[reportMissingImports]
+from src.performance_profiles import active_profile, current_overrides
+
+# Trace collecting spans for the query or ingestion run in progress
+_active_trace: ContextVar[Optional["Trace"]] = ContextVar("active_trace", default=None)
+
+
+class Trace:
+    """Collects per-stage durations for a single query or ingestion run"""
+    
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        # Non-timing facts about the run, e.g. which retrieval cutoff fired
+        self.attributes: Dict[str, object] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, stage: str, seconds: float):
+        """Accumulate time spent in a stage (a stage may run several times)"""
+        # Pipeline stages running in worker threads share the same trace
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+    
+    def total(self) -> float:
+        """Total time attributed to stages"""
+        return sum(self.stages.values())
+
+
+@contextmanager
+def trace():
+    """
+    Start collecting spans for the code run inside this block
+    
+    Usage:
+        with trace() as query_trace:
+            vector_store.search(query)
+        query_trace.stages  # {"embedding": 0.01, "vector_search": 0.02}
+    """
+    current = Trace()
+    token = _active_trace.set(current)
+    try:
+        yield current
+    finally:
+        _active_trace.reset(token)
+
+
+def annotate(key: str, value):
+    """Attach a value to the active trace (no-op when none is active)"""
+    current = _active_trace.get()
+    if current is not None:
+        current.attributes[key] = value
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage and attach it to the active trace (no-op when none is active)"""
+    current = _active_trace.get()
+    if current is None:
+        yield
+        return
+    
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.add(stage, time.perf_counter() - start)
+
+
+class StreamingQuantiles:
+    """
+    Log-bucketed histogram that answers quantile queries in constant memory
+    
+    Every value lands in a bucket whose bounds grow geometrically, so any
+    quantile is reported within `relative_accuracy` of the true value no
+    matter how many samples have been added.
+    """
+    
+    def __init__(self, min_value: float = 1e-4, max_value: float = 1e4, relative_accuracy: float = 0.01):
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        num_buckets = int(math.ceil(math.log(max_value / min_value) / self._log_gamma)) + 2
+        self.counts = np.zeros(num_buckets, dtype=np.int64)
+        self.count = 0
+    
+    def add(self, value: float):
+        """Record one sample"""
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = int(math.ceil(math.log(value / self.min_value) / self._log_gamma))
+            index = min(index, len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+    
+    def quantile(self, q: float) -> float:
+        """Approximate value below which a fraction q of the samples fall"""
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank, side="right"))
+        if index == 0:
+            return self.min_value
+        # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+        return self.min_value * 2 * self.gamma ** index / (self.gamma + 1)
+
+
+class MetricsRingBuffer:
+    """Fixed-capacity circular buffer of numeric query samples backed by NumPy arrays"""
+    
+    FIELDS = {
+        "timestamp": np.float64,
+        "response_time": np.float64,
+        "num_chunks_retrieved": np.int32,
+        "num_sources": np.int32
+    }
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.FIELDS.items()}
+        self._next = 0
+        self.size = 0
+    
+    def append(self, **values):
+        """Write one sample, overwriting the oldest once full"""
+        for name, value in values.items():
+            self.arrays[name][self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+    
+    def field(self, name: str) -> np.ndarray:
+        """Samples of one field, oldest first"""
+        array = self.arrays[name]
+        if self.size < self.capacity:
+            return array[:self.size]
+        return np.concatenate((array[self._next:], array[:self._next]))
+
 
 class PerformanceMetrics:
     """Track and display performance metrics"""
     
-    def __init__(self):
-        self.query_history = []
+    def __init__(self, capacity: int = None, recent_records: int = None, sink=None):
+        capacity = capacity or Config.METRICS_CAPACITY
+        recent_records = recent_records or Config.METRICS_RECENT_RECORDS
+        
+        # Only the most recent full records are kept; numeric samples go to the ring buffer
+        self.query_history = deque(maxlen=recent_records)
+        self.ingestion_history = deque(maxlen=recent_records)
+        self.samples = MetricsRingBuffer(capacity)
+        self.latency_quantiles = StreamingQuantiles()
+        
+        # Optional MetricsSink that persists aggregates across sessions
+        self.sink = sink
+        
+        # Running aggregates so summaries never rescan history
+        self._total_queries = 0
+        self._total_response_time = 0.0
+        self._fastest_query = float("inf")
+        self._slowest_query = 0.0
+        self._total_chunks_retrieved = 0
+        self._stage_totals: Dict[str, float] = {}
+        self._ingestion_stage_totals: Dict[str, float] = {}
+        self._cutoff_counts: Dict[str, int] = {}
+        
+        # Ingestion jobs record from their own thread while the session reads and records queries
+        self._lock = threading.Lock()
     
-    def track_query(self, query: str, response_time: float, num_chunks: int, sources: List[Dict]) -> Dict:
-        """Track a query and its metrics"""
+    def track_query(self, query: str, response_time: float, num_chunks: int, sources: List[Dict],
+                    stages: Dict[str, float] = None, cutoff: Optional[str] = None) -> Dict:
+        """Track a query and its metrics (cutoff: which adaptive top-k rule set the chunk count)"""
+        stages = dict(stages or {})
         metric = {
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "query": query,
             "response_time": response_time,
             "num_chunks_retrieved": num_chunks,
             "num_sources": len(sources),
-            "sources": sources
+            "sources": sources,
+            "stages": stages,
+            "cutoff": cutoff,
+            "performance_profile": active_profile(),
+            "overrides": current_overrides(),
+            "profile": None
+        }
+        
+        with self._lock:
+            self.query_history.append(metric)
+            self.samples.append(
+                timestamp=time.time(),
+                response_time=response_time,
+                num_chunks_retrieved=num_chunks,
+                num_sources=len(sources)
+            )
+            self.latency_quantiles.add(response_time)
+            
+            self._total_queries += 1
+            self._total_response_time += response_time
+            self._fastest_query = min(self._fastest_query, response_time)
+            self._slowest_query = max(self._slowest_query, response_time)
+            self._total_chunks_retrieved += num_chunks
+            
+            for stage, seconds in stages.items():
+                self._stage_totals[stage] = self._stage_totals.get(stage, 0.0) + seconds
+            self._stage_totals["other"] = self._stage_totals.get("other", 0.0) + max(response_time - sum(stages.values()), 0.0)
+            if cutoff is not None:
+                self._cutoff_counts[cutoff] = self._cutoff_counts.get(cutoff, 0) + 1
+        
+        if self.sink is not None:
+            self.sink.record_query(response_time, num_chunks, stages)
+            if cutoff is not None:
+                self.sink.increment("documind_retrieval_cutoffs_total", cutoff=cutoff)
+        
+        return metric
+    
+    def track_ingestion(self, num_documents: int, num_chunks: int, duration: float,
+                        stages: Dict[str, float] = None, num_duplicates: int = 0) -> Dict:
+        """Track a document ingestion run, its per-stage durations and dedup ratio"""
+        total_chunks = num_chunks + num_duplicates
+        metric = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "num_documents": num_documents,
+            "num_chunks": num_chunks,
+            "num_duplicates": num_duplicates,
+            "dedup_ratio": num_duplicates / total_chunks if total_chunks else 0.0,
+            "duration": duration,
+            "stages": dict(stages or {}),
+            "performance_profile": active_profile(),
+            "profile": None
         }
         
-        self.query_history.append(metric)
+        with self._lock:
+            self.ingestion_history.append(metric)
+            for stage, seconds in metric["stages"].items():
+                self._ingestion_stage_totals[stage] = self._ingestion_stage_totals.get(stage, 0.0) + seconds
+        
+        if self.sink is not None:
+            self.sink.record_ingestion(num_documents, num_chunks, duration)
+            if num_duplicates:
+                self.sink.increment("documind_duplicate_chunks_total", num_duplicates)
         return metric
     
+    def attach_profile(self, metric: Dict, profile: Optional[Dict]):
+        """Store a debug profile (see src.profiling) on an already tracked record"""
+        with self._lock:
+            metric["profile"] = profile
+    
     def get_average_response_time(self) -> float:
         """Calculate average response time"""
-        if not self.query_history:
-            return 0.0
-        
-        total_time = sum(q["response_time"] for q in self.query_history)
-        return total_time / len(self.query_history)
+        with self._lock:
+            if not self._total_queries:
+                return 0.0
+            
+            return self._total_response_time / self._total_queries
     
     def get_total_queries(self) -> int:
         """Get total number of queries"""
-        return len(self.query_history)
+        return self._total_queries
     
     def get_summary_stats(self) -> Dict:
         """Get summary statistics"""
-        if not self.query_history:
+        with self._lock:
+            if not self._total_queries:
+                return {
+                    "total_queries": 0,
+                    "avg_response_time": 0.0,
+                    "fastest_query": 0.0,
+                    "slowest_query": 0.0,
+                    "p50_response_time": 0.0,
+                    "p95_response_time": 0.0,
+                    "p99_response_time": 0.0,
+                    "total_chunks_retrieved": 0
+                }
+            
             return {
-                "total_queries": 0,
-                "avg_response_time": 0.0,
-                "fastest_query": 0.0,
-                "slowest_query": 0.0,
-                "total_chunks_retrieved": 0
+                "total_queries": self._total_queries,
+                "avg_response_time": self._total_response_time / self._total_queries,
+                "fastest_query": self._fastest_query,
+                "slowest_query": self._slowest_query,
+                "p50_response_time": self.latency_quantiles.quantile(0.50),
+                "p95_response_time": self.latency_quantiles.quantile(0.95),
+                "p99_response_time": self.latency_quantiles.quantile(0.99),
+                "total_chunks_retrieved": self._total_chunks_retrieved
             }
+    
+    def get_stage_breakdown(self) -> Dict[str, float]:
+        """
+        Average time per stage across tracked queries
         
-        response_times = [q["response_time"] for q in self.query_history]
-        
-        return {
-            "total_queries": len(self.query_history),
-            "avg_response_time": sum(response_times) / len(response_times),
-            "fastest_query": min(response_times),
-            "slowest_query": max(response_times),
-            "total_chunks_retrieved": sum(q["num_chunks_retrieved"] for q in self.query_history)
-        }
+        Returns:
+            Stage name -> average seconds, including "other" for time
+            not covered by any span
+        """
+        with self._lock:
+            if not self._total_queries:
+                return {}
+            
+            return {stage: total / self._total_queries for stage, total in self._stage_totals.items()}
+    
+    def get_cutoff_counts(self) -> Dict[str, int]:
+        """How often each adaptive top-k cutoff decided the number of chunks"""
+        with self._lock:
+            return dict(self._cutoff_counts)
+    
+    def get_ingestion_stage_breakdown(self) -> Dict[str, float]:
+        """Total time per stage across ingestion runs"""
+        with self._lock:
+            return dict(self._ingestion_stage_totals)
+    
+    def get_response_time_series(self) -> np.ndarray:
+        """Response times of the last METRICS_CAPACITY queries, oldest first"""
+        with self._lock:
+            return self.samples.field("response_time").copy()
+    
+    def get_recent_ingestions(self, limit: int = 10) -> List[Dict]:
+        """Get recent ingestion runs"""
+        with self._lock:
+            return list(self.ingestion_history)[-limit:]
     
     def get_recent_queries(self, limit: int = 10) -> List[Dict]:
         """Get recent queries"""
-        return self.query_history[-limit:]
\ No newline at end of file
+        with self._lock:
+            return list(self.query_history)[-limit:]
@@ -0,0 +1,310 @@
+import json
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from src.config import Config # pyright: ignore[reportMissingImports]
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf")]
+
+# Metric name -> (type, help text) for the exposition format
+METRIC_HELP = {
+    "documind_queries_total": ("counter", "Queries answered"),
+    "documind_query_latency_seconds": ("histogram", "End-to-end query response time"),
+    "documind_query_stage_seconds_total": ("counter", "Time spent per query stage"),
+    "documind_chunks_retrieved_total": ("counter", "Chunks retrieved for queries"),
+    "documind_ingested_documents_total": ("counter", "Documents ingested"),
+    "documind_ingested_chunks_total": ("counter", "Chunks ingested"),
+    "documind_ingestion_seconds_total": ("counter", "Time spent ingesting documents"),
+    "documind_duplicate_chunks_total": ("counter", "Chunks stored as references to a near-identical chunk"),
+    "documind_retrieval_cutoffs_total": ("counter", "Queries by the adaptive top-k rule that set the chunk count"),
+    "documind_cache_hits_total": ("counter", "Cache hits"),
+    "documind_cache_misses_total": ("counter", "Cache misses"),
+    "documind_metrics_dropped_total": ("counter", "Metric events dropped because the sink queue was full"),
+}
+
+# (metric name, sorted label pairs) identifying one series
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _format_le(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsSink:
+    """
+    Durable, batched metrics sink shared by every session in the process
+
+    Events are queued without blocking the request path. A background thread
+    aggregates them, appends each flush to SQLite and keeps running totals,
+    then rewrites a Prometheus text-format file (usable with the
+    node_exporter textfile collector) and, optionally, serves it over HTTP.
+    """
+
+    def __init__(self, db_path: str = None, textfile_path: str = None,
+                 flush_interval: float = None, instance: str = None, max_queue: int = 10000):
+        self.db_path = db_path or Config.METRICS_DB_PATH
+        self.textfile_path = textfile_path or Config.METRICS_PROMETHEUS_FILE
+        self.flush_interval = flush_interval or Config.METRICS_FLUSH_INTERVAL
+        self.instance = instance or Config.METRICS_INSTANCE or socket.gethostname()
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._exposition = ""
+        self._http_server: Optional[ThreadingHTTPServer] = None
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        os.makedirs(os.path.dirname(self.textfile_path) or ".", exist_ok=True)
+
+        self._thread = threading.Thread(target=self._run, name="metrics-sink", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Request path: O(1), never blocks
+    # ------------------------------------------------------------------
+
+    def _put(self, event: Tuple):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    def record_query(self, response_time: float, num_chunks: int, stages: Dict[str, float] = None):
+        """Queue one answered query"""
+        self._put(("query", response_time, num_chunks, dict(stages or {})))
+
+    def record_ingestion(self, num_documents: int, num_chunks: int, duration: float):
+        """Queue one ingestion run"""
+        self._put(("ingestion", num_documents, num_chunks, duration))
+
+    def increment(self, name: str, value: float = 1.0, **labels):
+        """Queue a counter increment, e.g. increment("documind_cache_hits_total", cache="pages")"""
+        self._put(("counter", name, value, labels))
+
+    # ------------------------------------------------------------------
+    # Background flushing
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        self._init_schema(connection)
+        try:
+            while not self._stop.wait(self.flush_interval):
+                self._flush(connection)
+            self._flush(connection)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _init_schema(connection: sqlite3.Connection):
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS metric_flushes (
+                ts REAL NOT NULL,
+                instance TEXT NOT NULL,
+                name TEXT NOT NULL,
+                labels TEXT NOT NULL,
+                value REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_metric_flushes_ts ON metric_flushes (ts);
+            CREATE TABLE IF NOT EXISTS metric_totals (
+                instance TEXT NOT NULL,
+                name TEXT NOT NULL,
+                labels TEXT NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (instance, name, labels)
+            );
+        """)
+
+    def _drain(self) -> Dict[SeriesKey, float]:
+        """Aggregate every queued event into per-series deltas"""
+        deltas: Dict[SeriesKey, float] = {}
+
+        def add(name: str, value: float, **labels):
+            key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+            deltas[key] = deltas.get(key, 0.0) + value
+
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            kind = event[0]
+            if kind == "query":
+                _, response_time, num_chunks, stages = event
+                add("documind_queries_total", 1)
+                add("documind_chunks_retrieved_total", num_chunks)
+                add("documind_query_latency_seconds_sum", response_time)
+                add("documind_query_latency_seconds_count", 1)
+                # Buckets are stored cumulatively so flushes can simply be summed;
+                # empty ones get a zero row so every bucket is exposed
+                for bound in LATENCY_BUCKETS:
+                    add("documind_query_latency_seconds_bucket", int(response_time <= bound), le=_format_le(bound))
+                for stage, seconds in stages.items():
+                    add("documind_query_stage_seconds_total", seconds, stage=stage)
+            elif kind == "ingestion":
+                _, num_documents, num_chunks, duration = event
+                add("documind_ingested_documents_total", num_documents)
+                add("documind_ingested_chunks_total", num_chunks)
+                add("documind_ingestion_seconds_total", duration)
+            elif kind == "counter":
+                _, name, value, labels = event
+                add(name, value, **labels)
+
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            add("documind_metrics_dropped_total", dropped)
+
+        return deltas
+
+    def _flush(self, connection: sqlite3.Connection):
+        deltas = self._drain()
+        if not deltas and self._exposition:
+            return
+
+        now = time.time()
+        rows = [
+            (now, self.instance, name, json.dumps(dict(labels)), value)
+            for (name, labels), value in deltas.items()
+        ]
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO metric_flushes (ts, instance, name, labels, value) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                connection.executemany(
+                    "INSERT INTO metric_totals (instance, name, labels, value) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (instance, name, labels) DO UPDATE SET value = value + excluded.value",
+                    [row[1:] for row in rows]
+                )
+                connection.execute(
+                    "DELETE FROM metric_flushes WHERE ts < ?",
+                    (now - Config.METRICS_RETENTION_DAYS * 86400,)
+                )
+            # The database may be shared; other instances export their own totals
+            totals = connection.execute(
+                "SELECT instance, name, labels, value FROM metric_totals WHERE instance = ?",
+                (self.instance,)
+            ).fetchall()
+            self._exposition = self.render(totals)
+            self._write_textfile(self._exposition)
+        except sqlite3.Error as e:
+            print(f"⚠ Metrics flush failed: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Exposition
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def render(totals: List[Tuple[str, str, str, float]]) -> str:
+        """
+        Render running totals in the Prometheus text exposition format
+
+        Args:
+            totals: (instance, name, labels_json, value) rows
+
+        Returns:
+            Exposition text
+        """
+        def sort_key(row):
+            instance, name, labels_json, _ = row
+            labels = json.loads(labels_json)
+            le = float(labels.pop("le", "0").replace("+Inf", "inf"))
+            return name, instance, sorted(labels.items()), le
+
+        by_family: Dict[str, List[str]] = {}
+        for instance, name, labels_json, value in sorted(totals, key=sort_key):
+            family = name
+            for suffix in ("_bucket", "_sum", "_count"):
+                if name.endswith(suffix) and name[:-len(suffix)] in METRIC_HELP:
+                    family = name[:-len(suffix)]
+
+            labels = {"instance": instance, **json.loads(labels_json)}
+            label_text = ",".join(
+                f'{key}="{_escape_label(str(val))}"' for key, val in labels.items()
+            )
+            by_family.setdefault(family, []).append(f"{name}{{{label_text}}} {value:g}")
+
+        lines = []
+        for family, samples in by_family.items():
+            kind, help_text = METRIC_HELP.get(family, ("untyped", family))
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def _write_textfile(self, text: str):
+        # Write then rename so scrapers never see a half-written file
+        tmp_path = f"{self.textfile_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self.textfile_path)
+
+    def exposition(self) -> str:
+        """Exposition text as of the last flush"""
+        return self._exposition
+
+    def serve_http(self, port: int):
+        """Serve the exposition text at http://0.0.0.0:<port>/metrics in a daemon thread"""
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.exposition().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._http_server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        threading.Thread(target=self._http_server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"✓ Metrics endpoint listening on :{port}/metrics")
+
+    def close(self):
+        """Flush remaining events and stop the background thread"""
+        self._stop.set()
+        self._thread.join(timeout=self.flush_interval + 5)
+        if self._http_server is not None:
+            self._http_server.shutdown()
+
+
+_default_sink: Optional[MetricsSink] = None
+_default_sink_lock = threading.Lock()
+
+
+def get_metrics_sink() -> Optional[MetricsSink]:
+    """Process-wide sink shared by all Streamlit sessions (None when disabled)"""
+    global _default_sink
+    if not Config.METRICS_SINK_ENABLED:
+        return None
+
+    with _default_sink_lock:
+        if _default_sink is None:
+            _default_sink = MetricsSink()
+            if Config.METRICS_HTTP_PORT:
+                try:
+                    _default_sink.serve_http(Config.METRICS_HTTP_PORT)
+                except OSError as e:
+                    print(f"⚠ Metrics endpoint not started: {str(e)}")
+        return _default_sink
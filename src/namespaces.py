@@ -0,0 +1,236 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+import chromadb # pyright: ignore[reportMissingImports]
+from chromadb.config import Settings # pyright: ignore[reportMissingImports]
+from src.config import Config # pyright: ignore[reportMissingImports]
+from src.embeddings import EmbeddingGenerator
+from src.sharding import ShardedVectorStore
+from src.vector_store import VectorStore
+
+NAMESPACE_PREFIX = "ns-"
+# Names that are already a valid slug map to "ns-<name>" unchanged
+_CANONICAL_NAMESPACE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def collection_name_for(namespace: str) -> str:
+    """
+    Map a tenant namespace to its ChromaDB collection name
+
+    The default namespace keeps the original "documents" collection so
+    existing data stays visible. Lowercase slugs ("team-a") map to
+    "ns-<slug>"; any other name gets a shortened slug plus a hash of the
+    exact name ("ns-team-a__<sha1>"), so distinct namespaces never share a
+    collection. Canonical names contain no "_", so the two forms can't meet.
+
+    Args:
+        namespace: Tenant / team name
+
+    Returns:
+        Valid collection name (3-63 chars, alphanumerics, "-" and "_")
+    """
+    if namespace == Config.DEFAULT_NAMESPACE:
+        return "documents"
+
+    if not namespace.strip():
+        raise ValueError(f"Invalid namespace: {namespace!r}")
+    if _CANONICAL_NAMESPACE.fullmatch(namespace) and len(NAMESPACE_PREFIX + namespace) <= 63:
+        return NAMESPACE_PREFIX + namespace
+
+    slug = re.sub(r"[^a-z0-9]+", "-", namespace.lower())[:40].strip("-")
+    digest = hashlib.sha1(namespace.encode("utf-8")).hexdigest()[:16]
+    return f"{NAMESPACE_PREFIX}{slug}__{digest}"
+
+
+def _release_index(client, collection) -> bool:
+    """
+    Drop a collection's in-memory segments from the Chroma segment manager
+
+    ChromaDB 0.4 keeps every segment it has touched loaded for the life of
+    the client. Removing the instances frees the HNSW index and closing the
+    cached persistent index releases its file handles; the next query
+    reloads it from disk (replaying any unpersisted writes from the log).
+    This relies on LocalSegmentManager internals, so it is best effort.
+    """
+    try:
+        manager = client._server._manager
+        with manager._lock:
+            for segment in manager._segment_cache.get(collection.id, {}).values():
+                instance = manager._instances.pop(segment["id"], None)
+                if instance is not None:
+                    instance.stop()
+            manager._segment_cache.pop(collection.id, None)
+            handle_cache = getattr(manager, "_vector_instances_file_handle_cache", None)
+            if handle_cache is not None:
+                instance = handle_cache.cache.pop(collection.id, None)
+                if instance is not None:
+                    instance.close_persistent_index()
+        return True
+    except (AttributeError, KeyError):
+        return False
+
+
+class NamespaceManager:
+    """
+    Per-tenant vector stores opened lazily under a shared memory budget
+
+    All namespaces share one ChromaDB client and one embedding model. Stores
+    are opened on first use and tracked in LRU order; when the estimated
+    size of the open indexes exceeds the budget, the least recently used
+    ones are evicted from memory (their data stays on disk).
+
+    An evicted store is closed, so callers should not hold on to stores:
+    fetch them with get_store() for each use, or with using() for work that
+    must not have its store evicted underneath it.
+    """
+
+    def __init__(self, memory_budget_mb: float = None, client=None,
+                 embedding_generator: EmbeddingGenerator = None):
+        self.memory_budget = int((memory_budget_mb or Config.NAMESPACE_MEMORY_BUDGET_MB) * 1024 * 1024)
+        self.client = client or chromadb.PersistentClient(
+            path=Config.VECTOR_DB_DIR,
+            settings=Settings(anonymized_telemetry=False)
+        )
+        self.embedding_generator = embedding_generator or EmbeddingGenerator()
+
+        self._stores: "OrderedDict[str, VectorStore]" = OrderedDict()
+        self._estimated_bytes: Dict[str, int] = {}
+        # Namespaces a background job is writing to -> number of such jobs
+        self._pinned: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.evictions = 0
+
+    def _estimate_bytes(self, store: VectorStore) -> int:
+        return store.get_collection_stats()["total_chunks"] * Config.NAMESPACE_BYTES_PER_CHUNK
+
+    def get_store(self, namespace: str) -> VectorStore:
+        """
+        Get the vector store of a namespace, opening it if needed
+
+        Args:
+            namespace: Tenant / team name
+
+        Returns:
+            VectorStore bound to the namespace's collection
+        """
+        with self._lock:
+            if namespace in self._stores:
+                self._stores.move_to_end(namespace)
+                return self._stores[namespace]
+
+            if Config.NUM_SHARDS > 1:
+                store = ShardedVectorStore(
+                    collection_name=collection_name_for(namespace),
+                    embedding_generator=self.embedding_generator
+                )
+            else:
+                store = VectorStore(
+                    collection_name=collection_name_for(namespace),
+                    client=self.client,
+                    embedding_generator=self.embedding_generator
+                )
+                # Hashed collection names can't be mapped back to the namespace
+                metadata = store.collection.metadata or {}
+                if metadata.get("namespace") != namespace:
+                    store.collection.modify(metadata={**metadata, "namespace": namespace})
+            self._stores[namespace] = store
+            self._estimated_bytes[namespace] = self._estimate_bytes(store)
+            self._evict()
+            return store
+
+    @contextmanager
+    def using(self, namespace: str) -> Iterator[VectorStore]:
+        """
+        Pin a namespace for the duration of a block and yield its store
+
+        Args:
+            namespace: Tenant / team name
+
+        Yields:
+            VectorStore that stays open until the block exits
+        """
+        self.pin(namespace)
+        try:
+            yield self.get_store(namespace)
+        finally:
+            self.unpin(namespace)
+
+    def touch(self, namespace: str):
+        """Refresh a namespace's size estimate after writes and re-check the budget"""
+        with self._lock:
+            if namespace in self._stores:
+                self._estimated_bytes[namespace] = self._estimate_bytes(self._stores[namespace])
+                self._stores.move_to_end(namespace)
+                self._evict()
+
+    def pin(self, namespace: str):
+        """Keep a namespace open (e.g. while an ingestion job writes to it)"""
+        with self._lock:
+            self._pinned[namespace] = self._pinned.get(namespace, 0) + 1
+
+    def unpin(self, namespace: str):
+        """Undo one pin() and re-check the budget"""
+        with self._lock:
+            count = self._pinned.get(namespace, 0) - 1
+            if count > 0:
+                self._pinned[namespace] = count
+            else:
+                self._pinned.pop(namespace, None)
+            self._evict()
+
+    def _evict(self):
+        # Keep at least the most recently used namespace open, and pinned ones
+        for namespace in list(self._stores)[:-1]:
+            if sum(self._estimated_bytes.values()) <= self.memory_budget:
+                break
+            if namespace in self._pinned:
+                continue
+            store = self._stores.pop(namespace)
+            self._estimated_bytes.pop(namespace, None)
+            if isinstance(store, ShardedVectorStore):
+                store.close()
+            else:
+                _release_index(self.client, store.collection)
+            self.evictions += 1
+            print(f"✓ Evicted namespace from memory: {namespace}")
+
+    def search(self, namespace: str, query: str, top_k: int = None) -> List[Dict]:
+        """Search only the caller's namespace"""
+        return self.get_store(namespace).search(query, top_k=top_k)
+
+    def list_namespaces(self) -> List[str]:
+        """Namespaces that have a collection on disk"""
+        names = []
+        for collection in self.client.list_collections():
+            if collection.name == "documents":
+                names.append(Config.DEFAULT_NAMESPACE)
+            elif collection.name.startswith(NAMESPACE_PREFIX):
+                names.append((collection.metadata or {}).get("namespace")
+                             or collection.name[len(NAMESPACE_PREFIX):])
+        return sorted(names)
+
+    def get_stats(self) -> Dict:
+        """Open namespaces (least recently used first) and their estimated memory"""
+        with self._lock:
+            return {
+                "open_namespaces": list(self._stores.keys()),
+                "estimated_bytes": dict(self._estimated_bytes),
+                "memory_budget": self.memory_budget,
+                "evictions": self.evictions
+            }
+
+
+_default_manager: Optional[NamespaceManager] = None
+_default_manager_lock = threading.Lock()
+
+
+def get_namespace_manager() -> NamespaceManager:
+    """Process-wide manager shared by all Streamlit sessions"""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = NamespaceManager()
+        return _default_manager
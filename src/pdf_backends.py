@@ -0,0 +1,436 @@
+import multiprocessing
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Type, Union
+from PyPDF2 import PdfReader
+from src.config import Config # pyright: ignore[reportMissingImports]
+from src.pdf_source import PDFSource, as_source
+
+# Optional faster extractors, used when installed
+try:
+    import pypdfium2 as pdfium # pyright: ignore[reportMissingImports]
+except ImportError:
+    pdfium = None
+
+try:
+    from pdfminer.converter import PDFPageAggregator # pyright: ignore[reportMissingImports]
+    from pdfminer.layout import LAParams, LTTextContainer # pyright: ignore[reportMissingImports]
+    from pdfminer.pdfdocument import PDFDocument # pyright: ignore[reportMissingImports]
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager # pyright: ignore[reportMissingImports]
+    from pdfminer.pdfpage import PDFPage # pyright: ignore[reportMissingImports]
+    from pdfminer.pdfparser import PDFParser # pyright: ignore[reportMissingImports]
+except ImportError:
+    PDFDocument = None
+
+# Address-space limits for extraction workers (POSIX only)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class PDFBackend(ABC):
+    """
+    One open PDF read by a particular text extraction library
+
+    Backends are opened per document so the file is parsed once and pages
+    can be extracted in any order. The source is a file on disk or an
+    upload held in memory.
+    """
+
+    name = ""
+
+    def __init__(self, source: PDFSource):
+        self.source = source
+        # Page number (0-based) -> reason, for pages returned as empty text
+        self.skipped_pages: Dict[int, str] = {}
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    @property
+    @abstractmethod
+    def num_pages(self) -> int:
+        """Number of pages in the document"""
+
+    @abstractmethod
+    def extract_page(self, page_num: int) -> str:
+        """Text of one page (0-based)"""
+
+    def close(self):
+        pass
+
+
+class PyPDF2Backend(PDFBackend):
+    """Pure-Python extractor (always available)"""
+
+    name = "pypdf2"
+
+    def __init__(self, source: PDFSource):
+        super().__init__(source)
+        # A memory map instead of a path: PdfReader would read the whole file into memory
+        self._stream = source.open()
+        self.reader = PdfReader(self._stream)
+
+    @property
+    def num_pages(self) -> int:
+        return len(self.reader.pages)
+
+    def extract_page(self, page_num: int) -> str:
+        return self.reader.pages[page_num].extract_text() or ""
+
+    def close(self):
+        self._stream.close()
+
+
+class PdfiumBackend(PDFBackend):
+    """PDFium bindings: much faster on text-heavy documents"""
+
+    name = "pypdfium2"
+
+    def __init__(self, source: PDFSource):
+        super().__init__(source)
+        # PDFium reads files natively and in-memory bytes without a copy
+        self.document = pdfium.PdfDocument(source.path or source.data)
+
+    @classmethod
+    def available(cls) -> bool:
+        return pdfium is not None
+
+    @property
+    def num_pages(self) -> int:
+        return len(self.document)
+
+    def extract_page(self, page_num: int) -> str:
+        page = self.document[page_num]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range() or ""
+        finally:
+            textpage.close()
+            page.close()
+
+    def close(self):
+        self.document.close()
+
+
+class PdfminerBackend(PDFBackend):
+    """pdfminer.six layout analysis: slower, but better on multi-column layouts"""
+
+    name = "pdfminer"
+
+    def __init__(self, source: PDFSource):
+        super().__init__(source)
+        # Parsed once; each page is laid out when it is requested.
+        # pdfminer takes files or io streams (not memory maps)
+        self._stream = open(source.path, "rb") if source.path else source.open()
+        try:
+            self._pages = list(PDFPage.create_pages(PDFDocument(PDFParser(self._stream))))
+        except Exception:
+            self._stream.close()
+            raise
+        self._resources = PDFResourceManager(caching=True)
+        self._laparams = LAParams()
+
+    @classmethod
+    def available(cls) -> bool:
+        return PDFDocument is not None
+
+    @property
+    def num_pages(self) -> int:
+        return len(self._pages)
+
+    def extract_page(self, page_num: int) -> str:
+        device = PDFPageAggregator(self._resources, laparams=self._laparams)
+        PDFPageInterpreter(self._resources, device).process_page(self._pages[page_num])
+        return "".join(
+            element.get_text() for element in device.get_result()
+            if isinstance(element, LTTextContainer)
+        )
+
+    def close(self):
+        self._stream.close()
+
+
+# Registered backends in order of preference
+BACKENDS: Dict[str, Type[PDFBackend]] = {
+    backend.name: backend for backend in (PdfiumBackend, PdfminerBackend, PyPDF2Backend)
+}
+
+
+def available_backends() -> List[str]:
+    """Names of the backends whose libraries are installed"""
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def _extraction_worker(conn, memory_limit_mb: int):
+    """Worker process loop: opens one PDF at a time and extracts pages on request"""
+    if resource is not None and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError) as e:
+            print(f"⚠ Could not cap extraction worker memory: {str(e)}")
+
+    backend = None
+    while True:
+        try:
+            command, *args = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+
+        try:
+            if command == "open":
+                if backend is not None:
+                    backend.close()
+                    backend = None
+                backend = open_backend(args[0], args[1], isolated=False)
+                conn.send(("ok", backend.num_pages))
+            elif command == "page":
+                conn.send(("ok", backend.extract_page(args[0])))
+            elif command == "close":
+                if backend is not None:
+                    backend.close()
+                    backend = None
+                conn.send(("ok", None))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {str(e)}"))
+
+
+class _ExtractionWorker:
+    """Handle to one extraction worker process"""
+
+    def __init__(self):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_extraction_worker,
+            args=(child_conn, Config.PDF_WORKER_MEMORY_MB),
+            name="pdf-extract",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def call(self, timeout: float, *message):
+        """Send a command and wait at most `timeout` seconds for the reply"""
+        self.conn.send(message)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"no reply within {timeout:g}s")
+        status, payload = self.conn.recv()
+        if status == "error":
+            raise RuntimeError(payload)
+        return payload
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+# Idle workers reused across documents (spawning one costs an interpreter start)
+_MAX_IDLE_WORKERS = 4
+_idle_workers: List[_ExtractionWorker] = []
+_idle_workers_lock = threading.Lock()
+
+
+def _acquire_worker() -> _ExtractionWorker:
+    with _idle_workers_lock:
+        while _idle_workers:
+            worker = _idle_workers.pop()
+            if worker.process.is_alive():
+                return worker
+    return _ExtractionWorker()
+
+
+def _release_worker(worker: _ExtractionWorker):
+    with _idle_workers_lock:
+        max_idle = max(_MAX_IDLE_WORKERS, Config.PARALLEL_EXTRACTION_WORKERS)
+        if worker.process.is_alive() and len(_idle_workers) < max_idle:
+            _idle_workers.append(worker)
+            return
+    worker.kill()
+
+
+class IsolatedBackend(PDFBackend):
+    """
+    A backend running in a worker process with a per-page time and memory budget
+
+    Each page must be extracted within Config.PDF_PAGE_TIMEOUT_S seconds in
+    a worker whose address space is capped at Config.PDF_WORKER_MEMORY_MB.
+    A page that hangs, runs out of memory, raises or crashes the worker is
+    returned as empty text and recorded in skipped_pages; the worker is
+    replaced and the document reopened for the remaining pages.
+    """
+
+    def __init__(self, name: str, source: PDFSource):
+        super().__init__(source)
+        self.name = name
+        self._worker: Optional[_ExtractionWorker] = None
+        self._num_pages = self._open()
+
+    def _open(self) -> int:
+        self._worker = _acquire_worker()
+        try:
+            # Sources on disk are sent by path, in-memory ones as bytes
+            return self._worker.call(Config.PDF_PAGE_TIMEOUT_S, "open", self.name, self.source)
+        except Exception:
+            self._discard_worker()
+            raise
+
+    def _discard_worker(self):
+        if self._worker is not None:
+            self._worker.kill()
+            self._worker = None
+
+    @property
+    def num_pages(self) -> int:
+        return self._num_pages
+
+    def extract_page(self, page_num: int) -> str:
+        if self._worker is None:
+            # The previous page took the worker down; a document that cannot
+            # be reopened fails as a whole
+            self._open()
+        try:
+            return self._worker.call(Config.PDF_PAGE_TIMEOUT_S, "page", page_num)
+        except (TimeoutError, RuntimeError, EOFError, OSError) as e:
+            self._discard_worker()
+            reason = str(e) if isinstance(e, (TimeoutError, RuntimeError)) else "worker crashed"
+            self.skipped_pages[page_num] = reason
+            print(f"⚠ Skipped page {page_num + 1} of {self.source} ({self.name}: {reason})")
+            return ""
+
+    def close(self):
+        if self._worker is None:
+            return
+        worker, self._worker = self._worker, None
+        try:
+            worker.call(Config.PDF_PAGE_TIMEOUT_S, "close")
+        except Exception:
+            worker.kill()
+            return
+        _release_worker(worker)
+
+
+def open_backend(name: str, pdf: Union[str, PDFSource], isolated: bool = None) -> PDFBackend:
+    """
+    Open a PDF with a backend by name
+
+    Args:
+        name: Backend name (see BACKENDS)
+        pdf: PDF file path or PDFSource
+        isolated: Extract in a worker process with per-page budgets
+            (Config.PDF_ISOLATE_EXTRACTION by default)
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {name}")
+    if not BACKENDS[name].available():
+        raise ValueError(f"PDF backend {name} is not installed")
+    if isolated is None:
+        isolated = Config.PDF_ISOLATE_EXTRACTION
+    if isolated:
+        return IsolatedBackend(name, as_source(pdf))
+    return BACKENDS[name](as_source(pdf))
+
+
+def extract_page_ranges(name: str, pdf: Union[str, PDFSource], page_nums: List[int],
+                        workers: int = None) -> Tuple[Dict[int, str], Dict[int, str]]:
+    """
+    Extract pages concurrently, one contiguous range per worker process
+
+    Every worker opens the file itself, so large documents parse in
+    parallel instead of page by page. Per-page budgets apply as in
+    IsolatedBackend.
+
+    Args:
+        name: Backend name
+        pdf: PDF file path or PDFSource
+        page_nums: Pages (0-based, ascending) to extract
+        workers: Worker processes (Config.PARALLEL_EXTRACTION_WORKERS by default)
+
+    Returns:
+        Page number -> text, and page number -> reason for skipped pages
+    """
+    workers = max(1, min(workers or Config.PARALLEL_EXTRACTION_WORKERS, len(page_nums)))
+    size = -(-len(page_nums) // workers)
+    ranges = [page_nums[start:start + size] for start in range(0, len(page_nums), size)]
+    source = as_source(pdf)
+
+    def extract_range(range_pages: List[int]) -> Tuple[Dict[int, str], Dict[int, str]]:
+        backend = IsolatedBackend(name, source)
+        try:
+            return {page_num: backend.extract_page(page_num) for page_num in range_pages}, backend.skipped_pages
+        finally:
+            backend.close()
+
+    # Threads only wait on the worker pipes; the parsing happens in the workers
+    pages: Dict[int, str] = {}
+    skipped: Dict[int, str] = {}
+    with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="pdf-range") as executor:
+        for range_pages, range_skipped in executor.map(extract_range, ranges):
+            pages.update(range_pages)
+            skipped.update(range_skipped)
+    return pages, skipped
+
+
+def _probe_pages(num_pages: int, count: int) -> List[int]:
+    # First page plus evenly spaced ones (title pages alone are not representative)
+    if num_pages <= count:
+        return list(range(num_pages))
+    step = num_pages / count
+    return sorted({int(i * step) for i in range(count)})
+
+
+def select_backend(pdf: Union[str, PDFSource], candidates: List[str] = None) -> Tuple[PDFBackend, Dict[int, str]]:
+    """
+    Pick the extractor for one document with a quick probe
+
+    Each candidate extracts a few sample pages. Backends that fail or
+    recover noticeably less text than the best one are dropped, and the
+    fastest of the rest wins. Only page extraction is timed: opening may
+    include starting a worker process, which says nothing about the
+    backend's speed.
+
+    Args:
+        pdf: PDF file path or PDFSource
+        candidates: Backend names to consider (Config.PDF_BACKEND or every
+            installed backend by default)
+
+    Returns:
+        The winning backend, still open, and the pages it already extracted
+    """
+    if candidates is None:
+        candidates = available_backends() if Config.PDF_BACKEND == "auto" else [Config.PDF_BACKEND]
+    source = as_source(pdf)
+    if len(candidates) == 1:
+        return open_backend(candidates[0], source), {}
+
+    probes = []
+    for name in candidates:
+        backend = None
+        try:
+            backend = open_backend(name, source)
+            probe_pages = _probe_pages(backend.num_pages, Config.PDF_PROBE_PAGES)
+            start = time.perf_counter()
+            pages = {page_num: backend.extract_page(page_num) for page_num in probe_pages}
+            elapsed = time.perf_counter() - start
+            probes.append((backend, pages, elapsed, sum(len(text.strip()) for text in pages.values())))
+        except Exception as e:
+            print(f"⚠ PDF backend {name} failed on {source}: {str(e)}")
+            if backend is not None:
+                backend.close()
+
+    if not probes:
+        raise RuntimeError(f"No PDF backend could read {source}")
+
+    best_chars = max(chars for _, _, _, chars in probes)
+    eligible = [p for p in probes if p[3] >= best_chars * Config.PDF_PROBE_MIN_TEXT_RATIO]
+    winner = min(eligible, key=lambda p: p[2])
+    for backend, _, _, _ in probes:
+        if backend is not winner[0]:
+            backend.close()
+    return winner[0], winner[1]
@@ -0,0 +1,180 @@
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, List, Optional, Union
+from src.config import Config # pyright: ignore[reportMissingImports]
+
+# Background writer for originals kept in Config.UPLOAD_DIR
+_persist_executor: Optional[ThreadPoolExecutor] = None
+_persist_lock = threading.Lock()
+
+
+def _get_persist_executor() -> ThreadPoolExecutor:
+    global _persist_executor
+    with _persist_lock:
+        if _persist_executor is None:
+            _persist_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persist-upload")
+        return _persist_executor
+
+
+class PDFSource:
+    """
+    A PDF to extract: a file on disk or an upload held in memory
+
+    Uploads up to Config.UPLOAD_SPILL_MB stay in memory; larger ones are
+    written once to a temporary file that extractors read through a memory
+    map or by path, so a big upload is never held twice in RAM.
+
+    Attributes:
+        name: Display name (the uploaded filename)
+        path: Readable file on disk (the original or the spill file), or None
+        data: The PDF bytes when held in memory, or None
+        file_path: Durable location of the original ("" until persisted)
+    """
+
+    def __init__(self, pdf: Union[str, bytes, bytearray, memoryview, BinaryIO], name: str = None,
+                 spill_mb: int = None):
+        self.path: Optional[str] = None
+        self.data: Optional[bytes] = None
+        self.file_path = ""
+        self._owns_file = False
+        self._pending: List[Future] = []
+
+        if isinstance(pdf, str):
+            self.path = pdf
+            self.file_path = pdf
+            self.name = name or os.path.basename(pdf)
+            self.size = os.path.getsize(pdf)
+            return
+
+        self.name = name or getattr(pdf, "name", "") or "document.pdf"
+        exported = hasattr(pdf, "getbuffer")
+        if exported:
+            # BytesIO (and Streamlit's UploadedFile): view the buffer without copying
+            view = pdf.getbuffer()
+        elif isinstance(pdf, (bytes, bytearray, memoryview)):
+            view = memoryview(pdf)
+        else:
+            view = memoryview(pdf.read())
+
+        try:
+            self.size = view.nbytes
+            spill_bytes = (spill_mb if spill_mb is not None else Config.UPLOAD_SPILL_MB) * 1024 * 1024
+            if self.size > spill_bytes:
+                fd, self.path = tempfile.mkstemp(prefix="documind-upload-", suffix=".pdf")
+                self._owns_file = True
+                with os.fdopen(fd, "wb") as f:
+                    f.write(view)
+            else:
+                self.data = pdf if isinstance(pdf, bytes) else view.tobytes()
+        finally:
+            if exported:
+                view.release()
+
+    def __str__(self) -> str:
+        return self.file_path or self.name
+
+    def __getstate__(self):
+        # Sent to extraction workers: by path when on disk, otherwise the bytes.
+        # The receiving copy never deletes the spill file.
+        return {"name": self.name, "path": self.path, "data": self.data,
+                "file_path": self.file_path, "size": self.size}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._owns_file = False
+        self._pending = []
+
+    def open(self) -> BinaryIO:
+        """A new binary stream over the PDF (memory-mapped when on disk)"""
+        if self.data is not None:
+            return io.BytesIO(self.data)
+        with open(self.path, "rb") as f:
+            if self.size == 0:
+                return io.BytesIO(b"")
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def content_hash(self) -> str:
+        """SHA-256 hex digest of the PDF bytes"""
+        if self.data is not None:
+            return hashlib.sha256(self.data).hexdigest()
+        digest = hashlib.sha256()
+        with open(self.path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def persist(self, directory: str = None, doc_id: str = None) -> Future:
+        """
+        Keep a copy of the original, written in the background
+
+        Copies are stored as <directory>/<doc_id>/<filename>, so uploads
+        that share a filename but not their content never overwrite each
+        other.
+
+        Args:
+            directory: Destination directory (Config.UPLOAD_DIR by default)
+            doc_id: Document id (content hash) if already computed
+
+        Returns:
+            Future resolving to the saved path (also set as file_path right away)
+        """
+        if self.path is not None and not self._owns_file:
+            done: Future = Future()
+            done.set_result(self.path)
+            return done
+
+        directory = directory or Config.UPLOAD_DIR
+        doc_id = doc_id or self.content_hash()[:16]
+        destination = os.path.join(directory, doc_id, os.path.basename(self.name))
+        self.file_path = destination
+        future = _get_persist_executor().submit(self._write_copy, destination)
+        self._pending.append(future)
+        return future
+
+    def _write_copy(self, destination: str) -> str:
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        tmp_path = f"{destination}.{os.getpid()}.tmp"
+        try:
+            if self.data is not None:
+                with open(tmp_path, "wb") as f:
+                    f.write(self.data)
+            else:
+                shutil.copyfile(self.path, tmp_path)
+            os.replace(tmp_path, destination)
+        except Exception as e:
+            print(f"⚠ Could not save {self.name} to {destination}: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return destination
+
+    def close(self):
+        """Drop the in-memory copy or spill file (after pending persists finish)"""
+        pending, self._pending = [future for future in self._pending if not future.done()], []
+        if pending:
+            # The single writer thread runs jobs in order, so this runs after the copies
+            _get_persist_executor().submit(self._release)
+            return
+        self._release()
+
+    def _release(self):
+        self.data = None
+        if self._owns_file and self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self._owns_file = False
+
+
+def as_source(pdf, name: str = None) -> PDFSource:
+    """Wrap a path, bytes or binary buffer as a PDFSource (sources pass through)"""
+    if isinstance(pdf, PDFSource):
+        return pdf
+    return PDFSource(pdf, name=name)
@@ -0,0 +1,276 @@
+import contextvars
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Mapping
+from src.config import Config # pyright: ignore[reportMissingImports]
+
+# Config settings a profile may change, with their types. Paths, models and
+# the shard count are left out: changing them would orphan existing data.
+TUNABLES: Dict[str, type] = {
+    "CHUNK_SIZE": int,
+    "CHUNK_OVERLAP": int,
+    "TOP_K_RESULTS": int,
+    "ADAPTIVE_TOP_K": bool,
+    "ADAPTIVE_MIN_K": int,
+    "ADAPTIVE_MAX_K": int,
+    "ADAPTIVE_MAX_DISTANCE": float,
+    "ADAPTIVE_ELBOW_GAP": float,
+    "MAX_TOKENS": int,
+    "LLM_TEMPERATURE": float,
+    "INDEX_BACKEND": str,
+    "REDUCED_DIMS": int,
+    "REDUCED_CANDIDATES": int,
+    "PQ_RERANK": bool,
+    "PQ_RERANK_CANDIDATES": int,
+    "DOC_ROUTING": bool,
+    "DOC_ROUTING_TOP_DOCS": int,
+    "DEDUP_ENABLED": bool,
+    "DEDUP_THRESHOLD": float,
+    "PDF_BACKEND": str,
+    "PDF_PAGE_TIMEOUT_S": float,
+    "PARALLEL_EXTRACTION_MIN_PAGES": int,
+    "PARALLEL_EXTRACTION_WORKERS": int,
+    "PAGE_CACHE_MAX_MB": int,
+    "UPLOAD_SPILL_MB": int,
+    "INGEST_QUEUE_SIZE": int,
+    "EMBED_BATCH_SIZE": int,
+    "WRITE_BATCH_SIZE": int,
+    "NAMESPACE_MEMORY_BUDGET_MB": int,
+}
+
+# Settings that may also be overridden for a single query
+RETRIEVAL_KNOBS = (
+    "TOP_K_RESULTS", "ADAPTIVE_TOP_K", "ADAPTIVE_MIN_K", "ADAPTIVE_MAX_K", "ADAPTIVE_MAX_DISTANCE",
+    "ADAPTIVE_ELBOW_GAP", "REDUCED_CANDIDATES", "PQ_RERANK", "PQ_RERANK_CANDIDATES",
+    "DOC_ROUTING", "DOC_ROUTING_TOP_DOCS"
+)
+
+_CHOICES = {
+    "INDEX_BACKEND": ("chroma", "two_stage", "pq"),
+    "PDF_BACKEND": ("auto", "pypdfium2", "pdfminer", "pypdf2"),
+}
+
+# Built-in profiles; "default" keeps the values written in Config
+BUILTIN_PROFILES: Dict[str, Dict] = {
+    "default": {},
+    "low-latency": {
+        "TOP_K_RESULTS": 2,
+        "ADAPTIVE_MAX_K": 3,
+        "MAX_TOKENS": 300,
+        "INDEX_BACKEND": "two_stage",
+        "REDUCED_CANDIDATES": 100,
+    },
+    "high-recall": {
+        "CHUNK_SIZE": 500,
+        "CHUNK_OVERLAP": 150,
+        "TOP_K_RESULTS": 8,
+        "ADAPTIVE_MAX_K": 12,
+        "ADAPTIVE_MAX_DISTANCE": 1.6,
+        "REDUCED_CANDIDATES": 1000,
+        "PQ_RERANK": True,
+        "PQ_RERANK_CANDIDATES": 500,
+    },
+    "bulk-ingest": {
+        "INGEST_QUEUE_SIZE": 8,
+        "EMBED_BATCH_SIZE": 256,
+        "WRITE_BATCH_SIZE": 2048,
+        "PARALLEL_EXTRACTION_MIN_PAGES": 100,
+        "PAGE_CACHE_MAX_MB": 2048,
+    },
+}
+
+# Config values before any profile was applied, so profiles can be switched back
+_BASELINE = {name: getattr(Config, name) for name in TUNABLES}
+
+_active_profile = "default"
+_profiles: Dict[str, Dict] = dict(BUILTIN_PROFILES)
+_applied = False
+_lock = threading.Lock()
+
+_query_overrides: contextvars.ContextVar = contextvars.ContextVar("query_overrides", default={})
+
+
+def validate_settings(settings: Dict, label: str = "settings", base: Mapping = None) -> List[str]:
+    """
+    Check profile settings against TUNABLES
+
+    Args:
+        settings: Setting name -> value (a profile or per-query overrides)
+        label: Name used in error messages
+        base: Values the settings are applied over, used for the checks
+            that relate two settings (Config before any profile by default)
+
+    Returns:
+        Problems found (empty if the settings are valid)
+    """
+    errors = []
+    for name, value in settings.items():
+        if name not in TUNABLES:
+            errors.append(f"{label}: unknown setting {name}")
+            continue
+
+        expected = TUNABLES[name]
+        if expected is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        if type(value) is not expected:
+            errors.append(f"{label}: {name} must be {expected.__name__}, got {value!r}")
+            continue
+
+        if name in _CHOICES and value not in _CHOICES[name]:
+            errors.append(f"{label}: {name} must be one of {', '.join(_CHOICES[name])}")
+        elif expected is int and value < (0 if name == "CHUNK_OVERLAP" else 1):
+            errors.append(f"{label}: {name} must be positive, got {value}")
+        elif name == "DEDUP_THRESHOLD" and not 0 < value <= 1:
+            errors.append(f"{label}: DEDUP_THRESHOLD must be in (0, 1], got {value}")
+        elif expected is float and value < 0:
+            errors.append(f"{label}: {name} must not be negative, got {value}")
+
+    base = _BASELINE if base is None else base
+    chunk_size = settings.get("CHUNK_SIZE", base["CHUNK_SIZE"])
+    chunk_overlap = settings.get("CHUNK_OVERLAP", base["CHUNK_OVERLAP"])
+    if isinstance(chunk_size, int) and isinstance(chunk_overlap, int) and chunk_overlap >= chunk_size:
+        errors.append(f"{label}: CHUNK_OVERLAP ({chunk_overlap}) must be smaller than CHUNK_SIZE ({chunk_size})")
+    
+    min_k = settings.get("ADAPTIVE_MIN_K", base["ADAPTIVE_MIN_K"])
+    max_k = settings.get("ADAPTIVE_MAX_K", base["ADAPTIVE_MAX_K"])
+    if isinstance(min_k, int) and isinstance(max_k, int) and min_k > max_k:
+        errors.append(f"{label}: ADAPTIVE_MIN_K ({min_k}) must not exceed ADAPTIVE_MAX_K ({max_k})")
+    return errors
+
+
+def _resolve(name: str, profiles: Dict[str, Dict], seen: tuple = ()) -> Dict:
+    # Flatten "extends" chains (custom profiles may build on built-in ones)
+    if name not in profiles:
+        raise ValueError(f"Unknown performance profile: {name}")
+    if name in seen:
+        raise ValueError(f"Performance profile {name} extends itself")
+    profile = dict(profiles[name])
+    parent = profile.pop("extends", None)
+    if parent is None:
+        return profile
+    return {**_resolve(parent, profiles, seen + (name,)), **profile}
+
+
+def load_profiles(path: str = None) -> Dict[str, Dict]:
+    """
+    Built-in profiles plus those defined in a JSON file, validated
+
+    The file maps profile names to settings, e.g.
+    {"support-desk": {"extends": "low-latency", "TOP_K_RESULTS": 4}}.
+
+    Args:
+        path: JSON file (Config.PERFORMANCE_PROFILES_FILE by default; a
+            missing default file is not an error)
+
+    Returns:
+        Profile name -> fully resolved settings
+    """
+    profiles = dict(BUILTIN_PROFILES)
+    file_path = path or Config.PERFORMANCE_PROFILES_FILE
+    if file_path and (path or os.path.exists(file_path)):
+        with open(file_path, "r", encoding="utf-8") as f:
+            custom = json.load(f)
+        if not isinstance(custom, dict) or not all(isinstance(v, dict) for v in custom.values()):
+            raise ValueError(f"{file_path} must map profile names to settings objects")
+        profiles.update(custom)
+
+    resolved = {}
+    errors = []
+    for name in profiles:
+        try:
+            resolved[name] = _resolve(name, profiles)
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        errors.extend(validate_settings(resolved[name], label=f"profile {name}"))
+    if errors:
+        raise ValueError("Invalid performance profiles:\n" + "\n".join(errors))
+    return resolved
+
+
+def apply_profile(name: str = None, path: str = None) -> str:
+    """
+    Set Config to a named profile (validated first)
+
+    Config is process-wide, so this switches the profile for every session.
+    Stores, caches and worker pools read most settings when they are
+    created, so a profile switched at runtime applies to those opened
+    afterwards; retrieval and chunking settings apply immediately.
+
+    Args:
+        name: Profile name (Config.PERFORMANCE_PROFILE by default)
+        path: Optional JSON file with custom profiles
+
+    Returns:
+        The active profile name
+    """
+    global _active_profile, _profiles, _applied
+    name = name or Config.PERFORMANCE_PROFILE
+    profiles = load_profiles(path)
+    if name not in profiles:
+        raise ValueError(f"Unknown performance profile: {name} (available: {', '.join(profiles)})")
+
+    with _lock:
+        for setting_name, value in {**_BASELINE, **profiles[name]}.items():
+            setattr(Config, setting_name, value)
+        _profiles = profiles
+        _active_profile = name
+        _applied = True
+    print(f"✓ Performance profile: {name}")
+    return name
+
+
+def ensure_profile() -> str:
+    """Apply the configured profile once per process (later calls keep runtime switches)"""
+    if not _applied:
+        apply_profile()
+    return _active_profile
+
+
+def active_profile() -> str:
+    """Name of the profile Config currently follows"""
+    return _active_profile
+
+
+def available_profiles() -> Dict[str, Dict]:
+    """Profiles loaded by the last apply_profile()"""
+    return dict(_profiles)
+
+
+@contextmanager
+def query_overrides(**settings):
+    """
+    Override retrieval settings for the queries run inside this block
+
+    Overrides live in a context variable, so concurrent sessions do not
+    see each other's values. They are validated against the settings in
+    effect (the active profile and any enclosing overrides).
+    Example: with query_overrides(TOP_K_RESULTS=8): ...
+    """
+    settings = {name: value for name, value in settings.items() if value is not None}
+    not_retrieval = [name for name in settings if name not in RETRIEVAL_KNOBS]
+    errors = [f"per-query overrides: {name} is not a retrieval setting" for name in not_retrieval]
+    if not not_retrieval:
+        current = {name: setting(name) for name in TUNABLES}
+        errors.extend(validate_settings(settings, label="per-query overrides", base=current))
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    token = _query_overrides.set({**_query_overrides.get(), **settings})
+    try:
+        yield
+    finally:
+        _query_overrides.reset(token)
+
+
+def current_overrides() -> Dict:
+    """Per-query overrides active in this context"""
+    return dict(_query_overrides.get())
+
+
+def setting(name: str):
+    """A Config value, honouring any per-query override"""
+    overrides = _query_overrides.get()
+    return overrides[name] if name in overrides else getattr(Config, name)
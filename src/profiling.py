@@ -0,0 +1,185 @@
+import cProfile
+import io
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from src.config import Config # pyright: ignore[reportMissingImports]
+
+
+class ProfileCapture:
+    """cProfile and tracemalloc results for one query or ingestion run"""
+
+    def __init__(self):
+        self.top_functions: List[Dict] = []
+        self.top_allocations: List[Dict] = []
+        self.peak_memory_kb = 0.0
+        self.stats_text = ""
+        # Profilers of worker threads that ran inside the capture (see profile_thread)
+        self._thread_profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def to_dict(self) -> Dict:
+        """Serializable form stored alongside the metrics record"""
+        return {
+            "top_functions": self.top_functions,
+            "top_allocations": self.top_allocations,
+            "peak_memory_kb": self.peak_memory_kb,
+            "stats_text": self.stats_text
+        }
+
+
+# Capture in progress, seen by worker threads started with a copy of the context
+_active_capture: ContextVar[Optional[ProfileCapture]] = ContextVar("active_capture", default=None)
+
+
+def _top_functions(profilers: List[cProfile.Profile], limit: int) -> Tuple[List[Dict], str]:
+    stream = io.StringIO()
+    stats = pstats.Stats(profilers[0], stream=stream)
+    for profiler in profilers[1:]:
+        stats.add(profiler)
+    stats.sort_stats("cumulative")
+    stats.print_stats(limit)
+
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        primitive_calls, total_calls, tottime, cumtime, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            "function": f"{name} ({filename}:{line})",
+            "calls": total_calls,
+            "tottime_s": round(tottime, 6),
+            "cumtime_s": round(cumtime, 6)
+        })
+    return rows, stream.getvalue()
+
+
+# tracemalloc is process-wide: captures that overlap (concurrent sessions,
+# a query during an ingestion job) share one tracing session, and the last
+# one out stops it - unless something else had started tracing first
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_started_tracing = False
+
+
+def _acquire_tracing():
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(Config.PROFILE_TRACEBACK_DEPTH)
+            _started_tracing = True
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+
+def _top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int) -> List[Dict]:
+    # Sites that grew the most while the block ran
+    rows = []
+    for stat in after.compare_to(before, "lineno")[:limit]:
+        frame = stat.traceback[0]
+        rows.append({
+            "location": f"{frame.filename}:{frame.lineno}",
+            "size_kb": round(stat.size_diff / 1024, 1),
+            "count": stat.count_diff
+        })
+    return rows
+
+
+@contextmanager
+def profile_capture(enabled: bool, limit: int = None):
+    """
+    Profile the enclosed block with cProfile and tracemalloc when enabled
+
+    Nothing is started when disabled, so the block runs at full speed and
+    the yielded capture is None.
+
+    cProfile only sees the calling thread. Worker threads that run
+    profile_thread() with a copy of the caller's context (the ingestion
+    pipeline's stages) are profiled too and merged into the result; work
+    in other threads (a search thread pool) shows up as time spent waiting
+    on it. Allocations are traced process-wide, so they and the peak
+    include whatever ran concurrently.
+
+    Args:
+        enabled: Whether to profile this run
+        limit: Number of functions and allocation sites to keep
+
+    Yields:
+        ProfileCapture filled in when the block exits, or None
+    """
+    if not enabled:
+        yield None
+        return
+
+    limit = limit or Config.PROFILE_TOP_N
+    capture = ProfileCapture()
+
+    _acquire_tracing()
+    try:
+        tracemalloc.reset_peak()
+        before = _snapshot()
+
+        profiler = cProfile.Profile()
+        token = _active_capture.set(capture)
+        profiler.enable()
+        try:
+            yield capture
+        finally:
+            profiler.disable()
+            _active_capture.reset(token)
+            after = _snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+
+            with capture._lock:
+                profilers = [profiler, *capture._thread_profilers]
+            capture.top_functions, capture.stats_text = _top_functions(profilers, limit)
+            capture.top_allocations = _top_allocations(before, after, limit)
+            capture.peak_memory_kb = round(peak / 1024, 1)
+    finally:
+        _release_tracing()
+
+
+@contextmanager
+def profile_thread():
+    """
+    Profile a worker thread into the active capture (no-op when none is active)
+
+    The thread must run with a copy of the capturing thread's context, and
+    finish before the capture exits for its calls to be counted.
+    """
+    capture = _active_capture.get()
+    if capture is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Only one profiler may be active where cProfile hooks every thread
+        # at once, and then the capture's own profiler already sees this one
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        with capture._lock:
+            capture._thread_profilers.append(profiler)
@@ -0,0 +1,372 @@
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import zlib
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Tuple
+import numpy as np # pyright: ignore[reportMissingImports]
+from src.config import Config # pyright: ignore[reportMissingImports]
+from src.embeddings import EmbeddingGenerator, as_vectors
+from src.performance_profiles import apply_profile, active_profile, setting
+from src.vector_store import VectorStore, adaptive_cut, rerank_depth, routing_depth
+
+# VectorStore methods a shard worker will run on request
+_SHARD_METHODS = {
+    "add_embeddings",
+    "search_by_embedding",
+    "delete_document",
+    "list_documents",
+    "get_chunk_text",
+    "get_collection_stats",
+    "clear_collection",
+    "persist_indexes",
+}
+
+
+def shard_for(chunk_id: str, num_shards: int) -> int:
+    """Stable shard number of a chunk id (the same in every process)"""
+    return zlib.crc32(chunk_id.encode("utf-8")) % num_shards
+
+
+class PrecomputedEmbeddings:
+    """Stands in for the embedding model inside shard workers, which only receive vectors"""
+
+    def generate_embedding(self, text: str) -> np.ndarray:
+        raise RuntimeError("Shard workers do not embed text; send query embeddings instead")
+
+    def generate_embeddings_batch(self, texts: List[str], show_progress_bar: bool = True) -> np.ndarray:
+        raise RuntimeError("Shard workers do not embed text; send embeddings instead")
+
+
+def _shard_worker(conn, shard_dir: str, collection_name: str, index_backend: str, profile: str):
+    """
+    Serve one shard: a VectorStore over its own ChromaDB directory
+
+    Requests are (method, args, kwargs) tuples; replies are ("ok", result)
+    or ("error", message). A None request stops the worker.
+    """
+    try:
+        apply_profile(profile)
+        Config.VECTOR_DB_DIR = shard_dir
+        # Shards only receive embedded chunks, so they never look up duplicates
+        Config.DEDUP_ENABLED = False
+        os.makedirs(shard_dir, exist_ok=True)
+        store = VectorStore(
+            collection_name=collection_name,
+            embedding_generator=PrecomputedEmbeddings(),
+            index_backend=index_backend
+        )
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+    conn.send(("ok", store.max_batch_size))
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            store.persist_indexes()
+            break
+
+        method, args, kwargs = request
+        try:
+            if method not in _SHARD_METHODS:
+                raise ValueError(f"Unsupported shard method: {method}")
+            conn.send(("ok", getattr(store, method)(*args, **kwargs)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class ShardedVectorStore:
+    """
+    Vector store hash-partitioned across local worker processes
+
+    Each worker owns one shard: a separate ChromaDB directory and its own
+    VectorStore (including any sidecar index). Chunks are routed by a hash
+    of their id. The parent process embeds queries once, sends the vector to
+    every shard in parallel and merges the per-shard top-k by distance.
+    Exposes the same methods as VectorStore that the app and ingestion
+    pipeline use, except near-duplicate suppression: there is no index
+    spanning the shards, so DEDUP_ENABLED is ignored.
+    """
+
+    def __init__(self, collection_name: str = "documents", num_shards: int = None,
+                 embedding_generator: EmbeddingGenerator = None, index_backend: str = None):
+        self.collection_name = collection_name
+        self.num_shards = num_shards or Config.NUM_SHARDS
+        self.index_backend = index_backend or Config.INDEX_BACKEND
+
+        self.root_dir = os.path.abspath(os.path.join(Config.VECTOR_DB_DIR, "shards", collection_name))
+        self._check_layout()
+
+        self.embedding_generator = embedding_generator or EmbeddingGenerator()
+
+        # Spawned workers start clean instead of inheriting the parent's threads and model
+        context = multiprocessing.get_context("spawn")
+        self._connections = []
+        self._processes = []
+        for shard in range(self.num_shards):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_shard_worker,
+                args=(child_conn, os.path.join(self.root_dir, f"shard-{shard}"),
+                      collection_name, self.index_backend, active_profile()),
+                name=f"shard-{collection_name}-{shard}",
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+        # One lock per pipe; always taken in shard order so fan-outs cannot deadlock
+        self._locks = [threading.Lock() for _ in range(self.num_shards)]
+
+        self.max_batch_size = min(self._gather(range(self.num_shards)).values())
+
+        if Config.DEDUP_ENABLED:
+            print("⚠ Near-duplicate suppression is not supported with NUM_SHARDS > 1; "
+                  "DEDUP_ENABLED is ignored and every chunk is embedded")
+        print(f"✓ Sharded vector store initialized. Collection: {collection_name} ({self.num_shards} shards)")
+
+    def _check_layout(self):
+        # Hash routing only holds for the shard count the data was written with
+        os.makedirs(self.root_dir, exist_ok=True)
+        layout_path = os.path.join(self.root_dir, "layout.json")
+        if os.path.exists(layout_path):
+            with open(layout_path, "r", encoding="utf-8") as f:
+                existing = json.load(f)["num_shards"]
+            if existing != self.num_shards:
+                raise ValueError(
+                    f"Collection {self.collection_name} was created with {existing} shards, not {self.num_shards}"
+                )
+        else:
+            with open(layout_path, "w", encoding="utf-8") as f:
+                json.dump({"num_shards": self.num_shards}, f)
+
+    def _gather(self, shards) -> Dict[int, object]:
+        """
+        Read one reply from each listed shard (callers hold the pipe locks)
+
+        Every reply is read before anything is raised, so a failing shard
+        cannot leave the others' replies queued for the next request.
+        """
+        replies, errors = {}, []
+        for shard in shards:
+            try:
+                status, payload = self._connections[shard].recv()
+            except (EOFError, OSError):
+                errors.append(f"Shard {shard} stopped responding")
+                continue
+            if status == "ok":
+                replies[shard] = payload
+            else:
+                errors.append(f"Shard {shard} failed: {payload}")
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return replies
+
+    def _scatter(self, calls: Dict[int, Tuple[str, tuple, dict]]) -> Dict[int, object]:
+        """Send one request to each listed shard, then collect all replies"""
+        shards = sorted(calls)
+        with ExitStack() as stack:
+            for shard in shards:
+                stack.enter_context(self._locks[shard])
+            for shard in shards:
+                self._connections[shard].send(calls[shard])
+            return self._gather(shards)
+
+    def _broadcast(self, method: str, *args, **kwargs) -> Dict[int, object]:
+        return self._scatter({shard: (method, args, kwargs) for shard in range(self.num_shards)})
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add_documents(self, chunks: List[Dict]) -> Dict:
+        """Embed chunks in the parent and write them to their shards"""
+        try:
+            texts = [chunk["content"] for chunk in chunks]
+            print(f"Generating embeddings for {len(texts)} chunks...")
+            embeddings = self.embedding_generator.generate_embeddings_batch(texts)
+            self.add_embeddings(texts, embeddings, [chunk["metadata"] for chunk in chunks])
+            self.persist_indexes()
+            print(f"✓ Added {len(chunks)} chunks to {self.num_shards} shards")
+
+            return {
+                "success": True,
+                "num_chunks_added": len(chunks),
+                "collection_size": self.get_collection_stats()["total_chunks"]
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def add_embeddings(self, texts: List[str], embeddings: np.ndarray, metadatas: List[Dict],
+                       ids: List[str] = None) -> List[str]:
+        """Partition already-embedded chunks by id hash and write all shards in parallel"""
+        if ids is None:
+            ids = [VectorStore.chunk_id_for(metadata) for metadata in metadatas]
+        # float32 arrays pickle as one buffer per shard, not lists of boxed floats
+        embeddings = as_vectors(embeddings)
+
+        rows: Dict[int, List[int]] = {}
+        for row, chunk_id in enumerate(ids):
+            rows.setdefault(shard_for(chunk_id, self.num_shards), []).append(row)
+
+        self._scatter({
+            shard: ("add_embeddings", (
+                [texts[i] for i in shard_rows],
+                embeddings[shard_rows],
+                [metadatas[i] for i in shard_rows],
+            ), {"ids": [ids[i] for i in shard_rows]})
+            for shard, shard_rows in rows.items()
+        })
+        return ids
+
+    def persist_indexes(self):
+        self._broadcast("persist_indexes")
+
+    def delete_document(self, doc_id: str) -> Dict:
+        """Remove a document's chunks from every shard holding some of them"""
+        entry = self.list_documents().get(doc_id)
+        if entry is None:
+            return {
+                "success": False,
+                "error": f"Unknown document: {doc_id}"
+            }
+
+        ids_by_shard: Dict[int, List[str]] = {}
+        for chunk_id in VectorStore.chunk_ids_for(doc_id, entry["num_chunks"]):
+            ids_by_shard.setdefault(shard_for(chunk_id, self.num_shards), []).append(chunk_id)
+
+        results = self._scatter({
+            shard: ("delete_document", (doc_id,), {"ids": ids})
+            for shard, ids in ids_by_shard.items()
+        })
+        failed = [r["error"] for r in results.values() if not r["success"]]
+        if failed:
+            return {
+                "success": False,
+                "error": "; ".join(failed)
+            }
+
+        print(f"✓ Deleted document {doc_id} from {len(results)} shards")
+        return {
+            "success": True,
+            "num_chunks_deleted": sum(r["num_chunks_deleted"] for r in results.values()),
+            "collection_size": self.get_collection_stats()["total_chunks"]
+        }
+
+    def replace_document(self, doc_id: str, chunks: List[Dict]) -> Dict:
+        """Add the new version, then remove the old one (same order as VectorStore)"""
+        result = self.add_documents(chunks)
+        if not result["success"]:
+            return result
+
+        new_doc_ids = {chunk["metadata"].get("doc_id") for chunk in chunks}
+        if doc_id not in new_doc_ids and self.has_document(doc_id):
+            deleted = self.delete_document(doc_id)
+            if not deleted["success"]:
+                return deleted
+            result["num_chunks_deleted"] = deleted["num_chunks_deleted"]
+            result["collection_size"] = deleted["collection_size"]
+
+        return result
+
+    def clear_collection(self):
+        self._broadcast("clear_collection")
+        print("✓ Collection cleared")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, top_k: int = None) -> List[Dict]:
+        """Embed the query once, then scatter-gather across shards"""
+        adaptive = top_k is None and setting("ADAPTIVE_TOP_K")
+        if top_k is None:
+            top_k = setting("ADAPTIVE_MAX_K") if adaptive else setting("TOP_K_RESULTS")
+
+        query_embedding = self.embedding_generator.generate_embedding(query)
+        results = self.search_by_embedding(query_embedding, top_k)
+        return adaptive_cut(results) if adaptive else results
+
+    def search_by_embedding(self, query_embedding: np.ndarray, top_k: int,
+                            rerank_candidates: int = None, route_docs: int = None) -> List[Dict]:
+        """
+        Search every shard in parallel and keep the overall top_k by distance
+
+        With routing, each shard picks documents by the centroids of the
+        chunks it holds.
+        """
+        # Resolved here: per-query overrides live in this process, not in the workers
+        if rerank_candidates is None:
+            rerank_candidates = rerank_depth(self.index_backend)
+        if route_docs is None:
+            route_docs = routing_depth()
+        per_shard = self._broadcast(
+            "search_by_embedding",
+            as_vectors(query_embedding),
+            top_k,
+            rerank_candidates=rerank_candidates,
+            route_docs=route_docs
+        )
+        return heapq.nsmallest(
+            top_k,
+            itertools.chain.from_iterable(per_shard.values()),
+            key=lambda result: result["distance"]
+        )
+
+    def list_documents(self) -> Dict[str, Dict]:
+        """Documents across shards"""
+        documents: Dict[str, Dict] = {}
+        for shard_documents in self._broadcast("list_documents").values():
+            for doc_id, entry in shard_documents.items():
+                merged = documents.setdefault(doc_id, dict(entry))
+                # Shards count up to their highest chunk_id, so the largest is the document's
+                merged["num_chunks"] = max(merged["num_chunks"], entry["num_chunks"])
+        return documents
+
+    def has_document(self, doc_id: str) -> bool:
+        return doc_id in self.list_documents()
+
+    def get_chunk_text(self, metadata: Dict) -> Optional[str]:
+        """Ask the owning shard (or every shard for chunks without a doc_id)"""
+        if "doc_id" in metadata and "chunk_id" in metadata:
+            shard = shard_for(VectorStore.chunk_id_for(metadata), self.num_shards)
+            return self._scatter({shard: ("get_chunk_text", (metadata,), {})})[shard]
+
+        for text in self._broadcast("get_chunk_text", metadata).values():
+            if text is not None:
+                return text
+        return None
+
+    def get_collection_stats(self) -> Dict:
+        per_shard = self._broadcast("get_collection_stats")
+        return {
+            "total_chunks": sum(stats["total_chunks"] for stats in per_shard.values()),
+            "collection_name": self.collection_name,
+            "num_shards": self.num_shards,
+            "chunks_per_shard": [per_shard[shard]["total_chunks"] for shard in range(self.num_shards)]
+        }
+
+    def close(self):
+        """Persist and stop every shard worker"""
+        for shard, conn in enumerate(self._connections):
+            with self._locks[shard]:
+                try:
+                    conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
@@ -1,22 +1,87 @@
 import chromadb # pyright: ignore[reportMissingImports]
 from chromadb.config import Settings # pyright: ignore[reportMissingImports]
-from typing import List, Dict
+from typing import List, Dict, Optional, Set, Tuple
+import json
+import os
+import threading
 import uuid
+import numpy as np # pyright: ignore[reportMissingImports]
 from src.config import Config # pyright: ignore[reportMissingImports]
-from src.embeddings import EmbeddingGenerator
+from src.dedup import MinHashIndex
+from src.embeddings import EmbeddingGenerator, as_vectors
+from src.indexes import DocumentRouter, SidecarIndex, create_index, exact_rerank
+from src.metrics import annotate, span
+from src.performance_profiles import setting
+
+
+def rerank_depth(index_backend: str) -> int:
+    """Candidates reranked with full vectors (0 keeps the sidecar's ranking)"""
+    if index_backend == "two_stage":
+        return setting("REDUCED_CANDIDATES")
+    if index_backend == "pq" and setting("PQ_RERANK"):
+        return setting("PQ_RERANK_CANDIDATES")
+    return 0
+
+
+def routing_depth() -> int:
+    """Documents a query is routed to (0 searches every chunk)"""
+    return setting("DOC_ROUTING_TOP_DOCS") if setting("DOC_ROUTING") else 0
+
+
+def adaptive_cut(results: List[Dict]) -> List[Dict]:
+    """
+    Keep only the clearly relevant chunks of an over-fetched result list
+    
+    Results farther than ADAPTIVE_MAX_DISTANCE are dropped, then the list is
+    cut at the largest jump in distance if it is at least ADAPTIVE_ELBOW_GAP
+    (the "elbow" after the chunks that actually answer the query). At least
+    ADAPTIVE_MIN_K results are kept. The rule that decided the count is
+    attached to the active trace as "cutoff": "elbow", "threshold",
+    "min_k", "max_k" (nothing cut) or "exhausted" (fewer results than
+    fetched).
+    
+    Args:
+        results: Search results sorted by distance, closest first
+        
+    Returns:
+        The leading results to keep
+    """
+    min_k = setting("ADAPTIVE_MIN_K")
+    distances = [result["distance"] for result in results]
+    
+    keep = sum(1 for distance in distances if distance <= setting("ADAPTIVE_MAX_DISTANCE"))
+    if keep < min(min_k, len(results)):
+        keep, cutoff = min(min_k, len(results)), "min_k"
+    elif keep < len(results):
+        cutoff = "threshold"
+    else:
+        cutoff = "max_k" if len(results) >= setting("ADAPTIVE_MAX_K") else "exhausted"
+    
+    # Largest gap between neighbours the min bound allows cutting at
+    gaps = [(distances[i] - distances[i - 1], i) for i in range(max(min_k, 1), keep)]
+    if gaps:
+        gap, position = max(gaps)
+        if gap >= setting("ADAPTIVE_ELBOW_GAP"):
+            keep, cutoff = position, "elbow"
+    
+    annotate("cutoff", cutoff)
+    annotate("chunks_fetched", len(results))
+    return results[:keep]
+
 
 class VectorStore:
     """Manages ChromaDB vector database for document chunks"""
     
-    def __init__(self, collection_name: str = "documents"):
-        # Initialize ChromaDB
-        self.client = chromadb.PersistentClient(
+    def __init__(self, collection_name: str = "documents", client=None,
+                 embedding_generator: EmbeddingGenerator = None, index_backend: str = None):
+        # Initialize ChromaDB (a client and model can be shared between stores)
+        self.client = client or chromadb.PersistentClient(
             path=Config.VECTOR_DB_DIR,
             settings=Settings(anonymized_telemetry=False)
         )
         
         # Initialize embedding generator
-        self.embedding_generator = EmbeddingGenerator()
+        self.embedding_generator = embedding_generator or EmbeddingGenerator()
         
         # Get or create collection
         self.collection = self.client.get_or_create_collection(
@@ -24,8 +89,193 @@ class VectorStore:
             metadata={"description": "Document chunks with embeddings"}
         )
         
+        # Largest single write ChromaDB accepts
+        self.max_batch_size = min(
+            Config.WRITE_BATCH_SIZE,
+            getattr(self.client, "max_batch_size", Config.WRITE_BATCH_SIZE)
+        )
+        
+        # Per-document chunk index: doc_id -> {"filename", "num_pages", "num_chunks"}.
+        # Chunk ids are "<doc_id>:<chunk_id>", so a document's ids can be
+        # rebuilt from its entry without scanning the collection.
+        self.doc_index_path = os.path.join(Config.VECTOR_DB_DIR, f"{collection_name}_doc_index.json")
+        self.doc_index: Dict[str, Dict] = self._load_doc_index()
+        
+        # Guards the in-memory indexes, so queries can run while a background
+        # ingestion job writes (ChromaDB itself is safe to share between threads)
+        self._index_lock = threading.RLock()
+        
+        # Optional compact search index stored next to the collection
+        self.index_backend = index_backend or Config.INDEX_BACKEND
+        self.sidecar_index: Optional[SidecarIndex] = create_index(
+            self.index_backend,
+            os.path.join(Config.VECTOR_DB_DIR, f"{collection_name}_{self.index_backend}.npz")
+        )
+        # Rebuild if the sidecar missed writes (e.g. the process stopped before persisting)
+        if (self.sidecar_index is not None and self.sidecar_index.is_trained
+                and len(self.sidecar_index) != self.collection.count()):
+            self.rebuild_sidecar_index()
+        
+        # MinHash signatures of canonical chunks, used to spot near-duplicates before embedding.
+        # Duplicates are kept in the doc index as references to their canonical vector.
+        self.dedup_index: Optional[MinHashIndex] = None
+        if Config.DEDUP_ENABLED:
+            self.dedup_index = MinHashIndex(
+                os.path.join(Config.VECTOR_DB_DIR, f"{collection_name}_minhash.npz")
+            )
+        # Canonical chunks registered by split_duplicates() but not written yet
+        self._unwritten_canonicals: Set[str] = set()
+        self._referrers: Dict[str, Set[str]] = self._build_referrers()
+        
+        # Centroid of each document's chunks, so queries can be routed to the
+        # closest documents before any chunk is scanned
+        self.doc_router = DocumentRouter(
+            os.path.join(Config.VECTOR_DB_DIR, f"{collection_name}_doc_router.npz")
+        )
+        # Rebuild for collections created before the router (or after a crash before saving)
+        if len(self.doc_router) != len(self.doc_index):
+            self.rebuild_doc_router()
+        
         print(f"✓ Vector store initialized. Collection: {collection_name}")
     
+    @staticmethod
+    def chunk_ids_for(doc_id: str, num_chunks: int) -> List[str]:
+        """Vector ids of every chunk of a document"""
+        return [f"{doc_id}:{i}" for i in range(num_chunks)]
+    
+    def _load_doc_index(self) -> Dict[str, Dict]:
+        if os.path.exists(self.doc_index_path):
+            with open(self.doc_index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        
+        # Rebuild from stored metadata (one-off for collections created before the index)
+        index: Dict[str, Dict] = {}
+        total = self.collection.count()
+        for offset in range(0, total, self.max_batch_size):
+            page = self.collection.get(include=["metadatas"], limit=self.max_batch_size, offset=offset)
+            for metadata in page["metadatas"]:
+                self._index_chunk(index, metadata)
+        if index:
+            self._save_doc_index(index)
+        return index
+    
+    def _save_doc_index(self, index: Dict[str, Dict] = None):
+        tmp_path = self.doc_index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.doc_index if index is None else index, f)
+        os.replace(tmp_path, self.doc_index_path)
+    
+    @staticmethod
+    def _index_chunk(index: Dict[str, Dict], metadata: Dict):
+        doc_id = metadata.get("doc_id")
+        if not doc_id:
+            return
+        entry = index.setdefault(doc_id, {
+            "filename": metadata.get("filename", ""),
+            "num_pages": metadata.get("num_pages", 0),
+            "num_chunks": 0
+        })
+        entry["num_chunks"] = max(entry["num_chunks"], int(metadata.get("chunk_id", 0)) + 1)
+    
+    def _build_referrers(self) -> Dict[str, Set[str]]:
+        # canonical vector id -> ids of the duplicate chunks pointing at it
+        referrers: Dict[str, Set[str]] = {}
+        for doc_id, entry in self.doc_index.items():
+            for chunk_id, reference in entry.get("duplicates", {}).items():
+                referrers.setdefault(reference["canonical"], set()).add(f"{doc_id}:{chunk_id}")
+        return referrers
+    
+    def split_duplicates(self, chunks: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Separate near-duplicates of stored (or earlier) chunks before embedding
+        
+        New chunks are registered as canonical right away, so duplicates
+        within the same batch are caught too. If writing them fails, call
+        discard_unwritten() so later chunks do not reference missing vectors.
+        
+        Args:
+            chunks: Chunks with content and metadata
+            
+        Returns:
+            (chunks to embed, references as {"metadata", "canonical"})
+        """
+        if self.dedup_index is None:
+            return chunks, []
+        
+        unique, references = [], []
+        with span("dedup"):
+            for chunk in chunks:
+                metadata = chunk["metadata"]
+                # Only chunks with stable ids can point at, or be pointed at by, others
+                if "doc_id" not in metadata:
+                    unique.append(chunk)
+                    continue
+                
+                chunk_id = self.chunk_id_for(metadata)
+                signature = self.dedup_index.signature(chunk["content"])
+                canonical = self.dedup_index.find(signature)
+                if canonical is None or canonical == chunk_id:
+                    if canonical is None:
+                        self.dedup_index.add([chunk_id], signature[None, :])
+                        with self._index_lock:
+                            self._unwritten_canonicals.add(chunk_id)
+                    unique.append(chunk)
+                else:
+                    references.append({"metadata": metadata, "canonical": canonical})
+        
+        return unique, references
+    
+    def discard_unwritten(self, ids: List[str]) -> int:
+        """
+        Unregister canonical chunks whose write failed
+        
+        Args:
+            ids: Chunk ids of the failed batch; ids that were written, or
+                were never registered by split_duplicates(), are left alone
+            
+        Returns:
+            Number of signatures removed from the dedup index
+        """
+        if self.dedup_index is None:
+            return 0
+        with self._index_lock:
+            unwritten = [chunk_id for chunk_id in ids if chunk_id in self._unwritten_canonicals]
+            self._unwritten_canonicals.difference_update(unwritten)
+        return self.dedup_index.remove(unwritten)
+    
+    def add_references(self, references: List[Dict]):
+        """
+        Record duplicate chunks as references to their canonical vectors
+        
+        Args:
+            references: Output of split_duplicates(), written once the
+                canonical chunks are in the collection
+        """
+        with self._index_lock:
+            for reference in references:
+                metadata = reference["metadata"]
+                self._index_chunk(self.doc_index, metadata)
+                self.doc_index[metadata["doc_id"]].setdefault("duplicates", {})[str(metadata["chunk_id"])] = reference
+                self._referrers.setdefault(reference["canonical"], set()).add(self.chunk_id_for(metadata))
+            if references:
+                self._route_references(references)
+                self._save_doc_index()
+    
+    def _route_references(self, references: List[Dict]):
+        # A duplicate chunk counts towards its document's centroid with the canonical vector
+        canonical_ids = list(dict.fromkeys(reference["canonical"] for reference in references))
+        vectors = {}
+        for start in range(0, len(canonical_ids), self.max_batch_size):
+            page = self.collection.get(ids=canonical_ids[start:start + self.max_batch_size], include=["embeddings"])
+            vectors.update(zip(page["ids"], page["embeddings"]))
+        
+        routed = [reference for reference in references if reference["canonical"] in vectors]
+        if routed:
+            self.doc_router.add(
+                [reference["metadata"]["doc_id"] for reference in routed],
+                np.asarray([vectors[reference["canonical"]] for reference in routed], dtype=np.float32)
+            )
+    
     def add_documents(self, chunks: List[Dict]) -> Dict:
         """
         Add document chunks to vector store
@@ -37,61 +287,360 @@ class VectorStore:
             Status dictionary
         """
         try:
-            # Extract texts
-            texts = [chunk["content"] for chunk in chunks]
+            # Near-duplicates become references instead of new vectors
+            chunks, references = self.split_duplicates(chunks)
             
-            # Generate embeddings
-            print(f"Generating embeddings for {len(texts)} chunks...")
-            embeddings = self.embedding_generator.generate_embeddings_batch(texts)
+            if chunks:
+                # Extract texts
+                texts = [chunk["content"] for chunk in chunks]
+                
+                # Generate embeddings
+                print(f"Generating embeddings for {len(texts)} chunks...")
+                embeddings = self.embedding_generator.generate_embeddings_batch(texts)
+                
+                # Add to collection
+                metadatas = [chunk["metadata"] for chunk in chunks]
+                self.add_embeddings(texts, embeddings, metadatas)
             
-            # Prepare data for ChromaDB
-            ids = [str(uuid.uuid4()) for _ in range(len(chunks))]
-            metadatas = [chunk["metadata"] for chunk in chunks]
+            self.add_references(references)
+            self.persist_indexes()
             
-            # Add to collection
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings.tolist(),
-                documents=texts,
-                metadatas=metadatas
-            )
-            
-            print(f"✓ Added {len(chunks)} chunks to vector store")
+            print(f"✓ Added {len(chunks)} chunks to vector store ({len(references)} duplicates referenced)")
             
             return {
                 "success": True,
                 "num_chunks_added": len(chunks),
+                "num_duplicates": len(references),
                 "collection_size": self.collection.count()
             }
             
         except Exception as e:
+            self.discard_unwritten([
+                self.chunk_id_for(chunk["metadata"]) for chunk in chunks if "doc_id" in chunk["metadata"]
+            ])
             return {
                 "success": False,
                 "error": str(e)
             }
     
+    @staticmethod
+    def chunk_id_for(metadata: Dict) -> str:
+        """Vector id of a chunk (random for chunks without a doc_id)"""
+        if "doc_id" in metadata:
+            return f"{metadata['doc_id']}:{metadata['chunk_id']}"
+        return str(uuid.uuid4())
+    
+    def add_embeddings(self, texts: List[str], embeddings: np.ndarray, metadatas: List[Dict],
+                       ids: List[str] = None) -> List[str]:
+        """
+        Write already-embedded chunks in batches ChromaDB accepts
+        
+        Args:
+            texts: Chunk texts
+            embeddings: (n, dim) embedding array
+            metadatas: Chunk metadata
+            ids: Precomputed vector ids (derived from the metadata by default)
+            
+        Returns:
+            Ids assigned to the chunks
+        """
+        if ids is None:
+            ids = [self.chunk_id_for(metadata) for metadata in metadatas]
+        embeddings = as_vectors(embeddings)
+        
+        with span("vector_write"):
+            for start in range(0, len(ids), self.max_batch_size):
+                end = start + self.max_batch_size
+                # Row slices are views; ChromaDB accepts ndarrays directly
+                self.collection.add(
+                    ids=ids[start:end],
+                    embeddings=embeddings[start:end],
+                    documents=texts[start:end],
+                    metadatas=metadatas[start:end]
+                )
+        
+        with self._index_lock:
+            self._unwritten_canonicals.difference_update(ids)
+            for metadata in metadatas:
+                self._index_chunk(self.doc_index, metadata)
+            self._save_doc_index()
+            
+            routed = [i for i, metadata in enumerate(metadatas) if "doc_id" in metadata]
+            if routed:
+                self.doc_router.add([metadatas[i]["doc_id"] for i in routed], embeddings[routed])
+            
+            self._update_sidecar_index(ids, embeddings)
+        
+        return ids
+    
+    def _update_sidecar_index(self, ids: List[str], embeddings: np.ndarray):
+        if self.sidecar_index is None:
+            return
+        
+        count = self.collection.count()
+        fit_size = self.sidecar_index.fit_size
+        # Train once enough chunks exist, then retrain while the corpus keeps
+        # doubling past the sample the index was trained on
+        if count >= Config.INDEX_MIN_FIT and (
+            not self.sidecar_index.is_trained
+            or (fit_size < Config.INDEX_FIT_SAMPLE and count >= 2 * fit_size)
+        ):
+            self.rebuild_sidecar_index()
+        elif self.sidecar_index.is_trained:
+            self.sidecar_index.add(ids, embeddings)
+    
+    def rebuild_sidecar_index(self):
+        """Retrain the sidecar index and re-encode every stored vector"""
+        with self._index_lock:
+            self._rebuild_sidecar_index()
+    
+    def _rebuild_sidecar_index(self):
+        total = self.collection.count()
+        
+        sample = []
+        for offset in range(0, min(total, Config.INDEX_FIT_SAMPLE), self.max_batch_size):
+            limit = min(self.max_batch_size, Config.INDEX_FIT_SAMPLE - offset)
+            page = self.collection.get(include=["embeddings"], limit=limit, offset=offset)
+            sample.append(np.asarray(page["embeddings"], dtype=np.float32))
+        if not sample:
+            return
+        self.sidecar_index.fit(np.concatenate(sample, axis=0))
+        
+        for offset in range(0, total, self.max_batch_size):
+            page = self.collection.get(include=["embeddings"], limit=self.max_batch_size, offset=offset)
+            self.sidecar_index.add(page["ids"], np.asarray(page["embeddings"], dtype=np.float32))
+        
+        self.persist_indexes()
+        print(f"✓ {self.index_backend} index trained on {self.sidecar_index.fit_size} vectors "
+              f"({self.sidecar_index.bytes_per_vector()} bytes per chunk)")
+    
+    def rebuild_doc_router(self):
+        """Recompute every document centroid from the stored vectors"""
+        with self._index_lock:
+            self.doc_router.reset()
+            total = self.collection.count()
+            for offset in range(0, total, self.max_batch_size):
+                page = self.collection.get(include=["embeddings", "metadatas"], limit=self.max_batch_size, offset=offset)
+                routed = [i for i, metadata in enumerate(page["metadatas"]) if metadata.get("doc_id")]
+                if routed:
+                    self.doc_router.add(
+                        [page["metadatas"][i]["doc_id"] for i in routed],
+                        np.asarray([page["embeddings"][i] for i in routed], dtype=np.float32)
+                    )
+            
+            references = [
+                reference
+                for entry in self.doc_index.values()
+                for reference in entry.get("duplicates", {}).values()
+            ]
+            if references:
+                self._route_references(references)
+            self.persist_indexes()
+            if total:
+                print(f"✓ Document router rebuilt ({len(self.doc_router)} documents)")
+    
+    def persist_indexes(self):
+        """Write sidecar indexes that changed since the last save"""
+        if self.sidecar_index is not None and self.sidecar_index.dirty and self.sidecar_index.is_trained:
+            self.sidecar_index.save()
+        if self.dedup_index is not None and self.dedup_index.dirty:
+            self.dedup_index.save()
+        if self.doc_router.dirty:
+            self.doc_router.save()
+    
+    def has_document(self, doc_id: str) -> bool:
+        """Whether a document with this id (content hash) is indexed"""
+        return doc_id in self.doc_index
+    
+    def list_documents(self) -> Dict[str, Dict]:
+        """Indexed documents: doc_id -> {"filename", "num_pages", "num_chunks"}"""
+        with self._index_lock:
+            return dict(self.doc_index)
+    
+    def delete_document(self, doc_id: str, ids: List[str] = None) -> Dict:
+        """
+        Remove one document's chunks without touching the rest of the collection
+        
+        Args:
+            doc_id: Document id (content hash) from the chunk metadata
+            ids: Chunk ids to delete when only part of the document is stored
+                here (e.g. one shard); defaults to all of its chunks
+            
+        Returns:
+            Status dictionary
+        """
+        with self._index_lock:
+            return self._delete_document(doc_id, ids)
+    
+    def _delete_document(self, doc_id: str, ids: Optional[List[str]]) -> Dict:
+        entry = self.doc_index.get(doc_id)
+        if entry is None:
+            return {
+                "success": False,
+                "error": f"Unknown document: {doc_id}"
+            }
+        
+        try:
+            duplicates = entry.get("duplicates", {})
+            if ids is None:
+                ids = [
+                    chunk_id for chunk_id in self.chunk_ids_for(doc_id, entry["num_chunks"])
+                    if chunk_id.rsplit(":", 1)[1] not in duplicates
+                ]
+            
+            # This document's references no longer hold on to their canonical vectors
+            for chunk_id, reference in duplicates.items():
+                self._referrers.get(reference["canonical"], set()).discard(f"{doc_id}:{chunk_id}")
+            
+            with span("vector_delete"):
+                # Vectors other documents still reference move to one of them
+                self._promote_referenced(ids)
+                for start in range(0, len(ids), self.max_batch_size):
+                    self.collection.delete(ids=ids[start:start + self.max_batch_size])
+            
+            if self.sidecar_index is not None:
+                self.sidecar_index.remove(ids)
+            if self.dedup_index is not None:
+                self.dedup_index.remove(ids)
+            self.doc_router.remove([doc_id])
+            self.persist_indexes()
+            
+            del self.doc_index[doc_id]
+            self._save_doc_index()
+            print(f"✓ Deleted {len(ids)} chunks of {entry['filename']}")
+            
+            return {
+                "success": True,
+                "num_chunks_deleted": len(ids) + len(duplicates),
+                "collection_size": self.collection.count()
+            }
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def _promote_referenced(self, ids: List[str]):
+        """
+        Re-home canonical vectors that are about to be deleted but still referenced
+        
+        The first remaining duplicate becomes the new canonical chunk (same
+        vector and text, its own metadata) and the other duplicates are
+        pointed at it, so no reference is left dangling.
+        """
+        for canonical in ids:
+            referrers = sorted(self._referrers.pop(canonical, ()))
+            if not referrers:
+                continue
+            
+            record = self.collection.get(ids=[canonical], include=["embeddings", "documents"])
+            if not record["ids"]:
+                continue
+            
+            new_id = referrers[0]
+            new_doc_id, new_chunk_id = new_id.rsplit(":", 1)
+            promoted = self.doc_index[new_doc_id]["duplicates"].pop(new_chunk_id)
+            self.collection.add(
+                ids=[new_id],
+                embeddings=record["embeddings"],
+                documents=record["documents"],
+                metadatas=[promoted["metadata"]]
+            )
+            if self.sidecar_index is not None and self.sidecar_index.is_trained:
+                self.sidecar_index.add([new_id], np.asarray(record["embeddings"], dtype=np.float32))
+            if self.dedup_index is not None:
+                self.dedup_index.rename(canonical, new_id)
+            
+            for referrer in referrers[1:]:
+                doc_id, chunk_id = referrer.rsplit(":", 1)
+                self.doc_index[doc_id]["duplicates"][chunk_id]["canonical"] = new_id
+            if len(referrers) > 1:
+                self._referrers[new_id] = set(referrers[1:])
+    
+    def replace_document(self, doc_id: str, chunks: List[Dict]) -> Dict:
+        """
+        Swap one document's chunks for a new version
+        
+        The new chunks are written before the old ones are removed, so the
+        document never disappears from search results in between.
+        
+        Args:
+            doc_id: Id of the document being replaced
+            chunks: Chunks of the new version (with their own doc_id)
+            
+        Returns:
+            Status dictionary
+        """
+        result = self.add_documents(chunks)
+        if not result["success"]:
+            return result
+        
+        new_doc_ids = {chunk["metadata"].get("doc_id") for chunk in chunks}
+        if doc_id in self.doc_index and doc_id not in new_doc_ids:
+            deleted = self.delete_document(doc_id)
+            if not deleted["success"]:
+                return deleted
+            result["num_chunks_deleted"] = deleted["num_chunks_deleted"]
+            result["collection_size"] = deleted["collection_size"]
+        
+        return result
+    
     def search(self, query: str, top_k: int = None) -> List[Dict]:
         """
         Search for relevant chunks using semantic similarity
         
         Args:
             query: Search query
-            top_k: Number of results to return
+            top_k: Number of results to return. By default ADAPTIVE_MAX_K
+                results are fetched and cut with adaptive_cut(), or exactly
+                TOP_K_RESULTS are returned when ADAPTIVE_TOP_K is off
+                (per-query overrides apply to both)
             
         Returns:
             List of relevant chunks with metadata
         """
+        adaptive = top_k is None and setting("ADAPTIVE_TOP_K")
         if top_k is None:
-            top_k = Config.TOP_K_RESULTS
+            top_k = setting("ADAPTIVE_MAX_K") if adaptive else setting("TOP_K_RESULTS")
         
         # Generate query embedding
         query_embedding = self.embedding_generator.generate_embedding(query)
+        results = self.search_by_embedding(query_embedding, top_k)
+        return adaptive_cut(results) if adaptive else results
+    
+    def search_by_embedding(self, query_embedding: np.ndarray, top_k: int,
+                            rerank_candidates: int = None, route_docs: int = None) -> List[Dict]:
+        """
+        Search with an already-computed query embedding
         
-        # Search in ChromaDB
-        results = self.collection.query(
-            query_embeddings=[query_embedding.tolist()],
-            n_results=top_k
-        )
+        Args:
+            query_embedding: (dim,) query vector
+            top_k: Number of results to return
+            rerank_candidates: Sidecar candidates reranked with full vectors
+                (derived from the retrieval settings by default)
+            route_docs: Documents searched, chosen by centroid (0 searches
+                every chunk; derived from the retrieval settings by default)
+            
+        Returns:
+            List of relevant chunks with metadata, closest first
+        """
+        query_embedding = as_vectors(query_embedding)
+        doc_ids = self.route(query_embedding, route_docs)
+        if self.sidecar_index is not None and len(self.sidecar_index):
+            if rerank_candidates is None:
+                rerank_candidates = rerank_depth(self.index_backend)
+            return self._sidecar_search(query_embedding, top_k, rerank_candidates, doc_ids)
+        
+        # Search in ChromaDB. Routed queries filter by document; unlike the
+        # sidecar path this skips duplicates whose canonical vector belongs
+        # to a document that was not routed to.
+        with span("vector_search"):
+            results = self.collection.query(
+                query_embeddings=query_embedding[None, :],
+                n_results=top_k,
+                where={"doc_id": {"$in": doc_ids}} if doc_ids is not None else None
+            )
         
         # Format results
         formatted_results = []
@@ -104,6 +653,118 @@ class VectorStore:
         
         return formatted_results
     
+    def route(self, query_embedding: np.ndarray, top_docs: int = None) -> Optional[List[str]]:
+        """
+        Documents a query should search
+        
+        Args:
+            query_embedding: (dim,) query vector
+            top_docs: Documents to keep (routing_depth() by default)
+            
+        Returns:
+            The top_docs documents with the closest centroids, or None to
+            search every chunk (routing off or a small collection)
+        """
+        if top_docs is None:
+            top_docs = routing_depth()
+        if not top_docs:
+            return None
+        with span("doc_routing"), self._index_lock:
+            if len(self.doc_router) <= top_docs:
+                return None
+            doc_ids, _ = self.doc_router.search(query_embedding, top_docs)
+        annotate("routed_documents", len(doc_ids))
+        return doc_ids
+    
+    def _partition_ids(self, doc_ids: List[str]) -> List[str]:
+        # Vector ids holding the documents' chunks (canonical ids for duplicates)
+        ids = []
+        for doc_id in doc_ids:
+            entry = self.doc_index.get(doc_id)
+            if entry is None:
+                continue
+            duplicates = entry.get("duplicates", {})
+            for chunk_id in range(entry["num_chunks"]):
+                reference = duplicates.get(str(chunk_id))
+                ids.append(reference["canonical"] if reference else f"{doc_id}:{chunk_id}")
+        return list(dict.fromkeys(ids))
+    
+    def _sidecar_search(self, query_embedding: np.ndarray, top_k: int, depth: int,
+                        doc_ids: List[str] = None) -> List[Dict]:
+        """Search the sidecar index (within doc_ids if given), reranking the top `depth` candidates exactly"""
+        with span("vector_search"), self._index_lock:
+            candidate_ids, candidate_distances = self.sidecar_index.search(
+                query_embedding,
+                max(depth, top_k),
+                ids=self._partition_ids(doc_ids) if doc_ids is not None else None
+            )
+        
+        if depth:
+            with span("rerank"):
+                candidates = self.collection.get(
+                    ids=candidate_ids,
+                    include=["embeddings", "documents", "metadatas"]
+                )
+                if not candidates["ids"]:
+                    return []
+                order, distances = exact_rerank(query_embedding, candidates["embeddings"], top_k)
+            
+            return [
+                {
+                    "content": candidates["documents"][i],
+                    "metadata": candidates["metadatas"][i],
+                    "distance": float(distance)
+                }
+                for i, distance in zip(order, distances)
+            ]
+        
+        # Without a rerank only texts and metadata are read, so ChromaDB never
+        # loads the full vectors into memory
+        records = self.collection.get(ids=candidate_ids, include=["documents", "metadatas"])
+        by_id = {
+            chunk_id: (document, metadata)
+            for chunk_id, document, metadata in zip(records["ids"], records["documents"], records["metadatas"])
+        }
+        return [
+            {
+                "content": by_id[chunk_id][0],
+                "metadata": by_id[chunk_id][1],
+                "distance": float(distance)
+            }
+            for chunk_id, distance in zip(candidate_ids, candidate_distances)
+            if chunk_id in by_id
+        ]
+    
+    def get_chunk_text(self, metadata: Dict) -> Optional[str]:
+        """
+        Look up the stored text of a chunk from its source metadata
+        
+        Args:
+            metadata: Source metadata as returned with search results
+            
+        Returns:
+            Chunk text, or None if it is no longer in the collection
+        """
+        if "doc_id" in metadata and "chunk_id" in metadata:
+            result = self.collection.get(
+                ids=[f"{metadata['doc_id']}:{metadata['chunk_id']}"],
+                include=["documents"]
+            )
+            return result["documents"][0] if result["documents"] else None
+        
+        if "filename" not in metadata or "chunk_id" not in metadata:
+            return None
+        
+        result = self.collection.get(
+            where={"$and": [
+                {"filename": metadata["filename"]},
+                {"chunk_id": metadata["chunk_id"]}
+            ]},
+            include=["documents"],
+            limit=1
+        )
+        return result["documents"][0] if result["documents"] else None
+    
     def get_collection_stats(self) -> Dict:
         """Get statistics about the collection"""
         return {
@@ -116,8 +777,23 @@ class VectorStore:
         self.client.delete_collection(self.collection.name)
         self.collection = self.client.create_collection(
             name=self.collection.name,
-            metadata={"description": "Document chunks with embeddings"}
+            metadata=self.collection.metadata or {"description": "Document chunks with embeddings"}
         )
+        self.doc_index = {}
+        self._referrers = {}
+        self._unwritten_canonicals = set()
+        self._save_doc_index()
+        if self.dedup_index is not None:
+            if os.path.exists(self.dedup_index.path):
+                os.remove(self.dedup_index.path)
+            self.dedup_index = MinHashIndex(self.dedup_index.path)
+        if self.sidecar_index is not None:
+            if os.path.exists(self.sidecar_index.path):
+                os.remove(self.sidecar_index.path)
+            self.sidecar_index = create_index(self.index_backend, self.sidecar_index.path)
+        if os.path.exists(self.doc_router.path):
+            os.remove(self.doc_router.path)
+        self.doc_router.reset()
         print("✓ Collection cleared")
     
     
\ No newline at end of file
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from tests.helpers import HashEmbeddings
+
+
+@pytest.fixture(autouse=True)
+def no_metrics_sink(monkeypatch):
+    """Keep tests from starting the process-wide sink under data/metrics"""
+    monkeypatch.setattr(Config, "METRICS_SINK_ENABLED", False)
+
+
+@pytest.fixture
+def db_dir(tmp_path, monkeypatch):
+    """Point the vector store, uploads and caches at a fresh directory"""
+    monkeypatch.setattr(Config, "VECTOR_DB_DIR", str(tmp_path / "vectordb"))
+    monkeypatch.setattr(Config, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    os.makedirs(Config.VECTOR_DB_DIR)
+    return tmp_path
+
+
+@pytest.fixture
+def make_store(db_dir):
+    from src.vector_store import VectorStore
+
+    def make(name: str = "documents", **kwargs):
+        return VectorStore(collection_name=name, embedding_generator=HashEmbeddings(), **kwargs)
+    return make
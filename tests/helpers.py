@@ -0,0 +1,64 @@
+import zlib
+
+import numpy as np
+
+
+class HashEmbeddings:
+    """Deterministic unit vectors seeded by the text, in place of the sentence-transformers model"""
+
+    dim = 32
+
+    def generate_embedding(self, text: str) -> np.ndarray:
+        return self.generate_embeddings_batch([text])[0]
+
+    def generate_embeddings_batch(self, texts, show_progress_bar: bool = True) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vectors[row] = np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(self.dim)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def unit_vectors(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    """Random unit vectors, (n, dim) float32"""
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_chunks(doc_id: str, texts):
+    """Chunks of one document as DocumentProcessor.chunk_text() produces them"""
+    return [
+        {
+            "content": text,
+            "metadata": {"doc_id": doc_id, "chunk_id": i, "filename": f"{doc_id}.pdf", "num_pages": 1}
+        }
+        for i, text in enumerate(texts)
+    ]
+
+
+def make_pdf(page_texts) -> bytes:
+    """A minimal PDF with one line of Helvetica text per page"""
+    num_pages = len(page_texts)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(num_pages))
+        + b"] /Count %d >>" % num_pages,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(page_texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode("latin-1") + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
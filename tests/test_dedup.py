@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+
+from src.config import Config
+from src.dedup import MinHashIndex, shingle_hashes
+from src.document_processor import DocumentProcessor
+from src.ingestion import IngestionPipeline
+from tests.helpers import make_chunks
+
+TEXTS = [
+    "the quarterly report shows revenue growth across every region this year",
+    "employees must complete the security training before the end of march",
+    "the new office opens next month with room for two hundred people",
+]
+
+
+class TextProcessor(DocumentProcessor):
+    """Treats each source as plain text, one chunk per line"""
+
+    def extract_text_from_pdf(self, pdf, name=None):
+        return {
+            "success": True,
+            "text": pdf.decode("utf-8"),
+            "metadata": {"doc_id": name, "filename": name, "num_pages": 1}
+        }
+
+    def chunk_text(self, text, metadata):
+        return make_chunks(metadata["doc_id"], text.split("\n"))
+
+
+def words(count: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    return [f"w{n}" for n in rng.integers(0, 5000, count)]
+
+
+def fail_writes(*args, **kwargs):
+    raise RuntimeError("disk full")
+
+
+@pytest.fixture(autouse=True)
+def dedup_enabled(monkeypatch):
+    monkeypatch.setattr(Config, "DEDUP_ENABLED", True)
+
+
+def test_near_duplicates_become_references(make_store):
+    store = make_store()
+    assert store.add_documents(make_chunks("doc-a", TEXTS))["num_chunks_added"] == 3
+
+    result = store.add_documents(make_chunks("doc-b", TEXTS[:2]))
+
+    assert result["num_chunks_added"] == 0
+    assert result["num_duplicates"] == 2
+    assert store.get_chunk_text({"doc_id": "doc-a", "chunk_id": 0}) == TEXTS[0]
+
+
+def test_failed_write_unregisters_canonicals(make_store):
+    store = make_store()
+    store.add_embeddings = fail_writes
+
+    result = store.add_documents(make_chunks("doc-a", TEXTS))
+
+    assert not result["success"]
+    assert len(store.dedup_index) == 0
+
+    # The same text arriving later is stored, not referenced to vectors that never existed
+    del store.add_embeddings
+    result = store.add_documents(make_chunks("doc-b", TEXTS))
+    assert result["num_chunks_added"] == 3
+    assert result["num_duplicates"] == 0
+    assert store.collection.count() == 3
+
+
+def test_failed_pipeline_write_unregisters_canonicals(make_store):
+    store = make_store()
+    store.add_embeddings = fail_writes
+    pipeline = IngestionPipeline(TextProcessor(), store)
+
+    with pytest.raises(RuntimeError, match="disk full"):
+        pipeline.run([("doc-a", "\n".join(TEXTS).encode("utf-8"))])
+
+    assert len(store.dedup_index) == 0
+
+
+def test_written_canonicals_survive_a_later_failure(make_store):
+    store = make_store()
+    store.add_documents(make_chunks("doc-a", TEXTS[:1]))
+    store.add_embeddings = fail_writes
+
+    store.add_documents(make_chunks("doc-b", TEXTS[1:]))
+
+    assert store.dedup_index.ids == ["doc-a:0"]
+
+
+def test_signature_agreement_estimates_jaccard():
+    index = MinHashIndex("", num_perm=256, bands=32)
+    base = words(200, seed=1)
+    edited = base[:100] + words(20, seed=2) + base[120:]
+
+    a, b = set(shingle_hashes(" ".join(base))), set(shingle_hashes(" ".join(edited)))
+    jaccard = len(a & b) / len(a | b)
+    agreement = np.mean(index.signature(" ".join(base)) == index.signature(" ".join(edited)))
+    assert agreement == pytest.approx(jaccard, abs=0.1)
+
+
+def test_lsh_finds_near_duplicates_above_the_threshold():
+    index = MinHashIndex("", threshold=0.85)
+    base = words(200, seed=1)
+    index.add(["doc-a:0", "doc-a:1"], np.stack([
+        index.signature(" ".join(base)),
+        index.signature(" ".join(words(200, seed=3)))
+    ]))
+
+    one_word_changed = base[:100] + ["changed"] + base[101:]
+    assert index.find(index.signature(" ".join(base))) == "doc-a:0"
+    assert index.find(index.signature(" ".join(one_word_changed))) == "doc-a:0"
+    assert index.find(index.signature(" ".join(words(200, seed=4)))) is None
+
+    # Half the text replaced is well below the threshold
+    half_changed = base[:100] + words(100, seed=5)
+    assert index.find(index.signature(" ".join(half_changed))) is None
+
+
+def test_strict_threshold_needs_identical_text():
+    index = MinHashIndex("", threshold=1.0)
+    base = words(200, seed=1)
+    index.add(["doc-a:0"], index.signature(" ".join(base))[None, :])
+
+    assert index.find(index.signature(" ".join(base))) == "doc-a:0"
+    assert index.find(index.signature(" ".join(base[:100] + words(10, seed=6) + base[110:]))) is None
+
+
+def test_minhash_remove_rename_and_reload(tmp_path):
+    path = str(tmp_path / "dedup.npz")
+    index = MinHashIndex(path)
+    signatures = [index.signature(" ".join(words(50, seed=seed))) for seed in range(3)]
+    index.add(["a", "b", "c"], np.stack(signatures))
+
+    assert index.remove(["b"]) == 1
+    assert index.find(signatures[1]) is None
+    index.rename("a", "a2")
+    assert index.find(signatures[0]) == "a2"
+    index.save()
+
+    reloaded = MinHashIndex(path)
+    assert sorted(reloaded.ids) == ["a2", "c"]
+    assert reloaded.find(signatures[2]) == "c"
@@ -0,0 +1,33 @@
+import pytest
+
+from src.indexes import DocumentRouter
+from tests.helpers import unit_vectors
+
+
+def test_router_centroids_stay_exact_across_batches():
+    vectors = unit_vectors(6)
+    router = DocumentRouter("")
+    router.add(["a", "b", "a"], vectors[:3])
+    router.add(["a", "c"], vectors[3:5])
+
+    assert len(router) == 3
+    centroid_a = (vectors[0] + vectors[2] + vectors[3]) / 3
+    docs, distances = router.search(centroid_a, 1)
+    assert docs == ["a"]
+    assert distances[0] == pytest.approx(0.0, abs=1e-5)
+
+
+def test_router_routes_to_closest_documents(tmp_path):
+    centres = unit_vectors(4, seed=3)
+    router = DocumentRouter(str(tmp_path / "router.npz"))
+    for doc, centre in enumerate(centres):
+        chunks = centre + 0.05 * unit_vectors(10, seed=10 + doc)
+        router.add([f"doc-{doc}"] * 10, chunks)
+
+    assert router.search(centres[2], 1)[0] == ["doc-2"]
+    assert router.search(centres[0], 4, ids=["doc-0", "doc-1"])[0] == ["doc-0", "doc-1"]
+
+    router.remove(["doc-2"])
+    assert "doc-2" not in router.search(centres[2], 4)[0]
+    router.save()
+    assert DocumentRouter(router.path).search(centres[1], 1)[0] == ["doc-1"]
@@ -0,0 +1,38 @@
+import threading
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from src.embedding_server import EmbeddingClient
+
+
+class BrokenConnection:
+    """Connection to a server that has gone away"""
+
+    closed = False
+
+    def send(self, message):
+        raise EOFError
+
+    def close(self):
+        self.closed = True
+
+
+def test_lost_connection_releases_the_reply_buffer():
+    client = EmbeddingClient.__new__(EmbeddingClient)
+    client.socket_path = "/nonexistent.sock"
+    client._local = threading.local()
+    conn = BrokenConnection()
+    buffer = SharedMemory(create=True, size=1024)
+    client._local.conn = conn
+    client._local.buffer = buffer
+    try:
+        with pytest.raises(EOFError):
+            client.encode(["text"])
+
+        assert conn.closed
+        assert buffer.buf is None
+        assert client._local.conn is None and client._local.buffer is None
+    finally:
+        buffer.close()
+        buffer.unlink()
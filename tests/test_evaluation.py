@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from src.evaluation import RetrievalEvaluator, pairwise_distances, pareto_front, top_k_indices
+from tests.helpers import make_chunks, unit_vectors
+
+
+def brute_force(queries: np.ndarray, corpus: np.ndarray, k: int) -> list:
+    distances = [[float(np.sum((q - c) ** 2)) for c in corpus] for q in queries]
+    return [list(np.argsort(row, kind="stable")[:k]) for row in distances]
+
+
+@pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+def test_pairwise_distances_match_the_definitions(space):
+    queries, corpus = 2.0 * unit_vectors(3, seed=1), unit_vectors(20, seed=2)
+    expected = np.empty((3, 20))
+    for i, q in enumerate(queries):
+        for j, c in enumerate(corpus):
+            if space == "l2":
+                expected[i, j] = np.sum((q - c) ** 2)
+            elif space == "cosine":
+                expected[i, j] = 1.0 - q @ c / (np.linalg.norm(q) * np.linalg.norm(c))
+            else:
+                expected[i, j] = 1.0 - q @ c
+    assert pairwise_distances(queries, corpus, space) == pytest.approx(expected, abs=1e-5)
+
+
+def test_top_k_indices_are_sorted_nearest_first():
+    queries, corpus = unit_vectors(10, seed=1), unit_vectors(200, seed=2)
+    nearest = top_k_indices(pairwise_distances(queries, corpus), 5)
+    assert [list(row) for row in nearest] == brute_force(queries, corpus, 5)
+
+
+def test_top_k_indices_clamps_k_to_the_corpus():
+    assert top_k_indices(np.array([[0.3, 0.1, 0.2]]), 10).tolist() == [[1, 2, 0]]
+
+
+def test_pareto_front_drops_dominated_configurations():
+    results = [
+        {"name": "slow exact", "recall": 1.0, "p50_ms": 9.0},
+        {"name": "fast", "recall": 0.8, "p50_ms": 1.0},
+        {"name": "dominated", "recall": 0.7, "p50_ms": 2.0},
+        {"name": "middle", "recall": 0.95, "p50_ms": 3.0},
+        {"name": "slower tie", "recall": 0.95, "p50_ms": 4.0},
+    ]
+    assert [r["name"] for r in pareto_front(results)] == ["fast", "middle", "slow exact"]
+
+
+@pytest.fixture
+def evaluator(make_store):
+    store = make_store()
+    for doc in range(4):
+        store.add_documents(make_chunks(f"doc-{doc}", [f"doc {doc} chunk {i}" for i in range(15)]))
+    evaluator = RetrievalEvaluator(store, [f"query {i}" for i in range(12)], k=5)
+    evaluator.build_ground_truth()
+    return evaluator
+
+
+def test_ground_truth_is_the_brute_force_top_k(evaluator):
+    assert len(evaluator.ids) == 60
+    nearest = brute_force(evaluator.query_embeddings, evaluator.corpus, 5)
+    assert evaluator.ground_truth == [{evaluator.ids[j] for j in row} for row in nearest]
+
+
+def test_recall_at_k_against_the_ground_truth(evaluator):
+    assert evaluator.evaluate("exact", evaluator.numpy_exact())["recall"] == 1.0
+    assert evaluator.evaluate("live", evaluator.chroma_current())["recall"] == 1.0
+
+    # Dropping the best hit of every query loses exactly one of k
+    exact = evaluator.numpy_exact()
+    result = evaluator.evaluate("miss one", lambda query, top_k: exact(query, top_k + 1)[1:])
+    assert result["recall"] == pytest.approx(4 / 5)
+    assert result["top_k"] == 5 and result["p50_ms"] <= result["p95_ms"]
+
+
+def test_reduced_searches_recover_recall_with_rerank(evaluator):
+    truncated = evaluator.evaluate("truncated", evaluator.numpy_truncated(8))["recall"]
+    search, _, _ = evaluator.two_stage(8, n_candidates=60)
+    assert truncated < 1.0
+    assert evaluator.evaluate("two-stage", search)["recall"] == 1.0
@@ -0,0 +1,52 @@
+import json
+
+from src.export_utils import ExportUtils
+
+DOCUMENTS = [{"name": "report.pdf", "doc_id": "doc-a", "pages": 3, "chunks": 7}]
+MESSAGES = [
+    {"role": "user", "content": "What grew?"},
+    {"role": "assistant", "content": "Revenue.", "sources": [{"filename": "report.pdf", "doc_id": "doc-a", "chunk_id": 2}]},
+]
+
+
+def lookup(source):
+    return f"text of {source['doc_id']}:{source['chunk_id']}\nsecond line"
+
+
+def test_markdown_stream_matches_the_joined_export():
+    pieces = list(ExportUtils.iter_chat_markdown(MESSAGES, DOCUMENTS))
+    assert len(pieces) > 1
+    assert "".join(pieces).split("\n", 2)[2] == ExportUtils.export_chat_to_markdown(MESSAGES, DOCUMENTS).split("\n", 2)[2]
+
+
+def test_markdown_quotes_cited_chunks():
+    text = "".join(ExportUtils.iter_chat_markdown(MESSAGES, DOCUMENTS, chunk_lookup=lookup))
+    assert "- **report.pdf** (3 pages, 7 chunks)" in text
+    assert "  > text of doc-a:2\n  > second line\n" in text
+
+
+def test_ndjson_has_one_record_per_line():
+    lines = list(ExportUtils.iter_chat_ndjson(MESSAGES, DOCUMENTS, {"total_queries": 1}, chunk_lookup=lookup))
+    records = [json.loads(line) for line in lines]
+
+    assert all(line.endswith("\n") and line.count("\n") == 1 for line in lines)
+    assert [record["type"] for record in records] == ["export", "document", "message", "message"]
+    assert records[0]["metrics"] == {"total_queries": 1}
+    assert records[3]["sources"][0]["text"] == "text of doc-a:2\nsecond line"
+    assert "sources" not in records[2]
+
+
+def test_query_log_round_trips_through_write_stream(tmp_path):
+    records = [
+        {"timestamp": "2026-01-01 10:00:00", "query": "é?", "response_time": 1.5, "num_chunks_retrieved": 2},
+        {"timestamp": "2026-01-01 10:00:05", "query": "b", "response_time": 0.5, "num_chunks_retrieved": 1,
+         "stages": {"search": 0.1}, "cutoff": "elbow"},
+    ]
+    path = tmp_path / "queries.ndjson"
+
+    written = ExportUtils.write_stream(ExportUtils.iter_query_log_ndjson(iter(records)), str(path))
+
+    assert written == path.stat().st_size
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["query"] for line in lines] == ["é?", "b"]
+    assert lines[0]["stages"] == {} and lines[1]["cutoff"] == "elbow"
@@ -0,0 +1,74 @@
+import pytest
+
+from src import document_processor
+from src.document_processor import DocumentProcessor
+from src.extraction_cache import PageTextCache
+from src.pdf_backends import PDFBackend
+
+
+class FakeBackend(PDFBackend):
+    name = "fake"
+
+    def __init__(self, source):
+        super().__init__(source)
+        self.extracted = []
+
+    @property
+    def num_pages(self) -> int:
+        return 3
+
+    def extract_page(self, page_num: int) -> str:
+        self.extracted.append(page_num)
+        return f"page {page_num}"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = PageTextCache(path=str(tmp_path / "pages.sqlite3"))
+    monkeypatch.setattr(document_processor, "get_page_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    opened = []
+
+    def select_backend(source):
+        opened.append(FakeBackend(source))
+        return opened[-1], {}
+    monkeypatch.setattr(document_processor, "select_backend", select_backend)
+    return opened
+
+
+def count_loads(cache, monkeypatch):
+    loads = []
+    load = cache._load
+    monkeypatch.setattr(cache, "_load", lambda doc_id: loads.append(doc_id) or load(doc_id))
+    return loads
+
+
+def test_partial_hit_reads_the_cache_once(cache, backends, monkeypatch):
+    processor = DocumentProcessor()
+    pdf = b"%PDF-1.4 fake"
+    cache.put_pages(processor.compute_doc_id(pdf), 3, {0: "cached page 0"})
+    loads = count_loads(cache, monkeypatch)
+
+    result = processor.extract_text_from_pdf(pdf, name="a.pdf")
+
+    assert result["success"]
+    assert len(loads) == 1
+    assert backends[0].extracted == [1, 2]
+    assert "cached page 0" in result["text"] and "page 2" in result["text"]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_full_hit_skips_extraction(cache, backends, monkeypatch):
+    processor = DocumentProcessor()
+    pdf = b"%PDF-1.4 fake"
+    processor.extract_text_from_pdf(pdf, name="a.pdf")
+    loads = count_loads(cache, monkeypatch)
+
+    result = processor.extract_text_from_pdf(pdf, name="a.pdf")
+
+    assert result["metadata"]["extractor"] == "cache"
+    assert len(loads) == 1 and len(backends) == 1
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from src.indexes import PQIndex, ReducedIndex, exact_rerank
+from tests.helpers import unit_vectors
+
+INDEXES = {
+    "reduced": lambda path: ReducedIndex(path, dims=16),
+    "pq": lambda path: PQIndex(path, subspaces=8, centroids=16, iterations=10),
+}
+
+
+def exact_neighbours(vectors: np.ndarray, query: np.ndarray, k: int) -> list:
+    return list(np.argsort(np.sum((vectors - query) ** 2, axis=1))[:k])
+
+
+@pytest.mark.parametrize("kind", sorted(INDEXES))
+def test_candidates_contain_the_nearest_neighbours(tmp_path, kind):
+    vectors = unit_vectors(500)
+    ids = [f"c{i}" for i in range(len(vectors))]
+    index = INDEXES[kind](str(tmp_path / "index.npz"))
+    assert not index.is_trained
+    index.fit(vectors)
+    index.add(ids, vectors)
+
+    hits = 0
+    for query in unit_vectors(20, seed=1):
+        candidates, distances = index.search(query, 50)
+        assert len(candidates) == 50
+        assert np.all(np.diff(distances) >= 0)
+        hits += len({ids[i] for i in exact_neighbours(vectors, query, 5)} & set(candidates))
+    assert hits / (20 * 5) >= 0.8
+
+
+@pytest.mark.parametrize("kind", sorted(INDEXES))
+def test_search_is_restricted_to_given_ids(tmp_path, kind):
+    vectors = unit_vectors(200)
+    ids = [f"c{i}" for i in range(len(vectors))]
+    index = INDEXES[kind](str(tmp_path / "index.npz"))
+    index.fit(vectors)
+    index.add(ids, vectors)
+
+    allowed = ids[100:110]
+    candidates, _ = index.search(vectors[0], 50, ids=allowed)
+    assert sorted(candidates) == sorted(allowed)
+
+
+@pytest.mark.parametrize("kind", sorted(INDEXES))
+def test_remove_and_reload(tmp_path, kind):
+    vectors = unit_vectors(200)
+    ids = [f"c{i}" for i in range(len(vectors))]
+    path = str(tmp_path / "index.npz")
+    index = INDEXES[kind](path)
+    index.fit(vectors)
+    index.add(ids, vectors)
+
+    assert index.remove(["c0", "c5", "missing"]) == 2
+    assert len(index) == 198
+    index.save()
+    assert not index.dirty
+
+    reloaded = INDEXES[kind](path)
+    assert reloaded.is_trained and len(reloaded) == 198
+    candidates, _ = reloaded.search(vectors[7], 1)
+    assert candidates == index.search(vectors[7], 1)[0]
+    assert "c0" not in reloaded.search(vectors[0], 198)[0]
+
+
+def test_exact_rerank_orders_by_true_distance():
+    candidates = unit_vectors(50)
+    query = candidates[17] + 0.01
+    positions, distances = exact_rerank(query, candidates, 5)
+
+    assert list(positions) == exact_neighbours(candidates, query, 5)
+    assert positions[0] == 17
+    assert np.all(np.diff(distances) >= 0)
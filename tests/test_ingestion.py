@@ -0,0 +1,158 @@
+import queue
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import src.ingestion
+from src.ingestion import IngestionPipeline
+from src.metrics import span, trace
+from tests.helpers import make_chunks
+
+
+def random_text(seed: int) -> str:
+    return " ".join(f"w{n}" for n in np.random.default_rng(seed).integers(0, 10 ** 6, 30))
+
+
+class FakeProcessor:
+    """Stands in for DocumentProcessor: every source yields `num_chunks` distinct chunks"""
+
+    def __init__(self, num_chunks: int, fail_on: str = None):
+        self.num_chunks = num_chunks
+        self.fail_on = fail_on
+        self.extracted = 0
+
+    def extract_text_from_pdf(self, pdf, name: str):
+        with span("pdf_extraction"):
+            self.extracted += 1
+        return {"success": True, "text": name, "metadata": {"doc_id": name, "filename": name, "num_pages": 1}}
+
+    def chunk_text(self, text: str, metadata):
+        if text == self.fail_on:
+            raise ValueError(f"cannot chunk {text}")
+        seed = int(text.split("-")[1])
+        return make_chunks(metadata["doc_id"], [random_text(1000 * seed + i) for i in range(self.num_chunks)])
+
+
+def sources(n: int):
+    return [(f"doc-{i}", b"") for i in range(n)]
+
+
+def run_in_thread(pipeline: IngestionPipeline, *args, timeout: float = 20):
+    """Run the pipeline and fail the test, instead of hanging, if it does not finish"""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = pipeline.run(*args)
+        except BaseException as e:
+            outcome["error"] = e
+
+    runner = threading.Thread(target=target, daemon=True)
+    runner.start()
+    runner.join(timeout)
+    assert not runner.is_alive(), "pipeline did not finish"
+    assert not [t for t in threading.enumerate() if t.name.startswith("ingest-")]
+    return outcome
+
+
+def test_every_chunk_is_written_in_order(make_store):
+    store = make_store()
+    pipeline = IngestionPipeline(FakeProcessor(23), store, queue_size=1, embed_batch_size=4, write_batch_size=7)
+    committed = []
+
+    result = run_in_thread(pipeline, sources(5), committed.append)["result"]
+
+    assert result["num_chunks_added"] == 115
+    assert [doc["name"] for doc in committed] == [f"doc-{i}" for i in range(5)]
+    assert store.get_collection_stats()["total_chunks"] == 115
+    documents = store.list_documents()
+    assert {doc_id: entry["num_chunks"] for doc_id, entry in documents.items()} == {f"doc-{i}": 23 for i in range(5)}
+    assert store.get_chunk_text({"doc_id": "doc-3", "chunk_id": 22}) == random_text(3022)
+
+
+def test_queues_stay_bounded_behind_a_slow_writer(make_store, monkeypatch):
+    sizes = []
+
+    class RecordingQueue(queue.Queue):
+        def put(self, item, block=True, timeout=None):
+            super().put(item, block, timeout)
+            sizes.append((self.maxsize, self.qsize()))
+
+    monkeypatch.setattr(src.ingestion, "queue", SimpleNamespace(Queue=RecordingQueue, Full=queue.Full, Empty=queue.Empty))
+    store = make_store()
+    processor = FakeProcessor(1)
+    pipeline = IngestionPipeline(processor, store, queue_size=2, write_batch_size=1)
+
+    release = threading.Event()
+    add_embeddings = store.add_embeddings
+
+    def blocked_write(*args, **kwargs):
+        release.wait()
+        return add_embeddings(*args, **kwargs)
+    monkeypatch.setattr(store, "add_embeddings", blocked_write)
+
+    runner = threading.Thread(target=pipeline.run, args=(sources(50),), daemon=True)
+    runner.start()
+    time.sleep(0.5)
+    # The stages upstream of the stalled writer fill their queues and stop
+    extracted_while_blocked = processor.extracted
+    release.set()
+    runner.join(20)
+
+    assert not runner.is_alive()
+    assert extracted_while_blocked <= 10
+    assert processor.extracted == 50
+    assert all(maxsize == 2 and size <= 2 for maxsize, size in sizes)
+    assert store.get_collection_stats()["total_chunks"] == 50
+
+
+def test_stage_failure_stops_the_pipeline(make_store):
+    store = make_store()
+    pipeline = IngestionPipeline(FakeProcessor(3, fail_on="doc-4"), store, queue_size=1, write_batch_size=2)
+
+    error = run_in_thread(pipeline, sources(20))["error"]
+
+    assert isinstance(error, RuntimeError)
+    assert "chunk stage" in str(error) and "cannot chunk doc-4" in str(error)
+    assert isinstance(error.__cause__, ValueError)
+
+
+def test_embedding_failure_stops_the_pipeline(make_store, monkeypatch):
+    store = make_store()
+
+    def broken_embeddings(texts, show_progress_bar=True):
+        raise MemoryError("out of memory")
+    monkeypatch.setattr(store.embedding_generator, "generate_embeddings_batch", broken_embeddings)
+    pipeline = IngestionPipeline(FakeProcessor(3), store, queue_size=1)
+
+    error = run_in_thread(pipeline, sources(20))["error"]
+
+    assert "embed stage" in str(error)
+    assert store.get_collection_stats()["total_chunks"] == 0
+
+
+def test_writer_failure_cancels_the_workers(make_store, monkeypatch):
+    store = make_store()
+
+    def broken_write(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(store, "add_embeddings", broken_write)
+    pipeline = IngestionPipeline(FakeProcessor(3), store, queue_size=1, write_batch_size=1)
+
+    error = run_in_thread(pipeline, sources(20))["error"]
+
+    assert isinstance(error, OSError)
+
+
+def test_stage_spans_land_in_the_callers_trace(make_store):
+    pipeline = IngestionPipeline(FakeProcessor(5), make_store(), queue_size=1, write_batch_size=2)
+
+    with trace() as ingestion_trace:
+        pipeline.run(sources(3))
+
+    # Extraction and chunking run in worker threads, writes on the calling one
+    assert {"pdf_extraction", "chunking", "vector_write"} <= set(ingestion_trace.stages)
+    assert all(seconds > 0 for seconds in ingestion_trace.stages.values())
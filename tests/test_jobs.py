@@ -0,0 +1,17 @@
+from src.jobs import IngestionJob
+
+
+def document_result(name: str, num_chunks: int, num_duplicates: int, success: bool = True):
+    return {"name": name, "success": success, "num_chunks": num_chunks, "num_duplicates": num_duplicates}
+
+
+def test_only_stored_chunks_count_as_added():
+    job = IngestionJob("job", "default", [("a.pdf", b""), ("b.pdf", b""), ("c.pdf", b"")])
+    job._on_document(document_result("a.pdf", 10, 0))
+    job._on_document(document_result("b.pdf", 8, 6))
+    job._on_document({"name": "c.pdf", "success": False, "error": "unreadable"})
+
+    status = job.status()
+    assert status["chunks_added"] == 12
+    assert status["num_duplicates"] == 6
+    assert status["documents_done"] == 3
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("openai")
+
+from src.load_testing import _arrival_offsets
+
+
+def queries(timestamps):
+    return [{"query": f"q{i}", "timestamp": timestamp} for i, timestamp in enumerate(timestamps)]
+
+
+def test_uniform_arrivals_are_evenly_spaced():
+    offsets = _arrival_offsets(queries([None] * 5), rate=4.0, arrival="uniform", speedup=1.0,
+                               rng=np.random.default_rng(0))
+    assert offsets == pytest.approx([0.0, 0.25, 0.5, 0.75, 1.0])
+
+
+def test_poisson_arrivals_match_the_rate():
+    offsets = _arrival_offsets(queries([None] * 20001), rate=10.0, arrival="poisson", speedup=1.0,
+                               rng=np.random.default_rng(0))
+    assert offsets[0] == 0.0
+    assert np.all(np.diff(offsets) >= 0)
+    assert np.mean(np.diff(offsets)) == pytest.approx(0.1, rel=0.05)
+
+
+def test_recorded_arrivals_keep_the_gaps_compressed_by_speedup():
+    offsets = _arrival_offsets(queries([100.0, 102.0, 110.0]), rate=None, arrival="recorded", speedup=2.0,
+                               rng=np.random.default_rng(0))
+    assert offsets == pytest.approx([0.0, 1.0, 5.0])
+
+
+def test_recorded_arrivals_need_timestamps():
+    with pytest.raises(ValueError, match="timestamp"):
+        _arrival_offsets(queries([100.0, None]), rate=None, arrival="recorded", speedup=1.0,
+                         rng=np.random.default_rng(0))
+
+
+def test_unknown_arrival_process_is_rejected():
+    with pytest.raises(ValueError, match="Unknown arrival"):
+        _arrival_offsets(queries([None]), rate=1.0, arrival="bursty", speedup=1.0,
+                         rng=np.random.default_rng(0))
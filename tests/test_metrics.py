@@ -0,0 +1,113 @@
+import contextvars
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.metrics import PerformanceMetrics, StreamingQuantiles, span, trace
+
+
+def test_empty_sketch_reports_zero():
+    assert StreamingQuantiles().quantile(0.5) == 0.0
+
+
+@pytest.mark.parametrize("q", [0.5, 0.9, 0.95, 0.99])
+def test_quantiles_within_relative_accuracy(q):
+    values = np.random.default_rng(0).lognormal(mean=-1.0, sigma=1.0, size=20000)
+    sketch = StreamingQuantiles(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(float(value))
+
+    exact = float(np.quantile(values, q))
+    assert sketch.quantile(q) == pytest.approx(exact, rel=0.03)
+    assert sketch.count == len(values)
+
+
+def test_values_outside_the_range_are_clamped():
+    sketch = StreamingQuantiles(min_value=1e-3, max_value=10.0)
+    for value in (0.0, 1e-6, 50.0, 1e9):
+        sketch.add(value)
+
+    assert sketch.quantile(0.0) == 1e-3
+    assert 10.0 <= sketch.quantile(1.0) <= 10.0 * sketch.gamma ** 2
+
+
+def test_concurrent_tracking_keeps_aggregates_consistent():
+    metrics = PerformanceMetrics(capacity=64, recent_records=16)
+
+    def record_queries():
+        for _ in range(2000):
+            metrics.track_query("q", 0.5, 2, [{}], {"search": 0.1})
+
+    def record_ingestions():
+        for _ in range(2000):
+            metrics.track_ingestion(1, 10, 1.0, {"embed": 0.5})
+            metrics.get_recent_queries()
+            metrics.get_summary_stats()
+
+    threads = [threading.Thread(target=record_queries) for _ in range(4)]
+    threads.append(threading.Thread(target=record_ingestions))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = metrics.get_summary_stats()
+    assert stats["total_queries"] == 8000
+    assert stats["total_chunks_retrieved"] == 16000
+    assert metrics.latency_quantiles.count == 8000
+    assert metrics.get_stage_breakdown()["search"] == pytest.approx(0.1)
+    assert metrics.get_ingestion_stage_breakdown()["embed"] == pytest.approx(1000.0)
+    assert len(metrics.get_response_time_series()) == 64
+
+
+def test_nested_spans_record_every_stage():
+    with trace() as query_trace:
+        with span("retrieval"):
+            time.sleep(0.02)
+            for _ in range(2):
+                with span("embedding"):
+                    time.sleep(0.01)
+
+    assert query_trace.stages["embedding"] >= 0.02
+    assert query_trace.stages["retrieval"] >= 0.04
+    assert query_trace.stages["retrieval"] > query_trace.stages["embedding"]
+
+
+def test_inner_trace_hides_its_spans_from_the_outer_one():
+    with trace() as outer:
+        with trace() as inner:
+            with span("embedding"):
+                pass
+        with span("llm_call"):
+            pass
+
+    assert list(inner.stages) == ["embedding"]
+    assert list(outer.stages) == ["llm_call"]
+
+
+def test_spans_outside_a_trace_are_dropped():
+    with span("embedding"):
+        pass
+    with trace() as query_trace:
+        pass
+    assert query_trace.stages == {}
+
+
+def test_threads_report_to_the_trace_of_the_context_they_run_in():
+    def work(stage: str):
+        with span(stage):
+            time.sleep(0.01)
+
+    with trace() as query_trace:
+        workers = [threading.Thread(target=contextvars.copy_context().run, args=(work, "worker")) for _ in range(4)]
+        # A thread started without the caller's context has no active trace
+        workers.append(threading.Thread(target=work, args=("detached",)))
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    assert list(query_trace.stages) == ["worker"]
+    assert query_trace.stages["worker"] >= 0.04
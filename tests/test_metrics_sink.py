@@ -0,0 +1,54 @@
+from src.metrics_sink import LATENCY_BUCKETS, MetricsSink
+
+
+def make_sink(tmp_path, instance: str) -> MetricsSink:
+    return MetricsSink(
+        db_path=str(tmp_path / "metrics.db"),
+        textfile_path=str(tmp_path / f"{instance}.prom"),
+        flush_interval=60,
+        instance=instance
+    )
+
+
+def test_exposition_covers_only_own_instance(tmp_path):
+    other = make_sink(tmp_path, "other")
+    other.record_query(0.2, 3)
+    other.close()
+
+    sink = make_sink(tmp_path, "local")
+    sink.record_query(0.2, 3)
+    sink.close()
+
+    text = sink.exposition()
+    assert 'instance="local"' in text
+    assert 'instance="other"' not in text
+    assert 'documind_queries_total{instance="local"} 1' in text
+
+
+def test_every_histogram_bucket_is_exposed(tmp_path):
+    sink = make_sink(tmp_path, "local")
+    sink.record_query(0.2, 3)
+    sink.close()
+
+    buckets = [line for line in sink.exposition().splitlines()
+               if line.startswith("documind_query_latency_seconds_bucket")]
+    assert len(buckets) == len(LATENCY_BUCKETS)
+    assert buckets[0] == 'documind_query_latency_seconds_bucket{instance="local",le="0.05"} 0'
+    assert buckets[-1] == 'documind_query_latency_seconds_bucket{instance="local",le="+Inf"} 1'
+
+
+def test_dropped_events_are_counted(tmp_path):
+    sink = MetricsSink(
+        db_path=str(tmp_path / "metrics.db"),
+        textfile_path=str(tmp_path / "local.prom"),
+        flush_interval=60,
+        instance="local",
+        max_queue=1
+    )
+    for _ in range(5):
+        sink.increment("documind_cache_hits_total", cache="pages")
+    sink.close()
+
+    text = sink.exposition()
+    assert 'documind_cache_hits_total{instance="local",cache="pages"} 1' in text
+    assert 'documind_metrics_dropped_total{instance="local"} 4' in text
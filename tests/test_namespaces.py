@@ -0,0 +1,58 @@
+import re
+
+import pytest
+
+from src.config import Config
+from src.namespaces import NamespaceManager, collection_name_for
+from tests.helpers import HashEmbeddings, make_chunks
+
+VALID_COLLECTION_NAME = re.compile(r"[a-zA-Z0-9][a-zA-Z0-9_-]{1,61}[a-zA-Z0-9]")
+
+
+def test_default_and_canonical_names_are_kept():
+    assert collection_name_for(Config.DEFAULT_NAMESPACE) == "documents"
+    assert collection_name_for("team-a") == "ns-team-a"
+
+
+def test_similar_namespaces_get_distinct_collections():
+    long_name = "x" * 70
+    namespaces = [
+        "team-a", "Team A", "team a", "team_a", "TEAM-A", "team--a", "-team-a", "team-a ",
+        long_name, long_name + "y", long_name.upper(), "documents", "!!!", "???"
+    ]
+    names = [collection_name_for(namespace) for namespace in namespaces]
+
+    assert len(set(names)) == len(namespaces)
+    assert "documents" not in names
+    for name in names:
+        assert VALID_COLLECTION_NAME.fullmatch(name), name
+
+
+def test_blank_namespace_is_rejected():
+    with pytest.raises(ValueError):
+        collection_name_for("   ")
+
+
+def test_tenants_with_similar_names_are_isolated(db_dir):
+    manager = NamespaceManager(memory_budget_mb=1024, embedding_generator=HashEmbeddings())
+    manager.get_store("team-a").add_documents(make_chunks("doc-a", ["alpha chunk"]))
+    manager.get_store("Team A").add_documents(make_chunks("doc-b", ["beta chunk"]))
+
+    assert set(manager.get_store("team-a").list_documents()) == {"doc-a"}
+    assert set(manager.get_store("Team A").list_documents()) == {"doc-b"}
+    assert manager.list_namespaces() == ["Team A", "team-a"]
+
+
+def test_store_in_use_is_not_evicted(db_dir):
+    manager = NamespaceManager(memory_budget_mb=1e-9, embedding_generator=HashEmbeddings())
+    manager.get_store("team-a").add_documents(make_chunks("doc-a", ["alpha chunk"]))
+    manager.touch("team-a")
+
+    with manager.using("team-a") as store:
+        manager.get_store("team-b").add_documents(make_chunks("doc-b", ["beta chunk"]))
+        manager.touch("team-b")
+        assert "team-a" in manager.get_stats()["open_namespaces"]
+        assert store.search("alpha chunk", top_k=1)[0]["metadata"]["doc_id"] == "doc-a"
+
+    assert manager.get_stats()["open_namespaces"] == ["team-b"]
+    assert manager.search("team-a", "alpha chunk", top_k=1)[0]["metadata"]["doc_id"] == "doc-a"
@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from src import pdf_backends
+from src.config import Config
+from src.pdf_backends import IsolatedBackend, PDFBackend, extract_page_ranges, select_backend
+from src.pdf_source import PDFSource
+from tests.helpers import make_pdf
+
+
+class FakeBackend(PDFBackend):
+    open_s = 0.0
+    page_s = 0.0
+    text = "some page text"
+
+    def __init__(self, source):
+        super().__init__(source)
+        time.sleep(self.open_s)
+
+    @property
+    def num_pages(self) -> int:
+        return 4
+
+    def extract_page(self, page_num: int) -> str:
+        time.sleep(self.page_s)
+        return self.text
+
+
+class SlowToOpen(FakeBackend):
+    name = "slow-open"
+    open_s = 0.3
+
+
+class SlowPages(FakeBackend):
+    name = "slow-pages"
+    page_s = 0.02
+
+
+class NoText(FakeBackend):
+    name = "no-text"
+    text = ""
+
+
+@pytest.fixture
+def fake_backends(monkeypatch):
+    backends = {backend.name: backend for backend in (SlowToOpen, SlowPages, NoText)}
+    monkeypatch.setattr(pdf_backends, "BACKENDS", backends)
+    monkeypatch.setattr(Config, "PDF_ISOLATE_EXTRACTION", False)
+    monkeypatch.setattr(Config, "PDF_PROBE_PAGES", 4)
+
+
+def test_probe_times_extraction_not_opening(fake_backends):
+    backend, pages = select_backend(PDFSource(b"%PDF"), candidates=["slow-open", "slow-pages"])
+    assert backend.name == "slow-open"
+    assert sorted(pages) == [0, 1, 2, 3]
+
+
+def test_probe_drops_backends_that_miss_text(fake_backends):
+    backend, _ = select_backend(PDFSource(b"%PDF"), candidates=["no-text", "slow-pages"])
+    assert backend.name == "slow-pages"
+
+
+@pytest.fixture
+def isolated_pdf():
+    backend = IsolatedBackend("pypdf2", PDFSource(make_pdf([f"Page {i} text" for i in range(4)])))
+    yield backend
+    backend.close()
+
+
+def test_page_past_its_timeout_is_skipped(isolated_pdf, monkeypatch):
+    assert isolated_pdf.num_pages == 4
+    assert isolated_pdf.extract_page(0) == "Page 0 text"
+
+    monkeypatch.setattr(Config, "PDF_PAGE_TIMEOUT_S", 0.0)
+    assert isolated_pdf.extract_page(1) == ""
+    assert isolated_pdf.skipped_pages == {1: "no reply within 0s"}
+
+    # The timed-out worker is replaced and the document reopened
+    monkeypatch.setattr(Config, "PDF_PAGE_TIMEOUT_S", 30.0)
+    assert isolated_pdf.extract_page(2) == "Page 2 text"
+    assert list(isolated_pdf.skipped_pages) == [1]
+
+
+def test_crashed_worker_is_replaced(isolated_pdf):
+    isolated_pdf._worker.process.kill()
+    isolated_pdf._worker.process.join()
+
+    assert isolated_pdf.extract_page(0) == ""
+    assert isolated_pdf.skipped_pages == {0: "worker crashed"}
+    assert isolated_pdf.extract_page(3) == "Page 3 text"
+
+
+@pytest.mark.parametrize("page_nums, workers", [
+    (list(range(10)), 3),
+    ([1, 2, 5, 8, 9], 2),
+    ([0, 4], 8),
+])
+def test_page_ranges_are_reassembled_by_page_number(page_nums, workers):
+    pdf = PDFSource(make_pdf([f"Page {i} text" for i in range(10)]))
+    pages, skipped = extract_page_ranges("pypdf2", pdf, page_nums, workers=workers)
+
+    assert pages == {page_num: f"Page {page_num} text" for page_num in page_nums}
+    assert skipped == {}
@@ -0,0 +1,32 @@
+import os
+
+from src.config import Config
+from src.document_processor import DocumentProcessor
+from src.pdf_source import PDFSource
+
+
+def persist(data: bytes, name: str, **kwargs) -> str:
+    source = PDFSource(data, name=name)
+    path = source.persist(**kwargs).result()
+    source.close()
+    return path
+
+
+def test_uploads_with_the_same_name_do_not_collide(db_dir):
+    first = persist(b"%PDF first", "report.pdf")
+    second = persist(b"%PDF second", "report.pdf")
+
+    assert first != second
+    assert os.path.basename(first) == os.path.basename(second) == "report.pdf"
+    assert os.path.dirname(os.path.dirname(first)) == Config.UPLOAD_DIR
+    with open(first, "rb") as f:
+        assert f.read() == b"%PDF first"
+    with open(second, "rb") as f:
+        assert f.read() == b"%PDF second"
+
+
+def test_persisted_path_is_keyed_by_doc_id(db_dir):
+    doc_id = DocumentProcessor.compute_doc_id(b"%PDF first")
+
+    assert persist(b"%PDF first", "../report.pdf") == os.path.join(Config.UPLOAD_DIR, doc_id, "report.pdf")
+    assert persist(b"%PDF first", "report.pdf", doc_id=doc_id) == os.path.join(Config.UPLOAD_DIR, doc_id, "report.pdf")
@@ -0,0 +1,62 @@
+import pytest
+
+from src.config import Config
+from src.performance_profiles import (
+    apply_profile, load_profiles, query_overrides, setting, validate_settings
+)
+
+
+@pytest.fixture
+def low_latency():
+    apply_profile("low-latency")
+    yield
+    apply_profile("default")
+
+
+def test_overrides_are_checked_against_the_active_profile(low_latency):
+    assert Config.ADAPTIVE_MAX_K == 3
+    with pytest.raises(ValueError, match="ADAPTIVE_MIN_K"):
+        with query_overrides(ADAPTIVE_MIN_K=4):
+            pass
+
+    with query_overrides(ADAPTIVE_MIN_K=3):
+        assert setting("ADAPTIVE_MIN_K") == 3
+
+
+def test_nested_overrides_are_checked_against_enclosing_ones():
+    with query_overrides(ADAPTIVE_MAX_K=10, ADAPTIVE_MIN_K=8):
+        with query_overrides(TOP_K_RESULTS=2):
+            assert setting("ADAPTIVE_MIN_K") == 8
+        with pytest.raises(ValueError):
+            with query_overrides(ADAPTIVE_MAX_K=6):
+                pass
+
+
+def test_profiles_are_checked_against_the_baseline():
+    base = {"ADAPTIVE_MIN_K": 1, "ADAPTIVE_MAX_K": 3, "CHUNK_SIZE": 500, "CHUNK_OVERLAP": 50}
+    assert validate_settings({"ADAPTIVE_MIN_K": 4}) == []
+    assert validate_settings({"ADAPTIVE_MIN_K": 4}, base=base)
+
+
+def test_custom_profiles_extend_builtin_ones(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text('{"support-desk": {"extends": "low-latency", "TOP_K_RESULTS": 4}}')
+
+    profiles = load_profiles(str(path))
+    assert profiles["support-desk"]["TOP_K_RESULTS"] == 4
+    assert profiles["support-desk"]["ADAPTIVE_MAX_K"] == 3
+
+
+@pytest.mark.parametrize("custom, problem", [
+    ('{"a": {"extends": "b"}, "b": {"extends": "a"}}', "extends itself"),
+    ('{"a": {"extends": "missing"}}', "Unknown performance profile"),
+    ('{"a": {"TOP_K": 4}}', "unknown setting"),
+    ('{"a": {"TOP_K_RESULTS": "4"}}', "must be int"),
+    ('{"a": {"INDEX_BACKEND": "faiss"}}', "must be one of"),
+    ('{"a": {"CHUNK_SIZE": 100, "CHUNK_OVERLAP": 100}}', "must be smaller"),
+])
+def test_invalid_profiles_are_rejected(tmp_path, custom, problem):
+    path = tmp_path / "profiles.json"
+    path.write_text(custom)
+    with pytest.raises(ValueError, match=problem):
+        load_profiles(str(path))
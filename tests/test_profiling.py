@@ -0,0 +1,81 @@
+import contextvars
+import threading
+import tracemalloc
+
+import pytest
+
+import src.profiling
+from src.profiling import profile_capture, profile_thread
+
+
+def crunch():
+    return sum(i * i for i in range(200000))
+
+
+def busy_worker():
+    with profile_thread():
+        crunch()
+
+
+def test_overlapping_captures_share_tracing():
+    first = profile_capture(True)
+    second = profile_capture(True)
+    first_capture = first.__enter__()
+    second_capture = second.__enter__()
+    data = [bytearray(1024) for _ in range(100)]
+
+    # The first capture to finish must not stop tracing under the second
+    first.__exit__(None, None, None)
+    assert tracemalloc.is_tracing()
+    second.__exit__(None, None, None)
+
+    assert not tracemalloc.is_tracing()
+    assert first_capture.peak_memory_kb > 0 and second_capture.peak_memory_kb > 0
+    del data
+
+
+def test_tracing_started_elsewhere_is_left_running():
+    tracemalloc.start()
+    try:
+        with profile_capture(True) as capture:
+            sum(range(1000))
+        assert tracemalloc.is_tracing()
+        assert capture.top_functions
+    finally:
+        tracemalloc.stop()
+
+
+def test_disabled_capture_yields_none():
+    with profile_capture(False) as capture:
+        pass
+    assert capture is None
+    assert not tracemalloc.is_tracing()
+
+
+def test_worker_threads_are_merged_into_the_capture():
+    with profile_capture(True, limit=100) as capture:
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(busy_worker,))
+        worker.start()
+        worker.join()
+
+    assert any(row["function"].startswith("crunch ") for row in capture.top_functions)
+
+
+def test_threads_outside_a_capture_are_not_profiled():
+    worker = threading.Thread(target=busy_worker)
+    with profile_capture(True) as capture:
+        worker.start()
+        worker.join()
+
+    assert capture._thread_profilers == []
+
+
+def test_failed_setup_releases_tracing(monkeypatch):
+    def broken_snapshot():
+        raise RuntimeError("snapshot failed")
+    monkeypatch.setattr(src.profiling, "_snapshot", broken_snapshot)
+
+    with pytest.raises(RuntimeError, match="snapshot failed"):
+        with profile_capture(True):
+            pass
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from src.sharding import ShardedVectorStore
+from tests.helpers import HashEmbeddings, make_chunks
+
+
+@pytest.fixture
+def sharded_store(db_dir):
+    store = ShardedVectorStore(collection_name="documents", num_shards=2, embedding_generator=HashEmbeddings())
+    yield store
+    store.close()
+
+
+def test_chunks_are_spread_and_found_across_shards(sharded_store):
+    chunks = make_chunks("doc-a", [f"chunk {i}" for i in range(20)])
+    assert sharded_store.add_documents(chunks)["success"]
+
+    stats = sharded_store.get_collection_stats()
+    assert stats["total_chunks"] == 20
+    assert all(count > 0 for count in stats["chunks_per_shard"])
+    assert sharded_store.list_documents()["doc-a"]["num_chunks"] == 20
+    assert sharded_store.search("chunk 7", top_k=1)[0]["content"] == "chunk 7"
+
+
+def test_store_keeps_working_after_a_shard_error(sharded_store):
+    sharded_store.add_documents(make_chunks("doc-a", [f"chunk {i}" for i in range(20)]))
+
+    with pytest.raises(RuntimeError) as error:
+        sharded_store._broadcast("search_by_embedding", np.ones(1, dtype=np.float32), 3)
+    # Both shards reject the query and both errors are reported
+    assert "Shard 0 failed" in str(error.value) and "Shard 1 failed" in str(error.value)
+
+    # No stale replies are left in the pipes for the next requests to read
+    assert sharded_store.get_collection_stats()["total_chunks"] == 20
+    assert sharded_store.search("chunk 3", top_k=1)[0]["content"] == "chunk 3"
+    assert sharded_store.delete_document("doc-a")["success"]
+    assert sharded_store.list_documents() == {}
@@ -0,0 +1,34 @@
+import pytest
+
+from src.metrics import trace
+from src.performance_profiles import query_overrides
+from src.vector_store import adaptive_cut
+
+SETTINGS = dict(ADAPTIVE_MIN_K=1, ADAPTIVE_MAX_K=5, ADAPTIVE_MAX_DISTANCE=1.0, ADAPTIVE_ELBOW_GAP=0.2)
+
+
+def cut(distances, **settings):
+    results = [{"id": f"c{i}", "distance": distance} for i, distance in enumerate(distances)]
+    with trace() as query_trace, query_overrides(**{**SETTINGS, **settings}):
+        kept = adaptive_cut(results)
+    return [result["distance"] for result in kept], query_trace.attributes["cutoff"]
+
+
+@pytest.mark.parametrize("distances, kept, cutoff", [
+    ([0.2, 0.25, 0.3, 0.35, 0.4], [0.2, 0.25, 0.3, 0.35, 0.4], "max_k"),
+    ([0.2, 0.25, 0.3], [0.2, 0.25, 0.3], "exhausted"),
+    ([0.2, 0.3, 0.4, 1.2, 1.5], [0.2, 0.3, 0.4], "threshold"),
+    ([0.2, 0.25, 0.7, 0.75, 0.8], [0.2, 0.25], "elbow"),
+    ([1.2, 1.3, 1.4], [1.2], "min_k"),
+    ([], [], "exhausted"),
+])
+def test_cutoff_rules(distances, kept, cutoff):
+    assert cut(distances) == (kept, cutoff)
+
+
+def test_elbow_never_cuts_below_min_k():
+    assert cut([0.1, 0.8, 0.85, 0.9], ADAPTIVE_MIN_K=2) == ([0.1, 0.8, 0.85, 0.9], "exhausted")
+
+
+def test_min_k_keeps_results_past_the_threshold():
+    assert cut([1.2, 1.3, 1.4], ADAPTIVE_MIN_K=2) == ([1.2, 1.3], "min_k")